@@ -4,27 +4,45 @@ from asyncio import exceptions
 import google.generativeai as genai
 from google.api_core import exceptions
 from config import Config
+from cassette import cassette, prompt_key
+from symbol_context import SymbolContext, fmt, is_missing
+from deadline import DeadlineExceeded, ensure
+from circuit_breaker import breakers, CircuitOpen
+from indicators import label as indicator_label
+from report_template import FALLBACK_TAG, is_low_signal, render, render_fallback
+from session_delta import delta_context
 import os
+import sys
 
 
 if not Config.IS_GITHUB:
     os.environ["HTTP_PROXY"] = Config.LOCAL_PROXY
     os.environ["HTTPS_PROXY"] = Config.LOCAL_PROXY
-    print(f"🌍 [本地模式] 已开启 Gemini 代理: {Config.LOCAL_PROXY}")
+    print(f"🌍 [本地模式] 已开启 Gemini 代理: {Config.LOCAL_PROXY}", file=sys.stderr)
 else:
-    print("☁️ [GitHub 模式] 直连 Google，不使用代理")
+    print("☁️ [GitHub 模式] 直连 Google，不使用代理", file=sys.stderr)
 
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
+# analyze 失败时返回的提示文本都以这些前缀开头 (断点续跑时不把它们当作已完成)
+# 降级成模板报告的也算失败，续跑时会重新请求 AI
+FAILURE_PREFIXES = ("❌", "AI 服务不可用", "AI 未生成", FALLBACK_TAG)
+
+
+def is_failed_insight(text):
+    return not text or text.strip().startswith(FAILURE_PREFIXES)
 
 
 
 class AIBrain:
     def __init__(self):
         # 1. 配置 Gemini
-        if not Config.GOOGLE_API_KEY:
+        # 离线回放不会真的调用 Gemini，允许没有 Key
+        if not Config.GOOGLE_API_KEY and not cassette.replaying:
             raise ValueError("请在 .env 中配置 GOOGLE_API_KEY")
-        genai.configure(api_key=Config.GOOGLE_API_KEY, transport="rest")
+        client_options = {"api_endpoint": Config.GEMINI_API_ENDPOINT} if Config.GEMINI_API_ENDPOINT else None
+        genai.configure(api_key=Config.GOOGLE_API_KEY or "replay", transport="rest",
+                        client_options=client_options)
         # 2. 初始化模型配置
         # generation_config 可以控制回复的随机性，temperature 越低越严谨
         self.generation_config = {
@@ -36,36 +54,62 @@ class AIBrain:
 
         self.model_name = Config.GEMINI_MODEL
 
-    def analyze(self, data, mode="pre"):
+        # 限流重试参数 (压测时可以调小)
+        self.max_retries = 3  # 最大重试次数
+        self.retry_delay = 60  # 每次等待秒数 (针对 Pro 模型建议设为 60s 以上)
+
+    def analyze(self, data, mode="pre", deadline=None):
+        """
+        生成单个标的的报告
+        - 信号平淡的标的直接用规则模板 (report_template.py)，不调用 Gemini
+        - Gemini 失败 (限流 / 熔断 / 预算用尽) 时降级为模板报告，而不是把错误提示推送出去
+        """
+        # 兼容旧的字典形式上下文 (例如断点续跑日志里读出来的)
+        ctx = data if isinstance(data, SymbolContext) else SymbolContext.from_dict(data)
+        if Config.TEMPLATE_FAST_PATH and is_low_signal(ctx):
+            print(f"📐 [模板] {ctx.symbol} 信号平淡，使用规则模板 (不调用 AI)")
+            return render(ctx, mode)
+
+        insight = self._ask_gemini(ctx, mode, ensure(deadline))
+        if is_failed_insight(insight):
+            print(f"📐 [模板] {ctx.symbol} AI 分析失败，降级为规则模板报告")
+            return render_fallback(ctx, mode, insight)
+        return insight
+
+    def _ask_gemini(self, ctx, mode, deadline):
         """
         全量数据投喂版
+        deadline: 整次运行的时间预算；单次请求超时取 Config.AI_TIMEOUT 与剩余预算的较小值，
+        剩余预算不够再请求 / 再等一轮限流重试时直接返回失败文本
         """
-        mode_name = "☀️ 盘前策略" if mode == "pre" else "🌙 盘后复盘"
-        print(f"🧠 [Gemini] 正在生成 {data['symbol']} {mode_name}...")
+        mode_name = {"pre": "☀️ 盘前策略", "monitor": "⚡ 盘中异动"}.get(mode, "🌙 盘后复盘")
+        print(f"🧠 [Gemini] 正在生成 {ctx.symbol} {mode_name}...")
+
+        # 盘后增量: 带着盘前基线的上下文只投喂变化的部分
+        if mode == "post" and ctx.session:
+            return self._send(ctx, *self._delta_prompt(ctx), deadline)
 
-        # --- 1. 数据提取  ---
+        # --- 1. 数据提取 (缺失字段统一显示 N/A) ---
         # 宏观
-        macro = data.get('macro', {})
-        spy_chg = macro.get('spy_change', 0.0)
-        qqq_chg = macro.get('qqq_change', 0.0)
+        spy_chg = ctx.show("spy_change")
+        qqq_chg = ctx.show("qqq_change")
 
         # 期权
-        opt = data.get('options', {})
-        pcr = opt.get('pcr', 'N/A')
-        pressure = opt.get('pressure', 'N/A')
+        pcr = ctx.show("pcr")
+        pressure = ctx.show("pressure")
 
         # 止损
-        stop_loss = round(data['quote']['price'] - Config.ATR_MULTIPLIER * data['technicals']['atr'], 2)
+        stop_loss = fmt(ctx.stop_loss(Config.ATR_MULTIPLIER))
 
         # 新闻与基本面
-        news_text = data.get('news', '暂无重大新闻')
-        target_price = data.get('fundamental', 'N/A')
+        news_text = '新闻获取超时 (数据缺失)' if 'news' in ctx.missing else (ctx.news or '暂无重大新闻')
+        target_price = ctx.show("target_price")
 
         # --- 2. 构建全量上下文 (Full Context) ---
         context_str = f"""
             [基础信息]
-            标的: {data['symbol']}
-            现价: ${data['quote']['price']} (涨跌幅 {data['quote']['change_pct']}%)
+            标的: {ctx.symbol}
+            现价: ${ctx.show("price")} (涨跌幅 {ctx.show("change_pct")}%)
     
             [大盘环境]
             🇺🇸 SPY (标普): {spy_chg}%
@@ -73,12 +117,13 @@ class AIBrain:
     
             [消息面 & 基本面] 🔥
             最新新闻: {news_text}
+            标题情绪: {ctx.show("news_score")} (本地词典打分，-1 利空 ~ +1 利好，仅供参考)
             机构目标价: ${target_price}
     
             [技术指标]
-            SMA20: ${data['technicals']['sma20']}
-            RSI(14): {data['technicals']['rsi']}
-            ATR(波动): {data['technicals']['atr']}
+            SMA20: ${ctx.show("sma20")}
+            RSI(14): {ctx.show("rsi")}
+            ATR(波动): {ctx.show("atr")}
     
             [期权筹码]
             PCR: {pcr}
@@ -88,6 +133,39 @@ class AIBrain:
             建议止损: < ${stop_loss}
         """
 
+        # 跨标的分析 (每次运行算一次)：Beta / 相对强弱 / 联动标的
+        if not is_missing(ctx.rs_rank):
+            context_str += f"""
+            [相对强弱 & 联动]
+            Beta (SPY / QQQ): {ctx.show("beta_spy")} / {ctx.show("beta_qqq")}
+            与 SPY 相关系数: {ctx.show("corr_spy")}
+            近 {Config.ANALYTICS_RS_WINDOW} 日相对强弱: 强于股票池 {ctx.show("rs_rank", 0)}% 的标的，相对 SPY 超额 {ctx.show("rs_excess")}%
+            联动标的: {ctx.peers or '无 (走势相对独立)'}
+        """
+
+        # Config.AI_INDICATORS 选出的额外指标 (多周期)
+        if ctx.indicators:
+            lines = "\n".join(f"            {indicator_label(name)}: {fmt(value)}" for name, value in ctx.indicators.items())
+            context_str += f"""
+            [扩展指标]
+{lines}
+        """
+
+        # 超出时间预算没拿到的数据，明确告诉 AI 不要臆测
+        if ctx.missing:
+            context_str += f"""
+            [数据缺失] ⏱️
+            以下字段因超时未获取，请勿臆测: {", ".join(ctx.missing)}
+        """
+
+        # 盘中监控触发的分析，把触发原因一并交给 AI (盘中模式放在最前面，作为分析的出发点)
+        if ctx.trigger:
+            trigger_str = f"""
+            [盘中触发] ⚡
+            {ctx.trigger}
+        """
+            context_str = trigger_str + context_str if mode == "monitor" else context_str + trigger_str
+
         print("-" * 40)
         print(f"📊 投喂数据预览 (含新闻):\n{context_str.strip()}")
         print("-" * 40)
@@ -124,6 +202,35 @@ class AIBrain:
             (数据如下：\n{context_str})
             """
 
+        elif mode == "monitor":
+            # === ⚡ 盘中模式 (由监控触发，不是开盘前的计划) ===
+            system_instruction = """
+            你是一位盯盘的日内交易员，刚刚收到一条盘中异动提醒。
+            分析核心：先判断【触发原因】是有效信号还是盘中噪音，再结合新闻、大盘和期权筹码给出当下该怎么做。
+            盘中时间宝贵，结论先行，不要复述没有变化的背景数据。
+            """
+
+            user_prompt = f"""
+            盘中触发: {ctx.trigger or '未注明触发原因'}
+
+            请围绕这条触发，给出【盘中应对】（中文）：
+
+            1. ⚡ **触发解读**：
+               - 这次触发是真突破 / 真破位，还是盘中噪音？
+               - 新闻 ({news_text}) 能否解释这次异动？
+
+            2. 🌍 **大盘配合**：
+               - 个股 {ctx.show("change_pct")}% vs QQQ {qqq_chg}% vs SPY {spy_chg}%，是个股独立行情还是跟随大盘？
+
+            3. 🎯 **关键价位**：
+               - 止损位 ${stop_loss}、压力位 ${pressure}、SMA20 ${ctx.show("sma20")}，现在离哪个最近？
+
+            4. 🚀 **即时操作**：
+               - 持仓者现在怎么做？空仓者是否介入？给出失效条件。
+
+            (数据如下：\n{context_str})
+            """
+
         else:
             system_instruction = """
                         你是一位拥有20年经验的"基金经理"和风控专家。你的核心能力是进行【收盘归因】和【隔夜风险评估】。
@@ -154,6 +261,35 @@ class AIBrain:
 
                         (完整数据如下：\n{context_str})
                         """
+        return self._send(ctx, system_instruction, user_prompt, deadline)
+
+    def _delta_prompt(self, ctx):
+        """
+        盘后增量版 Prompt: 盘前已经分析过完整数据，这里只给 "盘前 → 收盘" 的变化和新标题
+        返回 (system_instruction, user_prompt)
+        """
+        context_str = delta_context(ctx)
+        print("-" * 40)
+        print(f"📊 投喂数据预览 (盘前 → 收盘):\n{context_str}")
+        print("-" * 40)
+
+        system_instruction = """
+            你是一位拥有20年经验的"基金经理"和风控专家，今天盘前已经看过这只股票的完整数据。
+            现在只根据盘前到收盘的变化做【收盘归因】和【隔夜风险评估】，不要复述没有变化的信息。
+            """
+        user_prompt = f"""
+            请基于盘前 → 收盘的变化，撰写简明的【盘后复盘】（中文）：
+
+            1. 🔍 **变化归因**：今天的涨跌主要来自新标题、大盘还是情绪？(没有新标题就注明"无新催化剂")
+            2. ⚖️ **动能与筹码**：RSI / PCR 的变化说明了什么？收盘价相对 SMA20 和压力位的位置是否改变了逻辑？
+            3. 🔮 **明日剧本**：防守价、关注的阻力位，隔夜风险评级 (高 / 中 / 低) 并给出理由。
+
+            (变化数据如下：\n{context_str})
+            """
+        return system_instruction, user_prompt
+
+    def _send(self, ctx, system_instruction, user_prompt, deadline):
+        """发送 Prompt (熔断器 + 录制 / 回放 + 限流重试)，返回报告文本或失败提示"""
         # --- 4. 安全设置与调用 (保持不变) ---
         safety_settings = {
             HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
@@ -163,25 +299,30 @@ class AIBrain:
         }
 
         # --- ✨ 5. 核心修改：增加重试机制 ---
-        max_retries = 3  # 最大重试次数
-        retry_delay = 60  # 每次等待秒数 (针对 Pro 模型建议设为 60s 以上)
+        max_retries = self.max_retries
+        retry_delay = self.retry_delay
 
         for attempt in range(max_retries):
             try:
-                model = genai.GenerativeModel(
-                    model_name=self.model_name,
-                    generation_config=self.generation_config,
-                    system_instruction=system_instruction
-                )
-                # 发送请求
-                response = model.generate_content(user_prompt, safety_settings=safety_settings)
-                if response.candidates and response.candidates[0].content.parts:
-                    final_text = response.text
-                    if response.candidates[0].finish_reason.name == "MAX_TOKENS":
+                timeout = deadline.timeout(Config.AI_TIMEOUT, floor=Config.AI_MIN_TIMEOUT)
+            except DeadlineExceeded as e:
+                print(f"⏱️ [Gemini] 跳过 {ctx.symbol}: {e}")
+                return "❌ 分析失败: 运行时间预算已用尽"
+            try:
+                # 发送请求 (经过熔断器和录制/回放层)
+                result = breakers["gemini"].call(lambda: cassette.call(
+                    "gemini", prompt_key(self.model_name, system_instruction, user_prompt),
+                    lambda: self._generate(system_instruction, user_prompt, safety_settings, timeout)))
+                if result:
+                    final_text, finish_reason = result
+                    if finish_reason == "MAX_TOKENS":
                         final_text += "\n[⚠️ 截断]"
                     return final_text
                 else:
                     return "AI 未生成有效内容 (内容为空)"
+            except CircuitOpen as e:
+                print(f"🔌 [Gemini] {e}，跳过 {ctx.symbol}")
+                return f"AI 服务不可用: {e}"
             except Exception as e:
                 # 🔍 统一异常分析逻辑
                 error_str = str(e)
@@ -194,14 +335,16 @@ class AIBrain:
                         isinstance(e, exceptions.ResourceExhausted)
                 )
                 if is_rate_limit:
-                    import time
+                    # 动态计算等待时间：尝试次数越多，等待越久 (30s, 60s, 90s...)
+                    wait_time = retry_delay * (attempt + 1)
+                    if attempt < max_retries - 1 and not deadline.can_afford(wait_time + Config.AI_MIN_TIMEOUT):
+                        print(f"⏱️ [限流] 剩余时间预算不足以等待 {wait_time} 秒后重试，放弃。")
+                        return "❌ 分析失败: 触发 API 速率限制 (429)，时间预算不足以重试"
                     if attempt < max_retries - 1:
-                        # 动态计算等待时间：尝试次数越多，等待越久 (30s, 60s, 90s...)
-                        wait_time = retry_delay * (attempt + 1)
                         print(
                             f"⏳ [限流警告] 触发 Gemini 速率限制 (429)，正在休眠 {wait_time} 秒后重试 ({attempt + 1}/{max_retries})...")
                         print(f"   (错误信息: {error_str[:100]}...)")
-                        time.sleep(wait_time)
+                        cassette.sleep(wait_time)
                         continue  # 跳过本次循环，进入下一次尝试
                     else:
                         print(f"❌ [最终失败] 重试 {max_retries} 次后依然限流。")
@@ -210,4 +353,20 @@ class AIBrain:
                     # 其他非限流错误（如网络断开、Prompt过长等），直接报错不重试
                     print(f"❌ Gemini 调用报错 (非限流): {e}")
                     return f"AI 服务不可用: {str(e)}"
-        return "❌ 超过最大重试次数，分析失败"
\ No newline at end of file
+        return "❌ 超过最大重试次数，分析失败"
+
+    def _generate(self, system_instruction, user_prompt, safety_settings, timeout=None):
+        """
+        调用 Gemini，返回 (文本, 结束原因)；没有生成内容时返回 None
+        """
+        model = genai.GenerativeModel(
+            model_name=self.model_name,
+            generation_config=self.generation_config,
+            system_instruction=system_instruction
+        )
+        request_options = {"timeout": timeout} if timeout else None
+        response = model.generate_content(user_prompt, safety_settings=safety_settings,
+                                          request_options=request_options)
+        if response.candidates and response.candidates[0].content.parts:
+            return response.text, response.candidates[0].finish_reason.name
+        return None
\ No newline at end of file
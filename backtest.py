@@ -0,0 +1,238 @@
+# backtest.py
+"""
+RSI 阈值 + ATR 止损规则的向量化回测
+
+规则与线上保持一致:
+  - 入场: RSI(14) 下穿 Config.RSI_OVERSOLD (超卖 = 机会信号)，以当天收盘价买入
+  - 止损: 入场价 - ATR_MULTIPLIER × ATR(14) (与 AIBrain.analyze 的止损公式相同)
+  - 离场: 先触发者为准 —— 最低价触及止损 / RSI 上穿 Config.RSI_OVERBOUGHT / 持有满 horizon 天
+
+整个宇宙 (时间 × 标的) 一次性用 NumPy 计算，没有逐根 K 线的 Python 循环；
+参数网格在进程池里并行扫描，指标只算一次，写进面板文件后由每个工作进程 memmap 共享。
+
+用法:
+    python backtest.py --refresh --period 10y            # 先把日线下载进本地缓存
+    python backtest.py --oversold 20,25,30,35 --overbought 65,70,75,80 --atr 1,1.5,2,2.5,3
+"""
+import argparse
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from bar_cache import BarCache
+from panel_store import PanelStore
+from indicators import wilder
+
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+
+
+def load_panel(symbols, cache=None, store=None):
+    """
+    从日线缓存读出对齐后的面板: dates × symbols 的 close / high / low 矩阵 (缺失为 NaN)
+    矩阵是面板文件 (panel_store.py) 的 memmap 视图，pickle 只在缓存更新后解析一次
+    """
+    cache = cache or BarCache()
+    store = store or PanelStore(os.path.dirname(cache.cache_dir), dtype=np.float64)
+    panel = store.sync(cache, symbols)
+    if panel is None or not len(panel):
+        raise ValueError("日线缓存为空，请先运行 python backtest.py --refresh")
+    return {
+        "dates": panel.dates,
+        "symbols": panel.symbols,
+        "close": panel.field("close"),
+        "high": panel.field("high"),
+        "low": panel.field("low"),
+    }
+
+
+def wilder_rsi(close, window=RSI_WINDOW):
+    """对 T × N 矩阵逐列计算 Wilder RSI (pandas ewm 在 C 里完成递推)"""
+    change = pd.DataFrame(close).diff()
+    gain = wilder(change.clip(lower=0), window)
+    loss = wilder((-change).clip(lower=0), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + gain.to_numpy() / loss.to_numpy())
+    rsi[(loss.to_numpy() == 0) & ~np.isnan(gain.to_numpy())] = 100.0
+    return rsi
+
+
+def wilder_atr(high, low, close, window=ATR_WINDOW):
+    prev = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+    return wilder(pd.DataFrame(true_range), window).to_numpy()
+
+
+def prepare(panel):
+    """预先计算与参数无关的指标"""
+    panel = dict(panel)
+    panel["rsi"] = wilder_rsi(panel["close"])
+    panel["atr"] = wilder_atr(panel["high"], panel["low"], panel["close"])
+    return panel
+
+
+def evaluate(panel, oversold, overbought, atr_multiplier, horizon=20):
+    """
+    对一组参数做全宇宙回测，返回统计字典
+    只对入场点做向量化的前向窗口提取 (入场数 × horizon)，内存与参数个数无关。
+    """
+    close, low, rsi, atr = panel["close"], panel["low"], panel["rsi"], panel["atr"]
+    n_dates = close.shape[0]
+
+    crossed = (rsi[1:] < oversold) & (rsi[:-1] >= oversold)
+    entry_t, entry_s = np.nonzero(crossed)
+    entry_t = entry_t + 1
+    # 需要完整的前向窗口，且入场当天数据完整
+    valid = entry_t + horizon < n_dates
+    entry_t, entry_s = entry_t[valid], entry_s[valid]
+    entry_price = close[entry_t, entry_s]
+    stop = entry_price - atr_multiplier * atr[entry_t, entry_s]
+    ok = np.isfinite(entry_price) & np.isfinite(stop)
+    entry_t, entry_s, entry_price, stop = entry_t[ok], entry_s[ok], entry_price[ok], stop[ok]
+
+    trades = len(entry_t)
+    if trades == 0:
+        return {"oversold": oversold, "overbought": overbought, "atr_multiplier": atr_multiplier,
+                "trades": 0, "hit_rate": 0.0, "avg_return": 0.0, "stop_out_rate": 0.0, "max_drawdown": 0.0}
+
+    offsets = np.arange(1, horizon + 1)
+    rows = entry_t[:, None] + offsets[None, :]
+    cols = entry_s[:, None]
+    fut_low = low[rows, cols]
+    fut_rsi = rsi[rows, cols]
+    fut_close = close[rows, cols]
+
+    stop_hit = fut_low <= stop[:, None]
+    exit_hit = fut_rsi > overbought
+    never = horizon  # 窗口内没发生
+    first_stop = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), never)
+    first_exit = np.where(exit_hit.any(axis=1), exit_hit.argmax(axis=1), never)
+
+    stopped = first_stop <= first_exit
+    stopped &= first_stop < never
+    exit_k = np.where(stopped, first_stop, np.minimum(first_exit, horizon - 1))
+    exit_price = np.where(stopped, stop, fut_close[np.arange(trades), exit_k])
+    # 停牌等导致的 NaN 收盘价按持有到期前最后一个有效价处理成 0 收益
+    returns = np.nan_to_num(exit_price / entry_price - 1, nan=0.0)
+
+    # 回撤: 按离场日把所有交易的平均收益串成净值曲线
+    exit_day = entry_t + 1 + exit_k
+    day_sum = np.bincount(exit_day, weights=returns, minlength=n_dates)
+    day_cnt = np.bincount(exit_day, minlength=n_dates)
+    daily = np.divide(day_sum, day_cnt, out=np.zeros(n_dates), where=day_cnt > 0)
+    equity = np.cumprod(1 + daily)
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+
+    return {
+        "oversold": oversold,
+        "overbought": overbought,
+        "atr_multiplier": atr_multiplier,
+        "trades": trades,
+        "hit_rate": float((returns > 0).mean()),
+        "avg_return": float(returns.mean()),
+        "stop_out_rate": float(stopped.mean()),
+        "max_drawdown": float(drawdown.min()),
+    }
+
+
+# ---------------- 进程池 ----------------
+_WORKER_PANEL = None
+
+
+SHARED_FIELDS = ("close", "high", "low", "rsi", "atr")
+
+
+def _init_worker(path):
+    """工作进程直接 memmap 共享的面板文件，不通过 pickle 接收一份副本"""
+    global _WORKER_PANEL
+    panel = PanelStore(path=path, dtype=np.float64).open()
+    _WORKER_PANEL = {name: panel.field(name) for name in SHARED_FIELDS}
+
+
+def _run_chunk(args):
+    params, horizon = args
+    return [evaluate(_WORKER_PANEL, *p, horizon=horizon) for p in params]
+
+
+def sweep(panel, grid, horizon=20, workers=None):
+    """
+    在进程池里扫描参数网格；各进程映射同一个面板文件，参数按块分发
+    """
+    grid = list(grid)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(grid) == 1:
+        return [evaluate(panel, *p, horizon=horizon) for p in grid]
+
+    chunk = max(1, len(grid) // (workers * 4))
+    tasks = [(grid[i:i + chunk], horizon) for i in range(0, len(grid), chunk)]
+    results = []
+    with tempfile.TemporaryDirectory(prefix="sentinel-panel-") as tmp:
+        # 价格和预先算好的指标写进一个面板文件，所有进程映射同一份
+        shared = PanelStore(path=os.path.join(tmp, "prepared.bin"), dtype=np.float64)
+        shared.write(panel["dates"], np.stack([panel[name] for name in SHARED_FIELDS], axis=1),
+                     panel["symbols"], SHARED_FIELDS)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared.path,)) as pool:
+            for part in pool.map(_run_chunk, tasks):
+                results.extend(part)
+    return results
+
+
+def _floats(text):
+    return [float(x) for x in text.split(",") if x.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSI / ATR 止损规则向量化回测")
+    parser.add_argument("--symbols", default=None, help="逗号分隔的标的，默认使用缓存里的全部标的")
+    parser.add_argument("--refresh", action="store_true", help="先批量下载日线写入缓存")
+    parser.add_argument("--period", default="10y", help="--refresh 时下载的历史长度")
+    parser.add_argument("--oversold", default="20,25,30,35", help="超卖阈值网格")
+    parser.add_argument("--overbought", default="65,70,75,80", help="超买阈值网格")
+    parser.add_argument("--atr", default="1.0,1.5,2.0,2.5,3.0", help="ATR 倍数网格")
+    parser.add_argument("--horizon", type=int, default=20, help="最长持有天数")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认等于 CPU 核数")
+    parser.add_argument("--top", type=int, default=10, help="打印排名前几的参数组合")
+    args = parser.parse_args()
+
+    cache = BarCache()
+    symbols = args.symbols.split(",") if args.symbols else None
+    if args.refresh:
+        cache.refresh(symbols or Config.WATCHLIST, period=args.period)
+    symbols = symbols or cache.symbols()
+
+    start = time.perf_counter()
+    panel = prepare(load_panel(symbols, cache))
+    print(f"📚 面板: {len(panel['dates'])} 个交易日 × {len(panel['symbols'])} 个标的 "
+          f"(指标 {time.perf_counter() - start:.2f}s)")
+
+    grid = list(itertools.product(_floats(args.oversold), _floats(args.overbought), _floats(args.atr)))
+    start = time.perf_counter()
+    results = sweep(panel, grid, horizon=args.horizon, workers=args.workers)
+    print(f"🧮 扫描 {len(grid)} 组参数用时 {time.perf_counter() - start:.2f}s")
+
+    header = f"{'超卖':>6}{'超买':>6}{'ATR倍数':>8}{'交易数':>8}{'胜率':>8}{'平均收益':>10}{'止损率':>8}{'最大回撤':>10}"
+
+    def row(r):
+        return (f"{r['oversold']:>8.0f}{r['overbought']:>8.0f}{r['atr_multiplier']:>10.2f}{r['trades']:>11}"
+                f"{r['hit_rate']:>10.1%}{r['avg_return']:>14.2%}{r['stop_out_rate']:>11.1%}{r['max_drawdown']:>14.1%}")
+
+    print(f"\n🏆 按平均收益排序 (前 {args.top}):")
+    print(header)
+    for r in sorted(results, key=lambda r: r["avg_return"], reverse=True)[:args.top]:
+        print(row(r))
+
+    current = evaluate(panel, Config.RSI_OVERSOLD, Config.RSI_OVERBOUGHT, Config.ATR_MULTIPLIER,
+                       horizon=args.horizon)
+    print("\n📌 当前 Config 参数:")
+    print(header)
+    print(row(current))
+
+
+if __name__ == "__main__":
+    main()
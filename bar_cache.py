@@ -0,0 +1,98 @@
+# bar_cache.py
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from config import Config
+
+
+class BarCache:
+    """
+    本地日线缓存：每个标的一个 pickle 文件 (列为 open/high/low/close/volume，索引为日期)
+    回测、相关性分析等离线计算都从这里读，不必每次联网下载多年数据。
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = os.path.join(cache_dir or Config.CACHE_DIR, "bars")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, symbol):
+        return os.path.join(self.cache_dir, f"{symbol.replace('/', '_')}.pkl")
+
+    def load(self, symbol):
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            print(f"    ⚠️ 读取 {symbol} 缓存失败: {e}")
+            return None
+
+    def save(self, symbol, df):
+        if df is None or df.empty:
+            return
+        df.to_pickle(self._path(symbol))
+
+    def symbols(self):
+        return sorted(f[:-4] for f in os.listdir(self.cache_dir) if f.endswith(".pkl"))
+
+    def refresh(self, symbols, period="10y", chunk_size=50):
+        """
+        批量下载多年日线写入缓存 (yfinance 一次请求可以带多只股票)
+        """
+        import yfinance as yf
+
+        symbols = list(symbols)
+        for start in range(0, len(symbols), chunk_size):
+            chunk = symbols[start:start + chunk_size]
+            print(f"📥 [BarCache] 下载 {len(chunk)} 个标的 {period} 日线 ({start + len(chunk)}/{len(symbols)})...")
+            try:
+                df = yf.download(chunk, period=period, group_by="ticker", progress=False,
+                                 auto_adjust=True, threads=True, timeout=60)
+            except Exception as e:
+                print(f"    ❌ 批量下载失败: {e}")
+                continue
+
+            for symbol in chunk:
+                if isinstance(df.columns, pd.MultiIndex):
+                    if symbol not in df.columns.get_level_values(0):
+                        continue
+                    sub = df[symbol]
+                else:
+                    sub = df
+                sub = sub.rename(columns={"Open": "open", "High": "high", "Low": "low",
+                                          "Close": "close", "Volume": "volume"})
+                sub = sub[["open", "high", "low", "close", "volume"]].dropna(subset=["close"])
+                sub.index = pd.to_datetime(sub.index)
+                self.save(symbol, sub)
+
+
+class OptionChainCache:
+    """
+    期权链缓存：每个标的一个 pickle，内容为 {fetched_at (UTC), puts, calls}
+    配合交易日历判断：抓取之后没有再开过盘，缓存就仍然是最新的。
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = os.path.join(cache_dir or Config.CACHE_DIR, "options")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, symbol):
+        return os.path.join(self.cache_dir, f"{symbol.replace('/', '_')}.pkl")
+
+    def load(self, symbol):
+        """返回 (fetched_at, chain)，没有缓存时返回 None；chain 为 (puts, calls) 或 None (无期权)"""
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None
+        try:
+            entry = pd.read_pickle(path)
+        except Exception as e:
+            print(f"    ⚠️ 读取 {symbol} 期权缓存失败: {e}")
+            return None
+        return entry["fetched_at"], entry["chain"]
+
+    def save(self, symbol, chain, fetched_at=None):
+        pd.to_pickle({"fetched_at": fetched_at or datetime.now(timezone.utc), "chain": chain}, self._path(symbol))
@@ -0,0 +1,149 @@
+# cassette.py
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+
+class CassetteMiss(KeyError):
+    """回放模式下找不到对应的录制记录"""
+
+
+class Cassette:
+    """
+    外部 I/O 的录制 / 回放层
+    所有出网调用 (yfinance 下载、期权链、info、RSS、Gemini、Webhook) 都经过 call()：
+      - record: 正常联网，同时把结果编码后存下来，退出时写成 gzip 压缩的 JSON
+      - replay: 完全不联网，直接返回录制结果；sleep 也变成空操作，整条流水线按 CPU 速度跑完
+      - 未启用: 原样调用，没有任何额外开销
+    """
+
+    def __init__(self):
+        self.mode = None
+        self.path = None
+        self.entries = {}
+        self.meta = {}
+        self.counters = {}
+        self.dirty = False
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def record(self, path):
+        self.mode = "record"
+        self.path = path
+        self.entries = {}
+        self.meta = {}
+        atexit.register(self.save)
+        print(f"📼 [Cassette] 录制模式: {path}")
+
+    def replay(self, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        self.mode = "replay"
+        self.path = path
+        self.entries = payload["entries"]
+        self.meta = payload.get("meta", {})
+        print(f"📼 [Cassette] 回放模式: {path} ({len(self.entries)} 条记录)")
+
+    def save(self):
+        if self.mode != "record" or not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            json.dump({"version": 1, "meta": self.meta, "entries": self.entries},
+                      f, ensure_ascii=False, separators=(",", ":"), default=str)
+        self.dirty = False
+        print(f"📼 [Cassette] 已保存 {len(self.entries)} 条记录 -> {self.path}")
+
+    def next_key(self, kind):
+        """给请求内容不稳定的调用 (比如带时间戳的推送) 按调用顺序编号"""
+        self.counters[kind] = self.counters.get(kind, 0) + 1
+        return str(self.counters[kind])
+
+    def _replayed(self, entry_key, decode):
+        if entry_key not in self.entries:
+            raise CassetteMiss(f"回放记录缺失: {entry_key}")
+        value = self.entries[entry_key]
+        return decode(value) if decode else value
+
+    def _store(self, entry_key, result, encode):
+        self.entries[entry_key] = encode(result) if encode else result
+        self.dirty = True
+        return result
+
+    def call(self, kind, key, fn, encode=None, decode=None):
+        if not self.mode:
+            return fn()
+
+        entry_key = f"{kind}|{key}"
+        if self.replaying:
+            return self._replayed(entry_key, decode)
+        return self._store(entry_key, fn(), encode)
+
+    async def acall(self, kind, key, fn, encode=None, decode=None):
+        """call() 的异步版本，fn 是返回协程的函数；与同步调用共用同一份录制记录"""
+        if not self.mode:
+            return await fn()
+
+        entry_key = f"{kind}|{key}"
+        if self.replaying:
+            return self._replayed(entry_key, decode)
+        return self._store(entry_key, await fn(), encode)
+
+    def now(self, tz):
+        """录制时记下第一次取的时间，回放时返回同一个时间，保证输出可复现"""
+        if self.replaying and "now" in self.meta:
+            return datetime.fromisoformat(self.meta["now"]).astimezone(tz)
+        current = datetime.now(tz)
+        if self.mode == "record":
+            if "now" not in self.meta:
+                self.meta["now"] = current.isoformat()
+                self.dirty = True
+        return current
+
+    def sleep(self, seconds):
+        if not self.replaying:
+            time.sleep(seconds)
+
+
+def prompt_key(*parts):
+    """长文本 (Prompt) 做 key 时只存摘要"""
+    return hashlib.sha1("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def encode_frame(df):
+    """
+    DataFrame -> 紧凑的 split 结构 (None 表示空表)
+    df.attrs (比如 providers.py 记的数据源 "source") 一并录下，回放时报价来源 / 缓存兜底判断与录制时一致
+    """
+    if df is None:
+        return None
+    encoded = {
+        "index": [str(i) for i in df.index],
+        "columns": [str(c) for c in df.columns],
+        "data": df.astype(float).values.tolist(),
+    }
+    if df.attrs:
+        encoded["attrs"] = {str(k): str(v) for k, v in df.attrs.items()}
+    return encoded
+
+
+def decode_frame(value, datetime_index=True):
+    if value is None:
+        return None
+    import pandas as pd
+
+    index = pd.to_datetime(value["index"]) if datetime_index else value["index"]
+    df = pd.DataFrame(value["data"], index=index, columns=value["columns"])
+    # 早期录制的记录没有 attrs
+    df.attrs.update(value.get("attrs") or {})
+    return df
+
+
+# 全局唯一实例，由 main.py 根据 --record / --replay 开启
+cassette = Cassette()
@@ -0,0 +1,162 @@
+# circuit_breaker.py
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 每个外部数据源一个熔断器
+SOURCES = ("yahoo_rss", "google_rss", "chart", "options", "info", "gemini", "webhook")
+
+
+class CircuitOpen(Exception):
+    """熔断器处于打开状态，本次调用被直接拒绝 (没有发出请求)"""
+
+
+class CircuitBreaker:
+    """
+    单个数据源的熔断器，线程安全
+    - closed: 正常放行；连续失败 failure_threshold 次后打开
+    - open: 直接拒绝 (调用方走备用源或跳过这一步)，不再白等超时
+    - half_open: 打开 reset_timeout 秒后放行一次探测，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=120, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.trips = 0
+
+    def allow(self):
+        """是否放行这次调用；half_open 时同一时刻只放行一个探测请求"""
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.probing = False
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self.probing):
+                self.probing = self.state == HALF_OPEN
+                self.calls += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                print(f"🔌 [熔断] {self.name} 探测成功，恢复正常")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.probing = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.trips += 1
+                    print(f"🔌 [熔断] {self.name} 连续失败 {self.consecutive_failures} 次，"
+                          f"{self.reset_timeout} 秒内直接跳过")
+                self.state = OPEN
+                self.opened_at = self.clock()
+
+    def call(self, fn, failed=None):
+        """
+        经过熔断器调用 fn；抛异常或 failed(结果) 为真都算一次失败
+        熔断打开时抛出 CircuitOpen
+        """
+        if not self.allow():
+            raise CircuitOpen(f"{self.name} 已熔断")
+        try:
+            result = fn()
+        except Exception:
+            self.record_failure()
+            raise
+        if failed and failed(result):
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+
+    async def acall(self, fn, failed=None):
+        """call() 的异步版本，fn 返回协程"""
+        if not self.allow():
+            raise CircuitOpen(f"{self.name} 已熔断")
+        try:
+            result = await fn()
+        except BaseException:
+            # 被取消 (比如超出时间预算) 也算这次探测失败，否则 half_open 会一直卡在"探测中"
+            self.record_failure()
+            raise
+        if failed and failed(result):
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            return {"state": self.state, "calls": self.calls, "failures": self.failures,
+                    "rejected": self.rejected, "trips": self.trips}
+
+
+class BreakerBoard:
+    """按数据源名称取熔断器，并汇总成运行指标"""
+
+    def __init__(self, names=SOURCES, failure_threshold=3, reset_timeout=120):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.breakers = {}
+        for name in names:
+            self.get(name)
+
+    def get(self, name):
+        with self._lock:
+            if name not in self.breakers:
+                self.breakers[name] = CircuitBreaker(name, self.failure_threshold, self.reset_timeout)
+            return self.breakers[name]
+
+    __getitem__ = get
+
+    def configure(self, failure_threshold, reset_timeout):
+        """修改阈值并清空所有状态"""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.breakers = {name: CircuitBreaker(name, self.failure_threshold, self.reset_timeout)
+                             for name in self.breakers}
+
+    def summary(self):
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+
+    def format_table(self):
+        lines = [f"{'数据源':<10}{'状态':>10}{'调用':>6}{'失败':>6}{'拒绝':>6}{'熔断':>6}"]
+        for name, s in self.summary().items():
+            lines.append(f"{name:<13}{s['state']:>12}{s['calls']:>8}{s['failures']:>8}"
+                         f"{s['rejected']:>8}{s['trips']:>8}")
+        return "\n".join(lines)
+
+
+def _default_board():
+    from config import Config
+
+    return BreakerBoard(failure_threshold=Config.BREAKER_FAILURES, reset_timeout=Config.BREAKER_RESET)
+
+
+# 全局唯一实例，各模块共享同一份熔断状态
+breakers = _default_board()
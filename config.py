@@ -37,3 +37,116 @@ class Config:
     # 4. 本地代理地址 (你的梯子端口)
     # 只有在本地运行时才会被调用
     LOCAL_PROXY = "http://127.0.0.1:10809"
+
+    # 5. 分片执行 (CI 矩阵并行)
+    # 每个分片把分析结果写到这个目录，最后由 merge 任务统一收集推送
+    ARTIFACT_DIR = os.getenv("SENTINEL_ARTIFACT_DIR", "artifacts")
+
+    # 6. 断点续跑日志
+    # 每次运行按 (日期, 模式) 写一个 JSONL，中断后用 --resume 跳过已完成的标的
+    # CI 里按 (模式, 分片, 运行) 存进 actions/cache，重跑失败的任务时自动恢复并加 --resume
+    JOURNAL_DIR = os.getenv("SENTINEL_JOURNAL_DIR", "journal")
+
+    # 7. 外部服务地址 (压测时指向本地替身服务，平时不用改)
+    YAHOO_RSS_URL = os.getenv("YAHOO_RSS_URL", "https://finance.yahoo.com/rss/headline?s={symbol}")
+    GOOGLE_RSS_URL = os.getenv(
+        "GOOGLE_RSS_URL", "https://news.google.com/rss/search?q={symbol}+stock&hl=en-US&gl=US&ceid=US:en")
+    # 为空时使用 Gemini 官方 REST 地址
+    GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+
+    # 8. 盘中监控 (main.py monitor)
+    MONITOR_INTERVAL = 60  # 轮询批量报价的间隔 (秒)
+    MONITOR_COOLDOWN = 1800  # 同一标的同一种触发，多久之内不重复报警 (秒)
+    MONITOR_NEWS_EVERY = 5  # 每轮询多少次刷新一次新闻
+    MONITOR_NEWS_BURST = 3  # 一次刷新出现这么多条新标题，视为"新闻爆发"
+    MONITOR_OPTIONS_EVERY = 30  # 每轮询多少次刷新一次期权压力位
+    MONITOR_MAX_ALERTS = 3  # 每轮最多调用几次 AI，其余排队到下一轮 (防 Gemini 限流)
+
+    # 9. 本地缓存目录 (日线缓存、回测面板等)
+    CACHE_DIR = os.getenv("SENTINEL_CACHE_DIR", ".cache")
+
+    # 10. 运行历史库 (每次运行每个标的的快照)
+    HISTORY_DB = os.getenv("SENTINEL_HISTORY_DB", "history/sentinel.db")
+
+    # 11. 并发抓取
+    # 单个标的的各个数据源同时发出；阻塞的 yfinance 调用共用一个有界线程池，避免把 Yahoo 打出限流
+    DATA_IO_WORKERS = int(os.getenv("SENTINEL_DATA_IO_WORKERS", "8"))
+
+    # 12. 时间预算 (秒)
+    # 整次运行的总预算，一路传给每个阶段；超时的数据源记为缺失，预算用尽后剩余标的跳过 (可 --resume 补跑)
+    RUN_BUDGET = float(os.getenv("SENTINEL_RUN_BUDGET", "1800"))
+    SYMBOL_BUDGET = 45  # 单个标的抓数据最多等多久
+    SOURCE_TIMEOUT = 10  # 单个外部请求 (RSS 等) 的超时上限
+    AI_TIMEOUT = 90  # 单次 Gemini 请求的超时上限
+    AI_MIN_TIMEOUT = 15  # 剩余预算连这点都不够就不再请求 Gemini
+    WEBHOOK_TIMEOUT = 10  # 企业微信推送超时
+    DELIVERY_RESERVE = 60  # 最后留给汇总推送的时间，分析阶段的预算比总预算提前这么多到期
+
+    # 13. 熔断器 (每个外部数据源一个)
+    # 连续失败这么多次就熔断：之后的标的直接走备用源或跳过这一步，不再逐个等超时
+    BREAKER_FAILURES = 3
+    BREAKER_RESET = 300  # 熔断多少秒后放行一次探测请求
+
+    # 14. 跨标的分析 (每次运行算一次，注入每个标的的上下文)
+    ANALYTICS_BENCHMARKS = ["SPY", "QQQ"]  # 基准 (第一个用来算超额收益)
+    ANALYTICS_BETA_WINDOW = 60  # 滚动 Beta 的窗口 (交易日)
+    ANALYTICS_RS_WINDOW = 20  # 相对强弱看近多少个交易日的收益
+    ANALYTICS_CLUSTER_CORR = 0.7  # 相关系数超过它视为"联动"，连成一组
+
+    # 15. 技术指标 (indicators.py 注册表里的名字，"weekly." / "monthly." 前缀表示周线 / 月线)
+    # RSI(14) / ATR(14) / SMA20 固定会算；这里列的是额外交给 AI 的指标
+    AI_INDICATORS = ["sma50", "sma200", "macd_hist", "bb_width", "volatility20", "weekly.rsi14", "weekly.sma20"]
+
+    # 16. 日线面板文件 (panel_store.py，日期 × 字段 × 标的，各进程 memmap 共享)
+    PANEL_DTYPE = os.getenv("SENTINEL_PANEL_DTYPE", "float64")  # float32 文件小一半，精度足够看盘
+
+    # 17. 规则模板报告 (report_template.py)：信号平淡的标的不调用 AI，AI 失败时自动降级为模板
+    TEMPLATE_FAST_PATH = os.getenv("SENTINEL_TEMPLATE_FAST_PATH", "1") == "1"
+    QUIET_MOVE_PCT = 1.5  # 涨跌幅绝对值低于它才算平淡 (%)
+    QUIET_RSI_MARGIN = 10  # RSI 离超买 / 超卖线至少这么远
+    QUIET_PRESSURE_PCT = 3.0  # 现价离期权压力位至少这么远 (%)
+    PCR_BEARISH = 1.2  # PCR 高于它: 看跌期权偏多
+    PCR_BULLISH = 0.7  # PCR 低于它: 看涨期权偏多
+
+    # 18. 优先级调度 (scheduler.py)：先用批量报价 / 日线 / 新闻条数打分，重要的标的先分析先推送
+    SCHEDULER_ENABLED = os.getenv("SENTINEL_SCHEDULER", "1") == "1"
+    SCHEDULER_WEIGHTS = {"gap": 1.0, "stop": 1.0, "rsi": 0.8, "news": 0.5}
+    SCHEDULER_GAP_FULL = 3.0  # 跳空达到这个百分比时 gap 项满分
+    SCHEDULER_NEWS_FULL = 5  # 新闻达到这么多条时 news 项满分
+    SCHEDULER_NEWS_HOURS = 18  # 只数最近多少小时的新闻 (覆盖隔夜)
+    SCHEDULER_NEWS_BUDGET = 30  # 调度前批量抓新闻最多花多少秒
+
+    # 19. 行情数据源 (providers.py)：按延迟 / 错误率自动选最快的健康数据源，失败自动切换
+    # fmp / tiingo 走 OpenBB，需要上面的 API Key；全部失败时用本地缓存兜底
+    PROVIDER_ORDER = os.getenv("SENTINEL_PROVIDERS", "yfinance,fmp,tiingo").split(",")
+    PROVIDER_WINDOW = 20  # 延迟 / 错误率看最近多少次请求
+    PROVIDER_MIN_SAMPLES = 3  # 样本少于这个数时一律视为健康
+    PROVIDER_MAX_ERROR_RATE = 0.5  # 错误率超过它就排到健康数据源后面
+    PROVIDER_HISTORY_DAYS = 366  # 逐个标的下载多少天日线 (够算 200 日均线)
+
+    # 20. 本地查询服务 (service.py)：按需查看单个标的，结果缓存 + 并发请求合并
+    SERVICE_HOST = os.getenv("SENTINEL_SERVICE_HOST", "127.0.0.1")
+    SERVICE_PORT = int(os.getenv("SENTINEL_SERVICE_PORT", "8765"))
+    SERVICE_CONTEXT_TTL = 120  # 数据上下文缓存多少秒
+    SERVICE_ANALYSIS_TTL = 900  # 报告缓存多少秒 (上下文刷新后立即失效)
+    SERVICE_ANALYTICS_TTL = 3600  # 跨标的分析缓存多少秒
+    SERVICE_REQUEST_BUDGET = 90  # 单次上游抓取 / 分析的时间预算 (秒)
+
+    # 21. 新闻标题本地情绪打分 (sentiment.py)：看完整个 RSS 源，只把最有信息量的几条交给 AI
+    NEWS_PROMPT_HEADLINES = 3  # 写进 Prompt 的标题条数
+    NEWS_HALF_LIFE_HOURS = 24  # 新闻权重每隔多少小时减半
+    NEWS_OFFTOPIC_WEIGHT = 0.6  # 标题里没出现代码的新闻的相关度
+    QUIET_NEWS_SCORE = 0.5  # 标题情绪绝对值超过它就不算平淡 (不走规则模板)
+
+    # 22. 分块流水线 (pipeline.py)：抓取 / 分析 / 落盘三段之间有界队列，内存占用与股票池大小无关
+    PIPELINE_CHUNK = int(os.getenv("SENTINEL_CHUNK", "50"))  # 每块多少个标的 (每块结束刷盘 + 回收)
+    PIPELINE_QUEUE = 4  # 相邻两段之间最多排队多少个标的
+    PIPELINE_MEMORY_MB = float(os.getenv("SENTINEL_MEMORY_MB", "0"))  # 常驻内存上限，0 表示不限
+    PIPELINE_TRACEMALLOC = os.getenv("SENTINEL_TRACEMALLOC", "0") == "1"  # 用 tracemalloc 统计 (更准但更慢)
+    AI_CALL_INTERVAL = 60  # 两次 AI 分析之间至少间隔多少秒 (规避 Gemini 限流)
+
+    # 23. 盘后增量 (session_delta.py)：盘后复用当天盘前的快照，只补抓收盘 K 线 / 期权成交 / 新标题，AI 只看变化
+    SESSION_DELTA = os.getenv("SENTINEL_SESSION_DELTA", "1") == "1"
+    SESSION_KEEP_DAYS = 7  # 盘前快照保留多少天
+    HISTORY_TOPUP_DAYS = 10  # 本地日线落后不超过这么多天 (自然日) 时只补下载最近这一段
+    HISTORY_SPLICE_TOLERANCE = 0.005  # 新旧数据重叠那天的收盘价相差超过它 (复权 / 拆股) 就整段重新下载
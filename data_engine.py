@@ -1,6 +1,9 @@
+import asyncio
 import os
 import sys
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import pandas as pd
 import requests
 import yfinance as yf
@@ -8,14 +11,26 @@ import xml.etree.ElementTree as ET
 from openbb import obb
 
 from config import Config
+from cassette import cassette, encode_frame, decode_frame
+from symbol_context import SymbolContext, NAN
+from deadline import DeadlineExceeded, ensure, wait_within
+from circuit_breaker import breakers
+from bar_cache import BarCache, OptionChainCache
+from panel_store import PanelStore
+from trading_calendar import SessionIndex
+from indicators import IndicatorEngine
+from providers import ProviderRouter, CacheProvider, default_providers
+from sentiment import summarize_news, parse_published
+from session_delta import baseline_from, published_since
 
 # --- 修复后的代理设置逻辑 ---
+# (导入时的提示写到标准错误：main.py --data-only 时标准输出只留给 JSON 数据)
 if not Config.IS_GITHUB:
     # 🌍 本地模式：必须设置字符串
     os.environ["HTTP_PROXY"] = Config.LOCAL_PROXY
     os.environ["HTTPS_PROXY"] = Config.LOCAL_PROXY
     PROXY_URL = Config.LOCAL_PROXY
-    print(f"🌍 [本地模式] 已开启代理: {Config.LOCAL_PROXY}")
+    print(f"🌍 [本地模式] 已开启代理: {Config.LOCAL_PROXY}", file=sys.stderr)
 else:
     # ☁️ GitHub 模式：
     # 1. 绝对不要给 os.environ 赋值 None！
@@ -24,15 +39,86 @@ else:
     os.environ.pop("HTTPS_PROXY", None)
     # 3. 内部变量设为 None 是可以的 (用于 requests proxies 参数)
     PROXY_URL = None
-    print("☁️ [GitHub 模式] 直连 Google，不使用代理")
+    print("☁️ [GitHub 模式] 直连 Google，不使用代理", file=sys.stderr)
 
 # 屏蔽警告
 warnings.filterwarnings("ignore")
 
+# 伪装成浏览器 (防反爬关键)
+NEWS_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+
+# SymbolContext 的固定字段 -> 指标注册名 (indicators.py)
+CORE_INDICATORS = {"rsi": "rsi14", "atr": "atr14", "sma20": "sma20"}
+
+# 每个抓取阶段超时后记为缺失的字段
+STAGE_FIELDS = {
+    "history": ("price", "change_pct", "rsi", "atr", "sma20"),
+    "macro": ("spy_change", "qqq_change"),
+    "news": ("news", "news_score"),
+    "options": ("pcr", "pressure"),
+    "fundamental": ("target_price",),
+}
+
+
+def _rss_failed(result):
+    return result[0] != 200
+
+
+def _count_recent(items, now, hours):
+    """[(标题, pubDate), ...] 里发布时间在最近 hours 小时内的条数 (没有发布时间的不计)"""
+    count = 0
+    for _, pub_date in items:
+        published = parse_published(pub_date)
+        if not pd.isna(published) and (now - published).total_seconds() <= hours * 3600:
+            count += 1
+    return count
+
+
+def _no_news(text="暂无重大新闻 (接口未返回数据)", titles=()):
+    return {"text": text, "score": NAN, "count": 0, "titles": list(titles)}
+
+
+def _published_after(items, since):
+    """[(标题, pubDate), ...] 里发布时间晚于 since 的条目 (没有发布时间的无法判断，算作旧闻)"""
+    fresh = []
+    for title, pub_date in items:
+        published = parse_published(pub_date)
+        if not pd.isna(published) and published > since:
+            fresh.append((title, pub_date))
+    return fresh
+
+
+def _encode_rss(result):
+    return [result[0], result[1].decode("utf-8", "replace")]
+
+
+def _decode_rss(value):
+    return value[0], value[1].encode("utf-8")
+
 
 class DataEngine:
 
     def __init__(self):
+        # 阻塞的 yfinance 调用共用一个有界线程池 (所有标的、所有数据源共享上限)
+        self.io_pool = ThreadPoolExecutor(max_workers=Config.DATA_IO_WORKERS, thread_name_prefix="data-io")
+
+        # 交易日历 + 本地缓存：已经覆盖最近一个交易日的日线 / 之后没再开过盘的期权链不重复下载
+        # (与回测用的多年日线分开存放，避免互相覆盖)
+        self.calendar = SessionIndex()
+        engine_cache = os.path.join(Config.CACHE_DIR, "engine")
+        self.bar_cache = BarCache(engine_cache)
+        self.option_cache = OptionChainCache(engine_cache)
+        # 整个股票池的日线面板 (memmap)，跨标的分析和逐个标的的日线都先从这里取
+        self.panel_store = PanelStore(engine_cache)
+        # 调度前批量抓到的新闻正文，aget_full_context 直接取用，不再重复请求
+        self.news_prefetch = {}
+        # 日线 / 批量报价按延迟和错误率在 yfinance / fmp / tiingo 之间路由，全部失败时用本地缓存兜底
+        self.providers = ProviderRouter(default_providers(PROXY_URL),
+                                        fallback=CacheProvider(self.bar_cache, enabled=self._cache_enabled))
+
         # 🟢 修复：初始化时加载 FMP Key，否则新闻拿不到
         if Config.FMP_KEY:
             try:
@@ -42,89 +128,283 @@ class DataEngine:
                 print(f"    [System] FMP 登录失败: {e}")
 
 
-    def get_full_context(self, symbol):
-        print(f"🔄 [Data] 正在扫描 {symbol}...")
+    def get_full_context(self, symbol, deadline=None, pre=None):
+        """同步入口 (main.py 逐个标的调用)，内部走并发版本"""
+        return asyncio.run(self.aget_full_context(symbol, deadline=deadline, pre=pre))
 
-        # 1. 🔥 调用新的宏观获取方法
-        macro_data = self._get_market_indices()
+    async def aget_full_context(self, symbol, session=None, deadline=None, pre=None):
+        """
+        并发获取单个标的的完整上下文：
+        大盘 / 历史 K 线 / 期权 / 目标价 是阻塞的 yfinance 调用，丢进有界线程池；
+        新闻 RSS 走 aiohttp。几路同时发出，历史 K 线一到就接着算技术指标，
+        单个标的耗时约等于最慢的那一路，而不是各路之和。
+        session 可传入共享的 aiohttp.ClientSession (批量抓取时复用连接)。
 
-        # ==================================================
-        # 🚀 第一步：获取历史数据 (核心资产)
-        # ==================================================
-        # 我们一次性下载 1 年的数据，既包含了“当前价格”，也包含了“技术分析素材”
-        hist_df = self._fetch_history_direct(symbol)
+        deadline 为整次运行的时间预算，单个标的最多再用 Config.SYMBOL_BUDGET 秒；
+        到点还没返回的数据源不再等待，对应字段记为缺失 (ctx.missing)，其余数据照常返回。
 
-        if hist_df is None or hist_df.empty:
+        pre 为 (盘前快照时间, 盘前 SymbolContext) 时走盘后增量 (session_delta.py)：
+        目标价沿用盘前的，新闻只看快照之后发布的标题，盘前基线挂在返回值的 ctx.session 上。
+        """
+        if session is None:
+            import aiohttp
+
+            async with aiohttp.ClientSession() as own_session:
+                return await self.aget_full_context(symbol, own_session, deadline, pre)
+
+        since = None
+        if pre is None:
+            print(f"🔄 [Data] 正在扫描 {symbol}...")
+        else:
+            since = published_since(pre[0])
+            print(f"🌗 [Data] 正在扫描 {symbol} (复用 {pre[0]} 的盘前快照，只补抓盘中变化)...")
+
+        budget = ensure(deadline).child(Config.SYMBOL_BUDGET)
+        missing = []
+        loop = asyncio.get_running_loop()
+
+        async def bounded(stage, awaitable, default):
+            result, timed_out = await wait_within(awaitable, budget, default)
+            if timed_out:
+                print(f"    ⏱️ {symbol} {stage} 超出时间预算，标记为缺失")
+                missing.extend(STAGE_FIELDS[stage])
+            return result
+
+        def blocking(fn, *args):
+            return loop.run_in_executor(self.io_pool, fn, *args)
+
+        async def history_and_technicals():
+            # 我们一次性下载 1 年的数据，既包含了“当前价格”，也包含了“技术分析素材”
+            hist_df = await blocking(self._fetch_history_direct, symbol)
+            if hist_df is None or hist_df.empty:
+                return None, None
+            # 技术指标只依赖历史数据，不必等其它数据源
+            tech_data = await blocking(self._calculate_technicals, hist_df)
+            return self._extract_quote(hist_df), tech_data
+
+        # 机构目标价盘中基本不变，盘前快照里有就直接用
+        if pre is not None and not pd.isna(pre[1].target_price):
+            fundamental = asyncio.sleep(0, pre[1].target_price)
+        else:
+            fundamental = blocking(self._get_fundamental_direct, symbol)
+
+        (quote_data, tech_data), macro_data, news_data, options_data, fund_data = await asyncio.gather(
+            bounded("history", history_and_technicals(), (None, None)),
+            bounded("macro", blocking(self._get_market_indices), {"SPY": NAN, "QQQ": NAN}),
+            bounded("news", self._aget_news(symbol, session, budget, since), _no_news("")),
+            bounded("options", blocking(self._get_options_direct, symbol), {"pcr": NAN, "pressure": NAN}),
+            bounded("fundamental", fundamental, NAN),
+        )
+
+        # 没有 K 线就没有价格和技术指标，这个标的没有分析价值
+        if tech_data is None:
             print(f"❌ {symbol} 数据获取完全失败，跳过。")
             return None
 
-        # ==================================================
-        # 🚀 第二步：拆解数据
-        # ==================================================
-
-        # 1. 从历史数据中提取【当前报价】
-        quote_data = self._extract_quote(hist_df)
-
-        # 2. 使用历史数据计算【技术指标】
-        # (因为 hist_df 已经在本地了，这一步不需要联网，极快！)
-        tech_data = self._calculate_technicals(hist_df)
-
-        # 3. 获取新闻 (这个还要连一次网，走 FMP)
-        news_data = self._get_news(symbol)
-
-        # 4. 获取期权 PCR (YF 直连)
-        options_data = self._get_options_direct(symbol)
-
-        # 5. 获取机构目标价 (YF 直连 - 替代 FMP)
-        fund_data = self._get_fundamental_direct(symbol)
-
-        # 4. 组装返回
-        return {
-            "symbol": symbol,
-            "quote": quote_data,
-            "technicals": tech_data,
-            "news": news_data,
-            "options": options_data,
-            "fundamental": fund_data,
-            "macro": {
-                "spy_change": macro_data["SPY"],
-                "qqq_change": macro_data["QQQ"]
-            }
-        }
+        # 组装返回 (占位字符串在这里统一变成 NaN)
+        quote_data = quote_data or {}
+        return SymbolContext(
+            symbol,
+            price=quote_data.get("price"),
+            change_pct=quote_data.get("change_pct"),
+            quote_source=quote_data.get("source"),
+            rsi=tech_data["rsi"],
+            atr=tech_data["atr"],
+            sma20=tech_data["sma20"],
+            indicators=tech_data["indicators"],
+            pcr=options_data["pcr"],
+            pressure=options_data["pressure"],
+            target_price=fund_data,
+            spy_change=macro_data["SPY"],
+            qqq_change=macro_data["QQQ"],
+            news=news_data["text"],
+            news_score=news_data["score"],
+            missing=missing,
+            session=None if pre is None else dict(baseline_from(pre[1], pre[0]), new_headlines=news_data["count"]),
+        )
+
+    async def astream_contexts(self, symbols, deadline=None, concurrency=None):
+        """
+        批量抓取上下文，哪个标的先完成就先产出 SymbolContext (拿不到数据的标的直接跳过)
+        固定数量的协程从标的迭代器里取任务，结果经过有界队列交给调用方：
+        在途的标的最多 concurrency 个，调用方消费得慢时抓取自动暂停，内存占用与股票池大小无关。
+        """
+        import aiohttp
+
+        concurrency = concurrency or Config.DATA_IO_WORKERS
+        deadline = ensure(deadline)
+        pending = iter(symbols)
+        queue = asyncio.Queue(maxsize=concurrency)
+        done = object()
+
+        async def worker(session):
+            for symbol in pending:
+                if deadline.expired:
+                    break
+                try:
+                    ctx = await self.aget_full_context(symbol, session, deadline)
+                except Exception as e:
+                    print(f"💥 {symbol} 数据抓取异常: {e}")
+                    continue
+                if ctx is not None:
+                    await queue.put(ctx)
+            await queue.put(done)
+
+        async with aiohttp.ClientSession() as session:
+            workers = [asyncio.create_task(worker(session)) for _ in range(concurrency)]
+            try:
+                remaining = len(workers)
+                while remaining:
+                    item = await queue.get()
+                    if item is done:
+                        remaining -= 1
+                    else:
+                        yield item
+            finally:
+                for task in workers:
+                    task.cancel()
+
+    def get_close_panel(self, symbols):
+        """
+        股票池 + 基准的收盘价面板 (日期 × 标的)，供 analytics 做跨标的分析
+        各标的在线程池里并行获取，与逐个分析共用同一套缓存 / 录制 / 熔断逻辑
+        """
+        symbols = list(dict.fromkeys(symbols))
+        panel = self._cached_panel()
+        if panel is not None and set(symbols) <= set(panel.symbols):
+            print(f"📚 [Data] ♻️ 面板文件已是最新交易日 ({panel.last_date:%Y-%m-%d})，直接映射")
+            return panel.frame("close")[symbols]
+
+        print(f"📚 [Data] 获取 {len(symbols)} 个标的的日线面板...")
+        frames = dict(zip(symbols, self.io_pool.map(self._fetch_history_direct, symbols)))
+        frames = {s: df for s, df in frames.items() if df is not None and not df.empty}
+        # 盘中的当天 K 线还不完整，不写面板
+        if frames and self._cache_enabled() and not self.calendar.is_open(datetime.now(timezone.utc)):
+            self.panel_store.update(frames)
+        return pd.DataFrame({s: df["close"] for s, df in frames.items()})
 
     def _fetch_history_direct(self, symbol):
         """
-        直连 YFinance 下载历史数据，并清洗成 OpenBB 喜欢的格式
+        下载历史日线 (providers.py 按延迟 / 健康度选数据源)，整理成 OpenBB 风格的小写列名
         """
-        print(f"    [1] 直连 YFinance 下载 {symbol} 历史 K 线...")
+        cached = self._cached_history(symbol)
+        if cached is not None:
+            print(f"    [1] ♻️ {symbol} 本地日线已是最新交易日 ({cached.index[-1]:%Y-%m-%d})，跳过下载")
+            return cached
+        topped = self._topped_up_history(symbol)
+        if topped is not None:
+            return topped
+
+        print(f"    [1] 下载 {symbol} 历史 K 线...")
         try:
-            # 下载最近 1 年数据 (足够算 200日均线了)
-            df = yf.download(symbol, period="1y", progress=False, proxy=PROXY_URL, timeout=30)
+            market_open = self.calendar.is_open(datetime.now(timezone.utc))
+            # 每个数据源各自经过熔断器，失败自动换下一个
+            df = cassette.call("history", symbol, lambda: self.providers.history(symbol),
+                               encode=encode_frame, decode=decode_frame)
 
-            if df.empty:
-                print("    ❌ YFinance 返回空数据")
+            if df is None:
+                print("    ❌ 所有数据源都没有返回数据")
                 return None
 
-            # --- 数据清洗 (关键步骤) ---
-            # 1. 处理 MultiIndex (yfinance 新版特性)
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
-
-            # 2. 重命名列 (OpenBB 强制要求列名必须是小写: open, high, low, close, volume)
-            df = df.rename(columns={
-                "Open": "open", "High": "high", "Low": "low",
-                "Close": "close", "Volume": "volume", "Adj Close": "adj_close"
-            })
-
-            # 3. 确保索引是 Datetime 类型
-            df.index = pd.to_datetime(df.index)
-
+            # 盘中下载的当天 K 线还不完整，不写缓存；兜底用的缓存数据也不用再写回去
+            source = df.attrs.get("source", "")
+            if self._cache_enabled() and not market_open and not source.startswith("Cache"):
+                self.bar_cache.save(symbol, df)
             return df
 
         except Exception as e:
             print(f"    ❌ 下载报错: {e}")
             return None
 
+    def _topped_up_history(self, symbol):
+        """
+        本地日线只落后最近几天 (比如盘后任务拿到的是当天盘前的缓存) 时，
+        只下载最近 Config.HISTORY_TOPUP_DAYS 天接在后面，不再整年重新下载；
+        接不上 (缺口太大 / 重叠那天的收盘价对不上，多半是复权或拆股) 返回 None，由调用方整段下载
+        """
+        now = datetime.now(timezone.utc)
+        if not self._cache_enabled() or self.calendar.is_open(now):
+            return None
+        panel = self.panel_store.open()
+        base = panel.bars(symbol) if panel is not None and symbol in panel.position else self.bar_cache.load(symbol)
+        if base is None or base.empty:
+            return None
+        last = base.index[-1]
+        if (now.date() - last.date()).days >= Config.HISTORY_TOPUP_DAYS:
+            return None
+
+        print(f"    [1] {symbol} 本地日线截至 {last:%Y-%m-%d}，只补下载最近 {Config.HISTORY_TOPUP_DAYS} 天...")
+        try:
+            recent = self.providers.history(symbol, days=Config.HISTORY_TOPUP_DAYS)
+        except Exception as e:
+            print(f"    ⚠️ 增量下载报错: {e}")
+            return None
+        if recent is None or last not in recent.index:
+            return None
+        if abs(recent["close"][last] / base["close"][last] - 1) > Config.HISTORY_SPLICE_TOLERANCE:
+            print(f"    ⚠️ {symbol} {last:%Y-%m-%d} 收盘价与本地不一致 (复权 / 拆股?)，整段重新下载")
+            return None
+
+        source = recent.attrs.get("source", "")
+        df = pd.concat([base[base.index < recent.index[0]], recent])
+        # 只保留 Config.PROVIDER_HISTORY_DAYS 天，缓存文件不随运行次数增长
+        df = df[df.index > df.index[-1] - pd.Timedelta(days=Config.PROVIDER_HISTORY_DAYS)]
+        df.attrs["source"] = source
+        if not source.startswith("Cache"):
+            self.bar_cache.save(symbol, df)
+        return df
+
+    def _cache_enabled(self):
+        # 录制 / 回放时一切以 cassette 为准，不读写本地缓存
+        return not cassette.mode
+
+    def _cached_history(self, symbol):
+        """本地日线已包含最近一个收盘的交易日时直接返回；盘中 (当天 K 线还在变) 一律返回 None"""
+        now = datetime.now(timezone.utc)
+        if not self._cache_enabled() or self.calendar.is_open(now):
+            return None
+        panel = self._cached_panel()
+        df = panel.bars(symbol) if panel is not None and symbol in panel.position else self.bar_cache.load(symbol)
+        if df is None or df.empty:
+            return None
+        if df.index[-1].date() < self.calendar.last_closed_session(now).date:
+            return None
+        return df
+
+    def _cached_panel(self):
+        """最后一行已是最近收盘交易日的面板 (memmap)，否则 None；盘中 / 录制回放时不用"""
+        now = datetime.now(timezone.utc)
+        if not self._cache_enabled() or self.calendar.is_open(now):
+            return None
+        panel = self.panel_store.open()
+        if panel is None or not len(panel) or panel.last_date.date() < self.calendar.last_closed_session(now).date:
+            return None
+        return panel
+
+    def _cached_option_chain(self, symbol):
+        """上次抓取之后没有再开过盘，期权链就仍然是最新的；返回 (是否命中, chain)"""
+        if not self._cache_enabled():
+            return False, None
+        entry = self.option_cache.load(symbol)
+        if entry is None:
+            return False, None
+        fetched_at, chain = entry
+        if self.calendar.traded_between(fetched_at, datetime.now(timezone.utc)):
+            return False, None
+        return True, chain
+
+    def get_batch_quotes(self, symbols):
+        """
+        批量获取多只股票今天的最新报价 (yfinance 分钟线 / fmp 报价，按延迟路由，缺的标的由下一个数据源补齐)
+        返回 {symbol: {"price", "high", "low", "session"}}，拿不到的标的不出现在结果里
+        """
+        try:
+            # 报价随时间变化，录制/回放时按调用顺序匹配
+            return cassette.call("quotes", cassette.next_key("quotes"), lambda: self.providers.quotes(symbols))
+        except Exception as e:
+            print(f"    ⚠️ 批量报价获取失败: {e}")
+            return {}
+
     def _extract_quote(self, df):
         """从 K 线表中提取最新价格"""
         try:
@@ -136,181 +416,245 @@ class DataEngine:
             return {
                 "price": round(float(price), 2),
                 "change_pct": round(float(change), 2),
-                "source": "YFinance"
+                "source": df.attrs.get("source", "YFinance")
             }
         except:
             return None
 
     def _calculate_technicals(self, df):
-        """将清洗好的 DF 喂给 OpenBB 计算技术指标"""
-        print("    [2] 正在计算技术指标 (RSI, ATR, MA)...")
-        # 默认返回值
-        defaults = {"rsi": 50.0, "atr": 0.0, "sma20": 0.0}
+        """
+        按 indicators.py 的注册表计算技术指标 (纯 pandas，本地计算)
+        核心的 RSI / ATR / SMA20 之外，Config.AI_INDICATORS 里的指标放进 indicators 字典
+        """
+        print("    [2] 正在计算技术指标 (RSI, ATR, MA ...)...")
+        extras = list(dict.fromkeys(n for n in Config.AI_INDICATORS if n not in CORE_INDICATORS.values()))
+        # 默认返回值 (算不出来就明确标记为缺失，而不是给一个看起来正常的假数)
+        defaults = {"rsi": NAN, "atr": NAN, "sma20": NAN, "indicators": {n: NAN for n in extras}}
 
         # 0. 基础检查
         if df is None or df.empty:
             print("    ⚠️ 数据为空，跳过计算")
             return defaults
         try:
-            # 确保数据按时间升序 (OpenBB 依赖时间序列)
-            # 假设索引是日期，如果日期在列里，请先 set_index
-            df = df.sort_index(ascending=True)
-            #指定 provider='pandas-ta' 确保在本地快速计算，不依赖外部 API
-            provider = "pandas-ta"
-
-            # 1. RSI (14)
-            rsi_res = obb.technical.rsi(data=df,target="close", window=14,provider=provider).to_df()
-            # 智能查找：找列名里包含 'rsi' 的那一列
-            rsi_col = [c for c in rsi_res.columns if 'rsi' in str(c).lower()]
-            rsi = rsi_res[rsi_col[0]].iloc[-1] if rsi_col else 50.0
-
-            # 2. ATR (14)
-            atr_res = obb.technical.atr(data=df, high="high", low="low", close="close", window=14).to_df()
-            # 智能查找：找列名里包含 'atr' 的那一列 (排除 'ATRr_14' 这种变体)
-            atr_col = [c for c in atr_res.columns if 'atr' in str(c).lower()]
-            atr = atr_res[atr_col[0]].iloc[-1] if atr_col else 0.0
-
-            # 3. SMA (20)
-            sma_res = obb.technical.sma(data=df, target="close", window=20).to_df()
-            # 智能查找：找列名里包含 'sma' 的那一列
-            sma_col = [c for c in sma_res.columns if 'sma' in str(c).lower()]
-            sma20 = sma_res[sma_col[0]].iloc[-1] if sma_col else 0.0
-
-            return {
-                "rsi": round(float(rsi), 2),
-                "atr": round(float(atr), 2),
-                "sma20": round(float(sma20), 2)
-            }
+            # 共享的中间结果 (涨跌、真实波幅、EMA ...) 和周线 / 月线重采样在同一个求值器里只算一次
+            values = IndicatorEngine(df).latest(list(CORE_INDICATORS.values()) + extras)
+            result = {field: values[name] for field, name in CORE_INDICATORS.items()}
+            result["indicators"] = {n: values[n] for n in extras}
+            return result
         except Exception as e:
             print(f"    ⚠️ 指标计算失败: {e}")
-            # 打印一下出错时的列名，方便调试
-            # print(f"DEBUG: RSI Cols: {rsi_res.columns if 'rsi_res' in locals() else 'N/A'}")
-            return {"rsi": 50.0, "atr": 0.0, "sma20": 0.0}
+            return defaults
 
-    def _get_news(self, symbol):
+    def _get_news(self, symbol, since=None, deadline=None):
         """
-        获取新闻 (双保险策略: Yahoo RSS -> Google News RSS)
+        获取新闻的同步入口 (盘中监控等不在事件循环里的调用方)
+        只是 _aget_news 的包装，抓取 / 备用源 / 熔断逻辑只有异步这一份
+        返回 {"text": 写进 Prompt 的标题, "score": 标题情绪 (-1 ~ 1), "count": 参与打分的标题数,
+              "titles": 源里的全部标题}
+        since 不为空时只看这之后发布的标题 (盘后增量)
         """
-        print(f"    [4] 正在获取 {symbol} 新闻...")
-        import requests
-        import xml.etree.ElementTree as ET
-        import urllib3
-
-        proxies = None
-        if not Config.IS_GITHUB:
-            proxies = {
-                "http": Config.LOCAL_PROXY,
-                "https": Config.LOCAL_PROXY
-            }
+        async def fetch():
+            import aiohttp
 
-        # 🤫 关闭 SSL 证书验证警告 (控制台看起来清爽点)
-        urllib3.disable_warnings()
+            async with aiohttp.ClientSession() as session:
+                return await self._aget_news(symbol, session, deadline, since)
 
-        # 伪装成浏览器 (防反爬关键)
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
+        return asyncio.run(fetch())
 
-        # --- 策略 A: Yahoo Finance RSS (首选) ---
+    async def _aget_news(self, symbol, session, deadline=None, since=None):
+        """
+        获取新闻 (双保险策略: Yahoo RSS -> Google News RSS)
+        每次请求的超时取 Config.SOURCE_TIMEOUT 与剩余预算的较小值，预算不够就不再尝试备用源
+        """
+        if symbol in self.news_prefetch:
+            print(f"    [4] ♻️ {symbol} 使用调度阶段已抓取的新闻")
+            return self.news_prefetch.pop(symbol)
+        print(f"    [4] 正在获取 {symbol} 新闻 (async)...")
+        proxy = None if Config.IS_GITHUB else Config.LOCAL_PROXY
+        deadline = ensure(deadline)
+
+        # --- 策略 A: Yahoo Finance RSS (首选，熔断时直接走备用源) ---
         try:
-            rss_url = f"https://finance.yahoo.com/rss/headline?s={symbol}"
-
-            resp = requests.get(rss_url, headers=headers, timeout=10, verify=False, proxies=proxies)
-
-            if resp.status_code == 200:
-                root = ET.fromstring(resp.content)
-                news_text = ""
-                count = 0
-
-                # 遍历 XML
-                for item in root.findall('./channel/item'):
-                    if count >= 3: break  # 只取前3条，给AI省空间
-
-                    title = item.find('title').text
-                    pub_date = item.find('pubDate').text if item.find('pubDate') is not None else ""
-
-                    # 格式化时间 (去掉后面多余的时区信息)
-                    # 原格式: Tue, 09 Dec 2025 10:30:00 GMT
-                    short_date = pub_date[:16] if len(pub_date) > 16 else "近期"
-
-                    news_text += f"- {title} [{short_date}]\n"
-                    count += 1
-
-                if news_text:
-                    return news_text.strip()
-
+            timeout = deadline.timeout(Config.SOURCE_TIMEOUT)
+            status_code, content = await breakers["yahoo_rss"].acall(
+                lambda: self._arss_get(session, Config.YAHOO_RSS_URL.format(symbol=symbol), proxy, timeout),
+                failed=_rss_failed)
+            if status_code == 200:
+                digest = self._news_digest(symbol, self._parse_rss(content), since)
+                if digest:
+                    return digest
         except Exception as e:
-            print(f"    ⚠️ Yahoo RSS 获取失败: {e}，尝试切换备用源...")
+            print(f"    ⚠️ Yahoo RSS 获取失败: {e!r}，尝试切换备用源...")
 
-        # --- 策略 B: Google News RSS (备胎) ---
+        # --- 策略 B: Google News RSS (备胎，直连) ---
         try:
             print("    🔄 切换至 Google News 源...")
-            # 针对股票的搜索查询
-            g_url = f"https://news.google.com/rss/search?q={symbol}+stock&hl=en-US&gl=US&ceid=US:en"
+            timeout = deadline.timeout(Config.SOURCE_TIMEOUT)
+            status_code, content = await breakers["google_rss"].acall(
+                lambda: self._arss_get(session, Config.GOOGLE_RSS_URL.format(symbol=symbol), None, timeout),
+                failed=_rss_failed)
+            if status_code == 200:
+                digest = self._news_digest(symbol, self._parse_rss(content), since)
+                if digest:
+                    return digest
+        except DeadlineExceeded as e:
+            print(f"    ⏱️ 跳过 Google News: {e}")
+        except Exception as e:
+            print(f"    ❌ Google News 也失败: {e!r}")
 
-            resp = requests.get(g_url, headers=headers, timeout=10, verify=False)
+        return _no_news()
 
-            if resp.status_code == 200:
-                root = ET.fromstring(resp.content)
-                news_text = ""
-                count = 0
+    def prefetch_news(self, symbols, deadline=None, since=None):
+        """
+        调度前批量抓取 Yahoo RSS，返回 {symbol: 最近 Config.SCHEDULER_NEWS_HOURS 小时的新闻条数}
+        所有标的的标题抓完后一次性做情绪打分 (sentiment.py)，结果存进 self.news_prefetch，
+        之后逐个分析时直接复用；整批最多花 Config.SCHEDULER_NEWS_BUDGET 秒
+        since: {symbol: UTC 时间}，盘后增量时这些标的只给之后发布的标题打分
+        """
+        budget = ensure(deadline).child(Config.SCHEDULER_NEWS_BUDGET)
+        return asyncio.run(self._aprefetch_news(list(symbols), budget, since or {}))
 
-                for item in root.findall('./channel/item'):
-                    if count >= 3: break
+    async def _aprefetch_news(self, symbols, deadline, since):
+        import aiohttp
 
-                    title = item.find('title').text
-                    # Google 的 pubDate 也很长，同样截取
-                    pub_date = item.find('pubDate').text if item.find('pubDate') is not None else ""
-                    short_date = pub_date[:16] if len(pub_date) > 16 else "近期"
+        proxy = None if Config.IS_GITHUB else Config.LOCAL_PROXY
+        limit = asyncio.Semaphore(Config.DATA_IO_WORKERS)
+        now = cassette.now(timezone.utc)
+        counts = {}
+        items_by_symbol = {}
+        titles = {}
 
-                    news_text += f"- {title} [{short_date}]\n"
-                    count += 1
+        async def one(session, symbol):
+            async with limit:
+                try:
+                    timeout = deadline.timeout(Config.SOURCE_TIMEOUT)
+                    status_code, content = await breakers["yahoo_rss"].acall(
+                        lambda: self._arss_get(session, Config.YAHOO_RSS_URL.format(symbol=symbol), proxy, timeout),
+                        failed=_rss_failed)
+                    if status_code != 200:
+                        return
+                    items = self._parse_rss(content)
+                except Exception:
+                    # 抓不到就留给逐个分析时的正常流程 (含 Google News 备用源)
+                    return
+                counts[symbol] = _count_recent(items, now, Config.SCHEDULER_NEWS_HOURS)
+                titles[symbol] = [title for title, _ in items]
+                if symbol in since:
+                    items = _published_after(items, since[symbol])
+                    if not items:
+                        self.news_prefetch[symbol] = _no_news("盘前快照之后没有新标题", titles.pop(symbol))
+                        return
+                items_by_symbol[symbol] = items
+
+        print(f"📰 [Data] 批量获取 {len(symbols)} 个标的的新闻...")
+        async with aiohttp.ClientSession() as session:
+            _, timed_out = await wait_within(asyncio.gather(*(one(session, s) for s in symbols)), deadline)
+        if timed_out:
+            print(f"    ⏱️ 批量新闻超出预算，已拿到 {len(counts)} 个")
+        # 整个股票池的标题放在一起打分
+        for symbol, digest in summarize_news(items_by_symbol, now).items():
+            self.news_prefetch[symbol] = dict(digest, titles=titles[symbol])
+        return counts
+
+    def _parse_rss(self, content):
+        """RSS XML -> [(标题, pubDate 原文), ...]，全部条目 (由 sentiment.py 挑选写进 Prompt 的几条)"""
+        root = ET.fromstring(content)
+        items = []
+        for item in root.findall('./channel/item'):
+            title = (item.findtext('title') or "").strip()
+            if title:
+                items.append((title, item.findtext('pubDate') or ""))
+        return items
+
+    def _news_digest(self, symbol, items, since=None):
+        """
+        单个标的的标题打分，返回 {"text", "score", "count", "titles"}；没有标题返回 None
+        text 只有打分最高的几条，titles 是源里的全部标题 (盘中监控据此判断哪些是新出现的)
+        since 不为空时只给之后发布的标题打分，源里有标题但都是旧闻时返回 "没有新标题" (不再换备用源)
+        """
+        titles = [title for title, _ in items]
+        if since is not None and items:
+            items = _published_after(items, since)
+            if not items:
+                return _no_news("盘前快照之后没有新标题", titles)
+        digest = summarize_news({symbol: items}, cassette.now(timezone.utc)).get(symbol)
+        return digest and dict(digest, titles=titles)
 
-                if news_text:
-                    return news_text.strip()
+    async def _arss_get(self, session, url, proxy, timeout=10):
+        """RSS 请求 (aiohttp)，经过录制 / 回放层"""
+        import aiohttp
 
-        except Exception as e:
-            print(f"    ❌ Google News 也失败: {e}")
+        async def fetch():
+            async with session.get(url, headers=NEWS_HEADERS, proxy=proxy, ssl=False,
+                                   timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                return resp.status, await resp.read()
 
-        return "暂无重大新闻 (接口未返回数据)"
+        return await cassette.acall("rss", url, fetch, encode=_encode_rss, decode=_decode_rss)
 
     # 通过 Yahoo 获取期权 PCR
     def _get_options_direct(self, symbol):
         print("    [3] 计算期权 PCR (YFinance)...")
         try:
-            tk = yf.Ticker(symbol)
-            # 获取最近的一个期权日期
-            if not tk.options:
+            hit, chain = self._cached_option_chain(symbol)
+            if hit:
+                print(f"    ♻️ {symbol} 期权链自上次抓取后未再开盘，使用缓存")
+            else:
+                fetched_at = datetime.now(timezone.utc)
+                chain = breakers["options"].call(lambda: cassette.call(
+                    "options", symbol, lambda: self._download_option_chain(symbol),
+                    encode=lambda c: c and [encode_frame(c[0]), encode_frame(c[1])],
+                    decode=lambda v: v and (decode_frame(v[0], False), decode_frame(v[1], False)),
+                ))
+                if self._cache_enabled():
+                    self.option_cache.save(symbol, chain, fetched_at)
+            # 没有期权可交易
+            if not chain:
                 return {"pcr": "N/A", "pressure": "N/A"}
 
-            date = tk.options[0]  # 最近到期日
-            opts = tk.option_chain(date)
-
-            # 计算 PCR (Volume)
-            puts_vol = opts.puts['volume'].sum()
-            calls_vol = opts.calls['volume'].sum()
-            pcr = round(puts_vol / calls_vol, 2) if calls_vol > 0 else 1.0
-
-            # 计算压力位 (Call Open Interest 最大的行权价)
-            max_call_row = opts.calls.loc[opts.calls['openInterest'].idxmax()]
-            pressure = max_call_row['strike']
-
-            return {"pcr": pcr, "pressure": pressure}
+            return self._summarize_option_chain(*chain)
         except Exception as e:
             # print(f"期权错误: {e}")
             return {"pcr": "N/A", "pressure": "N/A"}
 
+    def _summarize_option_chain(self, puts, calls):
+        """由期权链计算 PCR 和压力位"""
+        # 计算 PCR (Volume)
+        puts_vol = puts['volume'].sum()
+        calls_vol = calls['volume'].sum()
+        pcr = round(puts_vol / calls_vol, 2) if calls_vol > 0 else 1.0
+
+        # 计算压力位 (Call Open Interest 最大的行权价)
+        max_call_row = calls.loc[calls['openInterest'].idxmax()]
+        pressure = max_call_row['strike']
+
+        return {"pcr": pcr, "pressure": pressure}
+
+    def _download_option_chain(self, symbol):
+        """下载最近到期日的期权链，只保留算 PCR 和压力位需要的列"""
+        tk = yf.Ticker(symbol)
+        # 获取最近的一个期权日期
+        if not tk.options:
+            return None
+
+        date = tk.options[0]  # 最近到期日
+        opts = tk.option_chain(date)
+        columns = ['strike', 'volume', 'openInterest']
+        return opts.puts[columns], opts.calls[columns]
+
      # 通过 Yahoo 获取机构目标价
     def _get_fundamental_direct(self, symbol):
         try:
-            tk = yf.Ticker(symbol)
             # Yahoo 的 info 接口包含了 targetMeanPrice
             # 注意：info 接口可能会慢，且通过代理访问
-            target = tk.info.get('targetMeanPrice', 'N/A')
+            target = breakers["info"].call(lambda: cassette.call(
+                "info", symbol, lambda: self._download_target_price(symbol)))
             return target
         except:
             return "N/A"
 
+    def _download_target_price(self, symbol):
+        return yf.Ticker(symbol).info.get('targetMeanPrice', 'N/A')
+
     def _get_market_indices(self):
         """
         [原生 yfinance 版] 同时获取 SPY (标普) 和 QQQ (纳指) 的涨跌幅
@@ -318,29 +662,17 @@ class DataEngine:
         """
         print("    [0] 正在获取大盘 (SPY & QQQ)...")
 
-        # 必须在文件顶部 import yfinance as yf
-        # 如果 DataEngine 类里没引，记得加上： import yfinance as yf
-        import yfinance as yf
-
+        # 拿不到就是缺失 (NaN)，不要用 0.0 冒充"平盘"
         indices = {
-            "SPY": 0.0,
-            "QQQ": 0.0
+            "SPY": NAN,
+            "QQQ": NAN
         }
 
         try:
-            # 1. 初始化 Tickers 对象
-            tickers = yf.Tickers("SPY QQQ")
-
-            # 2. 遍历获取
             for symbol in ["SPY", "QQQ"]:
                 try:
-                    # 获取单个 ticker 对象
-                    t = tickers.tickers[symbol]
-
-                    # 🔥 使用 fast_info (这是获取实时价格最快的方法)
-                    # 它不需要像 .info 那样去爬取完整的元数据，几乎是瞬间返回
-                    last_price = t.fast_info['last_price']
-                    prev_close = t.fast_info['previous_close']
+                    last_price, prev_close = cassette.call(
+                        "fast_info", symbol, lambda: self._download_index_quote(symbol))
 
                     if prev_close and prev_close > 0:
                         # 手动计算涨跌幅: (当前价 - 昨收价) / 昨收价 * 100
@@ -348,14 +680,21 @@ class DataEngine:
                         indices[symbol] = round(change_pct, 2)
                     else:
                         print(f"    ⚠️ {symbol} 昨收价异常")
-                        indices[symbol] = 0.0
+                        indices[symbol] = NAN
 
                 except Exception as inner_e:
                     print(f"    ⚠️ 获取 {symbol} 详情失败: {inner_e}")
-                    indices[symbol] = 0.0
+                    indices[symbol] = NAN
 
         except Exception as e:
             print(f"    ⚠️ 大盘数据获取严重失败: {e}")
-            # 保持默认值 0.0
+            # 保持默认值 (缺失)
+
+        return indices
 
-        return indices
\ No newline at end of file
+    def _download_index_quote(self, symbol):
+        """[最新价, 昨收价]"""
+        # 🔥 使用 fast_info (这是获取实时价格最快的方法)
+        # 它不需要像 .info 那样去爬取完整的元数据，几乎是瞬间返回
+        info = yf.Ticker(symbol).fast_info
+        return [info['last_price'], info['previous_close']]
@@ -0,0 +1,67 @@
+# deadline.py
+import asyncio
+import math
+import time
+
+
+class DeadlineExceeded(TimeoutError):
+    """剩余的时间预算不够完成某个阶段"""
+
+
+class Deadline:
+    """
+    整次运行的时间预算 (单调时钟)
+    在入口处创建一次，一路传给数据抓取 / AI / 推送；每个阶段用 timeout(上限) 拿到
+    "阶段自身上限 与 剩余预算 取小" 的超时时间，预算不够就直接跳过，而不是等满上游的超时。
+    seconds 为 None 表示不限时 (盘中监控、单独调用模块时)。
+    """
+
+    def __init__(self, seconds=None, clock=time.monotonic):
+        self.clock = clock
+        self.expires_at = math.inf if seconds is None else clock() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - self.clock())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def can_afford(self, seconds):
+        return self.remaining() >= seconds
+
+    def timeout(self, cap, floor=1.0):
+        """min(cap, 剩余预算)；剩余不足 floor 秒时抛出 DeadlineExceeded"""
+        seconds = min(cap, self.remaining())
+        if seconds < floor:
+            raise DeadlineExceeded(f"剩余时间预算 {self.remaining():.1f}s 不足")
+        return seconds
+
+    def child(self, seconds):
+        """从当前预算里划出一段更短的子预算 (不会超过父预算)"""
+        sub = Deadline(clock=self.clock)
+        sub.expires_at = min(self.expires_at, self.clock() + seconds)
+        return sub
+
+    def reserve(self, seconds):
+        """提前 seconds 秒到期的子预算，把最后这段时间留给收尾 (比如汇总推送)"""
+        sub = Deadline(clock=self.clock)
+        sub.expires_at = self.expires_at - seconds
+        return sub
+
+
+async def wait_within(awaitable, deadline, default=None):
+    """
+    最多等到预算用尽；返回 (结果, 是否超时)，超时返回 default
+    注意线程池里已经在跑的阻塞调用无法被真正打断，只是不再等它
+    """
+    remaining = deadline.remaining()
+    try:
+        return await asyncio.wait_for(awaitable, timeout=None if remaining == math.inf else remaining), False
+    except asyncio.TimeoutError:
+        return default, True
+
+
+def ensure(deadline):
+    """None -> 不限时的 Deadline，方便各模块把参数设为可选"""
+    return deadline if deadline is not None else Deadline()
@@ -0,0 +1,237 @@
+# history_store.py
+"""
+运行历史库: 把每次运行、每个标的的快照 (报价 / 技术指标 / 期权 / 基本面 / 大盘 / 新闻摘要 / AI 结论 / 耗时)
+批量写进本地 SQLite，之后用简单的查询接口做分析，而不是去翻企业微信的聊天记录。
+
+CI 里每个分片写自己的库 (SENTINEL_HISTORY_DB=history/shard-N.db)，merge 任务再用 merge 子命令并入主库。
+
+命令行示例:
+    python history_store.py series NVDA rsi          # NVDA 的 RSI 历史
+    python history_store.py where pcr ">" 1.2        # 所有 PCR > 1.2 的快照
+    python history_store.py merge history-shards/    # 把目录下各分片的库并入主库
+"""
+import argparse
+import glob
+import hashlib
+import os
+import sqlite3
+
+from config import Config
+from symbol_context import is_missing
+
+# (列名, 类型)；数值字段缺失时存 NULL
+COLUMNS = [
+    ("run_id", "TEXT"),
+    ("run_date", "TEXT"),
+    ("mode", "TEXT"),
+    ("symbol", "TEXT"),
+    ("ts", "TEXT"),
+    ("price", "REAL"),
+    ("change_pct", "REAL"),
+    ("rsi", "REAL"),
+    ("atr", "REAL"),
+    ("sma20", "REAL"),
+    ("pcr", "REAL"),
+    ("pressure", "REAL"),
+    ("target_price", "REAL"),
+    ("spy_change", "REAL"),
+    ("qqq_change", "REAL"),
+    ("news_hashes", "TEXT"),
+    ("insight", "TEXT"),
+    ("latency_data", "REAL"),
+    ("latency_ai", "REAL"),
+]
+COLUMN_NAMES = [name for name, _ in COLUMNS]
+OPERATORS = {">", ">=", "<", "<=", "=", "!="}
+
+
+def news_hashes(news_text):
+    """每条新闻标题取一个短摘要，逗号拼接 (只存摘要，用来判断新闻是否变化)"""
+    titles = [line.split(" [")[0].lstrip("- ").strip() for line in (news_text or "").splitlines()]
+    return ",".join(hashlib.sha1(t.encode("utf-8")).hexdigest()[:12] for t in titles if t)
+
+
+def snapshot_from_context(ctx, run_id, run_date, mode, ts, insight=None, latency_data=None, latency_ai=None):
+    """把 SymbolContext 拍平成一行快照 (NaN 存成 NULL)"""
+    snapshot = {name: None if is_missing(value) else value
+                for name, value in ctx.to_record().items() if name in COLUMN_NAMES}
+    snapshot.update({
+        "run_id": run_id,
+        "run_date": run_date,
+        "mode": mode,
+        "ts": ts,
+        "news_hashes": news_hashes(ctx.news),
+        "insight": insight,
+        "latency_data": latency_data,
+        "latency_ai": latency_ai,
+    })
+    return snapshot
+
+
+def find_databases(paths, exclude=None):
+    """展开待合并的库: 目录取其中的 *.db，不存在的路径跳过 (某个分片失败时没有产物)，排除 exclude 本身"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(glob.glob(os.path.join(path, "*.db"))))
+        elif os.path.isfile(path):
+            found.append(path)
+        else:
+            print(f"⚠️ 找不到历史库: {path}，跳过")
+    skip = os.path.realpath(exclude) if exclude else None
+    return [p for p in found if os.path.realpath(p) != skip]
+
+
+class HistoryStore:
+    """
+    批量追加写入：add() 先进内存缓冲，攒够 batch_size 条 (或调用 flush/close) 才在一个事务里 executemany
+    """
+
+    def __init__(self, path=None, batch_size=50):
+        self.path = path or Config.HISTORY_DB
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.batch_size = batch_size
+        self.buffer = []
+        self._init_schema()
+
+    def _init_schema(self):
+        columns = ", ".join(f"{name} {kind}" for name, kind in COLUMNS)
+        with self.conn:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS snapshots ({columns})")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_symbol_ts ON snapshots (symbol, ts)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_run_date ON snapshots (run_date, mode)")
+
+    def add(self, snapshot):
+        self.buffer.append(tuple(snapshot.get(name) for name in COLUMN_NAMES))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        placeholders = ", ".join("?" for _ in COLUMN_NAMES)
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO snapshots ({', '.join(COLUMN_NAMES)}) VALUES ({placeholders})", self.buffer)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def merge(self, paths):
+        """
+        把其他历史库 (CI 各分片写出的库) 的快照并入本库，返回新增行数
+        同一 (run_id, mode, symbol) 已存在时跳过，重跑 merge 不会产生重复行
+        """
+        self.flush()
+        columns = ", ".join(COLUMN_NAMES)
+        added = 0
+        for path in paths:
+            self.conn.execute("ATTACH DATABASE ? AS shard", (path,))
+            try:
+                with self.conn:
+                    cursor = self.conn.execute(
+                        f"INSERT INTO snapshots ({columns}) SELECT {columns} FROM shard.snapshots AS s "
+                        "WHERE NOT EXISTS (SELECT 1 FROM snapshots AS t WHERE t.run_id = s.run_id "
+                        "AND t.mode = s.mode AND t.symbol = s.symbol)")
+                added += cursor.rowcount
+            finally:
+                self.conn.execute("DETACH DATABASE shard")
+        return added
+
+    # ---------------- 查询接口 ----------------
+    @staticmethod
+    def _check_field(field):
+        if field not in COLUMN_NAMES:
+            raise ValueError(f"未知字段: {field} (可选: {', '.join(COLUMN_NAMES)})")
+
+    def series(self, symbol, field, mode=None, limit=None):
+        """某个标的某个字段的时间序列 [(ts, value), ...]，按时间升序"""
+        self._check_field(field)
+        self.flush()
+        sql = f"SELECT ts, {field} FROM snapshots WHERE symbol = ?"
+        params = [symbol]
+        if mode:
+            sql += " AND mode = ?"
+            params.append(mode)
+        if limit:
+            # 取最近 limit 条，再翻转回升序
+            sql += " ORDER BY ts DESC LIMIT ?"
+            params.append(limit)
+        else:
+            sql += " ORDER BY ts"
+        rows = [(row[0], row[1]) for row in self.conn.execute(sql, params)]
+        return rows[::-1] if limit else rows
+
+    def where(self, field, op, value, symbol=None):
+        """按条件筛选快照，例如 where("pcr", ">", 1.2)，返回字典列表"""
+        self._check_field(field)
+        if op not in OPERATORS:
+            raise ValueError(f"不支持的比较符: {op}")
+        self.flush()
+        sql = f"SELECT * FROM snapshots WHERE {field} {op} ?"
+        params = [value]
+        if symbol:
+            sql += " AND symbol = ?"
+            params.append(symbol)
+        sql += " ORDER BY ts"
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def latest(self, symbol, mode=None, run_date=None):
+        """某个标的最近一条快照 (可按模式、日期过滤)，没有则返回 None"""
+        self.flush()
+        sql = "SELECT * FROM snapshots WHERE symbol = ?"
+        params = [symbol]
+        if mode:
+            sql += " AND mode = ?"
+            params.append(mode)
+        if run_date:
+            sql += " AND run_date = ?"
+            params.append(run_date)
+        row = self.conn.execute(sql + " ORDER BY ts DESC LIMIT 1", params).fetchone()
+        return dict(row) if row else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查询 OpenBB Sentinel 运行历史")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_series = sub.add_parser("series", help="某个标的某个字段的历史")
+    p_series.add_argument("symbol")
+    p_series.add_argument("field")
+    p_series.add_argument("--mode", choices=["pre", "post"])
+
+    p_where = sub.add_parser("where", help="按条件筛选快照")
+    p_where.add_argument("field")
+    p_where.add_argument("op", choices=sorted(OPERATORS))
+    p_where.add_argument("value", type=float)
+    p_where.add_argument("--symbol")
+
+    p_merge = sub.add_parser("merge", help="把其他历史库 (CI 各分片写出的库) 并入主库")
+    p_merge.add_argument("paths", nargs="+", help="历史库文件或目录 (目录下的 *.db 全部并入)")
+    args = parser.parse_args()
+
+    with HistoryStore() as store:
+        if args.command == "merge":
+            paths = find_databases(args.paths, exclude=store.path)
+            added = store.merge(paths)
+            print(f"🗄️ 已从 {len(paths)} 个分片库并入 {added} 条快照 -> {store.path}")
+        elif args.command == "series":
+            for ts, value in store.series(args.symbol, args.field, mode=args.mode):
+                print(f"{ts}  {value}")
+        else:
+            for row in store.where(args.field, args.op, args.value, symbol=args.symbol):
+                print(f"{row['ts']}  {row['mode']:<4} {row['symbol']:<6} {args.field}={row[args.field]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# indicators.py
+"""
+声明式技术指标注册表
+
+每个节点声明自己依赖哪些输入 (true_range、gain/loss、ema12 ...)，求值时按依赖关系
+展开成有向无环图，同一个标的里共享的中间结果只算一次。
+周线 / 月线由同一份日线重采样得到，不额外下载；名字加前缀即可: "weekly.rsi14"、"monthly.sma20"。
+
+新增指标只需要:
+    @node("ema50", "close", label="EMA(50)")
+    def _ema50(close):
+        return close.ewm(span=50, adjust=False).mean()
+然后把名字加进 Config.AI_INDICATORS。
+"""
+import math
+from collections import namedtuple
+
+import pandas as pd
+
+# K 线本身的列，直接从 frame 里取
+BASE_COLUMNS = ("open", "high", "low", "close", "volume")
+TIMEFRAMES = {
+    "daily": None,
+    "weekly": "W-FRI",
+    "monthly": "ME",
+}
+TIMEFRAME_LABELS = {"daily": "", "weekly": "周线 ", "monthly": "月线 "}
+
+Node = namedtuple("Node", ["name", "inputs", "fn", "label"])
+REGISTRY = {}
+
+
+def node(name, *inputs, label=None):
+    """注册一个指标 / 中间结果节点，fn 的参数按 inputs 的顺序传入 (都是 Series)"""
+    def register(fn):
+        if name in REGISTRY or name in BASE_COLUMNS:
+            raise ValueError(f"重复的指标名: {name}")
+        REGISTRY[name] = Node(name, tuple(inputs), fn, label)
+        return fn
+    return register
+
+
+def wilder(series, window):
+    """Wilder 平滑 (RSI / ATR 用的 RMA)"""
+    return series.ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+
+
+# ---------------- 中间结果 ----------------
+@node("prev_close", "close")
+def _prev_close(close):
+    return close.shift(1)
+
+
+@node("change", "close")
+def _change(close):
+    return close.diff()
+
+
+@node("returns", "close")
+def _returns(close):
+    return close.pct_change(fill_method=None)
+
+
+@node("gain", "change")
+def _gain(change):
+    return change.clip(lower=0)
+
+
+@node("loss", "change")
+def _loss(change):
+    return (-change).clip(lower=0)
+
+
+@node("true_range", "high", "low", "prev_close")
+def _true_range(high, low, prev_close):
+    return pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+
+
+@node("ema12", "close", label="EMA(12)")
+def _ema12(close):
+    return close.ewm(span=12, adjust=False).mean()
+
+
+@node("ema26", "close", label="EMA(26)")
+def _ema26(close):
+    return close.ewm(span=26, adjust=False).mean()
+
+
+@node("std20", "close")
+def _std20(close):
+    return close.rolling(20).std()
+
+
+# ---------------- 指标 ----------------
+@node("rsi14", "gain", "loss", label="RSI(14)")
+def _rsi14(gain, loss):
+    avg_gain, avg_loss = wilder(gain, 14), wilder(loss, 14)
+    rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    return rsi.where(avg_loss != 0, 100.0)
+
+
+@node("atr14", "true_range", label="ATR(14)")
+def _atr14(true_range):
+    return wilder(true_range, 14)
+
+
+@node("sma20", "close", label="SMA(20)")
+def _sma20(close):
+    return close.rolling(20).mean()
+
+
+@node("sma50", "close", label="SMA(50)")
+def _sma50(close):
+    return close.rolling(50).mean()
+
+
+@node("sma200", "close", label="SMA(200)")
+def _sma200(close):
+    return close.rolling(200).mean()
+
+
+@node("macd", "ema12", "ema26", label="MACD")
+def _macd(ema12, ema26):
+    return ema12 - ema26
+
+
+@node("macd_signal", "macd", label="MACD 信号线")
+def _macd_signal(macd):
+    return macd.ewm(span=9, adjust=False).mean()
+
+
+@node("macd_hist", "macd", "macd_signal", label="MACD 柱")
+def _macd_hist(macd, signal):
+    return macd - signal
+
+
+@node("bb_width", "sma20", "std20", label="布林带宽度(%)")
+def _bb_width(sma20, std20):
+    return 4 * std20 / sma20 * 100
+
+
+@node("volatility20", "returns", label="20日年化波动率(%)")
+def _volatility20(returns):
+    return returns.rolling(20).std() * math.sqrt(252) * 100
+
+
+@node("atr_pct", "atr14", "close", label="ATR/现价(%)")
+def _atr_pct(atr, close):
+    return atr / close * 100
+
+
+# ---------------- 求值 ----------------
+def split_name(name):
+    """"weekly.rsi14" -> ("weekly", "rsi14")；不带前缀的是日线"""
+    timeframe, _, base = name.rpartition(".")
+    timeframe = timeframe or "daily"
+    if timeframe not in TIMEFRAMES:
+        raise KeyError(f"未知周期: {timeframe}")
+    if base not in REGISTRY and base not in BASE_COLUMNS:
+        raise KeyError(f"未注册的指标: {base}")
+    return timeframe, base
+
+
+def label(name):
+    """给 Prompt 用的中文名，"weekly.rsi14" -> "周线 RSI(14)"；未注册的名字原样返回"""
+    try:
+        timeframe, base = split_name(name)
+    except KeyError:
+        return name
+    spec = REGISTRY.get(base)
+    return TIMEFRAME_LABELS[timeframe] + (spec.label if spec and spec.label else base)
+
+
+def resample(bars, rule):
+    """日线 -> 周线 / 月线 (OHLCV 聚合)，最后一根可能是未走完的周期"""
+    agg = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    agg = {k: v for k, v in agg.items() if k in bars.columns}
+    return bars.resample(rule).agg(agg).dropna(subset=["close"])
+
+
+def plan(names):
+    """
+    按依赖展开成拓扑序 [(timeframe, node), ...]，每个 (周期, 节点) 只出现一次
+    检测到环时抛 ValueError
+    """
+    order, done, visiting = [], set(), set()
+
+    def visit(timeframe, name):
+        key = (timeframe, name)
+        if key in done:
+            return
+        if key in visiting:
+            raise ValueError(f"指标依赖成环: {timeframe}.{name}")
+        visiting.add(key)
+        for dep in REGISTRY[name].inputs if name in REGISTRY else ():
+            visit(timeframe, dep)
+        visiting.discard(key)
+        done.add(key)
+        order.append(key)
+
+    for name in names:
+        visit(*split_name(name))
+    return order
+
+
+class IndicatorEngine:
+    """
+    单个标的的求值器：同一份日线上按计划依次计算，结果缓存在 self.series 里
+    (周期, 节点) -> Series，所以 rsi14 和 周线 rsi14 各自只算一次，gain/loss 等中间结果被共享
+    """
+
+    def __init__(self, bars):
+        bars = bars.sort_index()
+        self.frames = {"daily": bars}
+        self.series = {}
+
+    def frame(self, timeframe):
+        if timeframe not in self.frames:
+            self.frames[timeframe] = resample(self.frames["daily"], TIMEFRAMES[timeframe])
+        return self.frames[timeframe]
+
+    def compute(self, names):
+        for timeframe, name in plan(names):
+            if (timeframe, name) in self.series:
+                continue
+            if name in BASE_COLUMNS:
+                value = self.frame(timeframe)[name].astype(float)
+            else:
+                spec = REGISTRY[name]
+                value = spec.fn(*(self.series[(timeframe, dep)] for dep in spec.inputs))
+            self.series[(timeframe, name)] = value
+        return {name: self.series[split_name(name)] for name in names}
+
+    def latest(self, names, digits=2):
+        """每个指标的最新值 (float)，算不出来为 NaN"""
+        values = {}
+        for name, series in self.compute(names).items():
+            value = series.iloc[-1] if len(series) else math.nan
+            values[name] = round(float(value), digits) if pd.notna(value) else math.nan
+        return values
+
+
+def latest_values(bars, names, digits=2):
+    return IndicatorEngine(bars).latest(names, digits)
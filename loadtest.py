@@ -0,0 +1,591 @@
+# loadtest.py
+"""
+本地压测工具: 启动一组可注入故障的"替身服务"，模拟 RSS / Yahoo K 线 / 期权 / 报价 / Gemini REST / 企业微信 Webhook，
+然后让 main.py 的生产流水线在不同并发度 (分片数) 下跑一遍，报告吞吐、每个阶段的 p50/p95/p99 以及总耗时。
+
+用法示例 (500 个标的，Yahoo 变慢、Gemini 每 50 次请求来一波 10 个 429；AI 间隔默认与生产相同，压测时通常调小):
+    python loadtest.py --symbols 500 --concurrency 1,4,8 --ai-interval 0 \\
+        --latency chart=300,options=200 --jitter chart=150 \\
+        --error-rate rss=0.1 --burst gemini=50:10 --payload rss=40
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+import requests
+
+from config import Config
+from metrics import LatencyRecorder
+from circuit_breaker import breakers
+from deadline import Deadline
+from data_engine import DataEngine
+from ai_brain import AIBrain, is_failed_insight
+from notifier import WeChatNotifier
+from providers import Provider, ProviderRouter
+from run_journal import RunJournal
+from history_store import HistoryStore
+from shard import partition_watchlist
+from main import RunStages, BatchSender
+
+SERVICES = ("rss", "chart", "options", "quote", "gemini", "webhook")
+
+# 默认返回体规模: RSS 条数 / K 线根数 / 每边期权行权价个数 / 报价无 / Gemini 回复字数 / Webhook 无
+DEFAULT_PAYLOAD = {"rss": 20, "chart": 252, "options": 60, "quote": 0, "gemini": 1500, "webhook": 0}
+
+
+class FaultProfile:
+    """
+    单个替身服务的故障配置
+    latency_ms / jitter_ms: 固定延迟 + 均匀抖动
+    error_rate: 随机返回 500 的概率
+    burst_every / burst_len: 每 burst_every 个请求里，前 burst_len 个直接返回 429 (模拟限流风暴)
+    payload: 返回体规模 (含义见 DEFAULT_PAYLOAD)
+    """
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, burst_every=0, burst_len=0, payload=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_len = burst_len
+        self.payload = payload
+
+
+class StandInServer:
+    """在后台线程里运行的本地替身服务 (一个端口，按路径区分各服务)"""
+
+    def __init__(self, profiles=None, host="127.0.0.1", port=0, seed=42):
+        self.profiles = {s: (profiles or {}).get(s) or FaultProfile() for s in SERVICES}
+        self.stats = {s: {"requests": 0, "errors": 0, "throttled": 0} for s in SERVICES}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    # ---------------- 故障注入 ----------------
+    def _inject(self, service):
+        """决定本次请求的结果，返回 (状态码 或 None, 延迟秒数)"""
+        profile = self.profiles[service]
+        with self._lock:
+            stats = self.stats[service]
+            stats["requests"] += 1
+            seq = stats["requests"]
+            delay = (profile.latency_ms + self._rng.uniform(0, profile.jitter_ms)) / 1000
+            status = None
+            if profile.burst_every and (seq - 1) % profile.burst_every < profile.burst_len:
+                status = 429
+                stats["throttled"] += 1
+            elif profile.error_rate and self._rng.random() < profile.error_rate:
+                status = 500
+                stats["errors"] += 1
+        return status, delay
+
+    def _size(self, service):
+        payload = self.profiles[service].payload
+        return DEFAULT_PAYLOAD[service] if payload is None else payload
+
+    # ---------------- 各服务的返回体 ----------------
+    def _rss_body(self, symbol):
+        items = "".join(
+            f"<item><title>{symbol} headline {i}: market update</title>"
+            f"<pubDate>Tue, 09 Dec 2025 10:{i % 60:02d}:00 GMT</pubDate></item>"
+            for i in range(self._size("rss"))
+        )
+        return "application/rss+xml", f"<rss><channel>{items}</channel></rss>".encode("utf-8")
+
+    def _chart_body(self, symbol):
+        # 每个标的的价格路径固定 (按代码做种子)，方便不同并发度之间对比
+        rng = random.Random(zlib.crc32(symbol.encode()))
+        bars = self._size("chart")
+        start = 1_700_000_000
+        price = rng.uniform(20, 500)
+        quote = {"open": [], "high": [], "low": [], "close": [], "volume": []}
+        for _ in range(bars):
+            open_ = price
+            price = max(1.0, price * (1 + rng.gauss(0, 0.02)))
+            quote["open"].append(round(open_, 2))
+            quote["high"].append(round(max(open_, price) * 1.01, 2))
+            quote["low"].append(round(min(open_, price) * 0.99, 2))
+            quote["close"].append(round(price, 2))
+            quote["volume"].append(rng.randint(100_000, 5_000_000))
+        body = {"chart": {"result": [{
+            "meta": {"symbol": symbol, "currency": "USD"},
+            "timestamp": [start + i * 86400 for i in range(bars)],
+            "indicators": {"quote": [quote]},
+        }], "error": None}}
+        return "application/json", json.dumps(body).encode("utf-8")
+
+    def _options_body(self, symbol):
+        rng = random.Random(zlib.crc32(symbol.encode()) + 1)
+        strikes = [100 + 5 * i for i in range(self._size("options"))]
+
+        def side():
+            return [{"strike": k, "volume": rng.randint(0, 5000), "openInterest": rng.randint(0, 20000)}
+                    for k in strikes]
+
+        body = {"optionChain": {"result": [{"underlyingSymbol": symbol,
+                                            "options": [{"calls": side(), "puts": side()}]}], "error": None}}
+        return "application/json", json.dumps(body).encode("utf-8")
+
+    def _quote_body(self, symbols):
+        """目标价 (info) 和大盘最新价 / 昨收 (fast_info) 共用的报价接口"""
+        result = []
+        for symbol in symbols:
+            rng = random.Random(zlib.crc32(symbol.encode()) + 2)
+            prev_close = rng.uniform(20, 500)
+            result.append({"symbol": symbol, "regularMarketPreviousClose": round(prev_close, 2),
+                           "regularMarketPrice": round(prev_close * (1 + rng.gauss(0, 0.01)), 2),
+                           "targetMeanPrice": round(prev_close * rng.uniform(0.9, 1.3), 2)})
+        body = {"quoteResponse": {"result": result, "error": None}}
+        return "application/json", json.dumps(body).encode("utf-8")
+
+    def _gemini_body(self):
+        text = ("1. 📰 **消息面解读**：替身服务生成的测试报告。" * 200)[:self._size("gemini")]
+        body = {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                                "finishReason": "STOP", "index": 0}]}
+        return "application/json", json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+    def _route(self, method, path):
+        """返回 (服务名, 生成返回体的函数)；未知路径返回 (None, None)"""
+        url = urlparse(path)
+        parts = url.path.strip("/").split("/")
+        query = parse_qs(url.query)
+        if method == "GET" and parts[0] == "rss":
+            symbol = (query.get("s") or query.get("q") or ["TEST"])[0].split()[0]
+            return "rss", lambda: self._rss_body(symbol)
+        if method == "GET" and url.path.startswith("/v8/finance/chart/"):
+            return "chart", lambda: self._chart_body(parts[-1])
+        if method == "GET" and url.path.startswith("/v7/finance/options/"):
+            return "options", lambda: self._options_body(parts[-1])
+        if method == "GET" and url.path == "/v7/finance/quote":
+            symbols = (query.get("symbols") or ["SPY"])[0].split(",")
+            return "quote", lambda: self._quote_body(symbols)
+        if method == "POST" and url.path.endswith(":generateContent"):
+            return "gemini", self._gemini_body
+        if method == "POST" and url.path.startswith("/cgi-bin/webhook/send"):
+            return "webhook", lambda: ("application/json", b'{"errcode":0,"errmsg":"ok"}')
+        return None, None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+
+                service, build = server._route(method, self.path)
+                if not service:
+                    self._reply(404, "text/plain", b"not found")
+                    return
+
+                status, delay = server._inject(service)
+                if delay:
+                    time.sleep(delay)
+                if status == 429:
+                    body = {"error": {"code": 429, "message": "Resource has been exhausted (stand-in)",
+                                      "status": "RESOURCE_EXHAUSTED"}}
+                    self._reply(429, "application/json", json.dumps(body).encode("utf-8"))
+                elif status:
+                    body = {"error": {"code": status, "message": "injected failure", "status": "INTERNAL"}}
+                    self._reply(status, "application/json", json.dumps(body).encode("utf-8"))
+                else:
+                    self._reply(200, *build())
+
+            def _reply(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class StandInProvider(Provider):
+    """
+    替身服务的 K 线 (Yahoo chart JSON 结构)
+    作为 ProviderRouter 里的一个数据源，和 yfinance 一样经过 "chart" 熔断器、延迟统计和 normalize_bars
+    """
+
+    name = "standin"
+    label = "StandIn"
+    breaker = "chart"
+
+    def __init__(self, base_url, http):
+        self.base_url = base_url
+        self.http = http
+
+    def history(self, symbol, days):
+        resp = self.http.get(f"{self.base_url}/v8/finance/chart/{symbol}", params={"range": "1y"}, timeout=30)
+        resp.raise_for_status()
+        result = resp.json()["chart"]["result"][0]
+        return pd.DataFrame(result["indicators"]["quote"][0], index=pd.to_datetime(result["timestamp"], unit="s"))
+
+
+class StandInEngine(DataEngine):
+    """
+    DataEngine 原样运行 (aget_full_context、数据源路由、熔断、时间预算、新闻、技术指标)，
+    只把 yfinance 的下载点 (没有可配置的服务地址) 换成替身服务的同结构接口，并给各数据源计时。
+    本地缓存不读写：每一轮压测都走完整的下载路径，结果才可比，也不会污染真实缓存。
+    """
+
+    def __init__(self, base_url, recorder):
+        super().__init__()
+        self.base_url = base_url
+        self.recorder = recorder
+        # 直连替身服务，不走环境变量里的代理
+        self.http = requests.Session()
+        self.http.trust_env = False
+        self.providers = ProviderRouter([StandInProvider(base_url, self.http)])
+
+    def _cache_enabled(self):
+        return False
+
+    def _timed(self, stage, fn, failed):
+        start = time.perf_counter()
+        result = fn()
+        self.recorder.record(stage, time.perf_counter() - start, ok=not failed(result))
+        return result
+
+    def _quote(self, symbol):
+        resp = self.http.get(f"{self.base_url}/v7/finance/quote", params={"symbols": symbol}, timeout=10)
+        resp.raise_for_status()
+        return resp.json()["quoteResponse"]["result"][0]
+
+    def _download_option_chain(self, symbol):
+        resp = self.http.get(f"{self.base_url}/v7/finance/options/{symbol}", timeout=10)
+        resp.raise_for_status()
+        chain = resp.json()["optionChain"]["result"][0]["options"][0]
+        columns = ['strike', 'volume', 'openInterest']
+        return pd.DataFrame(chain["puts"])[columns], pd.DataFrame(chain["calls"])[columns]
+
+    def _download_target_price(self, symbol):
+        return self._quote(symbol).get("targetMeanPrice", "N/A")
+
+    def _download_index_quote(self, symbol):
+        quote = self._quote(symbol)
+        return [quote["regularMarketPrice"], quote["regularMarketPreviousClose"]]
+
+    # ---------------- 各数据源计时 (内部出错都被 DataEngine 吞掉，按返回值判断成败) ----------------
+    def _fetch_history_direct(self, symbol):
+        return self._timed("chart", lambda: super(StandInEngine, self)._fetch_history_direct(symbol),
+                           lambda df: df is None or df.empty)
+
+    def _calculate_technicals(self, df):
+        return self._timed("technicals", lambda: super(StandInEngine, self)._calculate_technicals(df),
+                           lambda tech: pd.isna(tech["rsi"]))
+
+    def _get_options_direct(self, symbol):
+        return self._timed("options", lambda: super(StandInEngine, self)._get_options_direct(symbol),
+                           lambda opts: opts["pcr"] == "N/A")
+
+    def _get_fundamental_direct(self, symbol):
+        return self._timed("fundamental", lambda: super(StandInEngine, self)._get_fundamental_direct(symbol),
+                           lambda target: target == "N/A")
+
+    def _get_market_indices(self):
+        return self._timed("macro", super()._get_market_indices,
+                           lambda indices: any(pd.isna(v) for v in indices.values()))
+
+    async def _aget_news(self, symbol, session, deadline=None, since=None):
+        start = time.perf_counter()
+        digest = await super()._aget_news(symbol, session, deadline, since)
+        self.recorder.record("news", time.perf_counter() - start, ok=bool(digest.get("titles")))
+        return digest
+
+
+class TimedNotifier(WeChatNotifier):
+    """真实的 WeChatNotifier (熔断 / 超时 / 重试)，额外记录每次推送的耗时"""
+
+    def __init__(self, webhook_url, recorder):
+        super().__init__(webhook_url=webhook_url)
+        self.recorder = recorder
+
+    def send(self, content, msg_type="text", deadline=None):
+        start = time.perf_counter()
+        ok = super().send(content, msg_type, deadline=deadline)
+        self.recorder.record("webhook", time.perf_counter() - start, ok=ok)
+        return ok
+
+
+class TimedStages(RunStages):
+    """main.py 的抓取 / 分析 / 落盘三段，额外记录每个标的的数据 / AI / 端到端耗时和失败原因"""
+
+    def __init__(self, *args, recorder, failures, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recorder = recorder
+        self.failures = failures
+        self.started = {}
+
+    def fetch(self, ticker):
+        self.started[ticker] = time.perf_counter()
+        item = super().fetch(ticker)
+        if item is None:
+            self.recorder.record("data", time.perf_counter() - self.started.pop(ticker), ok=False)
+            self.failures.append((ticker, "没有拿到 K 线数据"))
+        else:
+            self.recorder.record("data", item["latency_data"])
+        return item
+
+    def analyze(self, ticker, item):
+        insight = super().analyze(ticker, item)
+        ok = not is_failed_insight(insight)
+        self.recorder.record("gemini", item["latency_ai"], ok=ok)
+        if not ok:
+            self.failures.append((ticker, insight[:80]))
+        return insight
+
+    def persist(self, ticker, item, insight):
+        super().persist(ticker, item, insight)
+        self.recorder.record("total", time.perf_counter() - self.started.pop(ticker))
+
+
+class LoadHarness:
+    """
+    让生产流水线 (main.py 的 RunStages + ChunkedPipeline: DataEngine.aget_full_context → AIBrain → BatchSender)
+    去打替身服务。并发度对应 CI 的矩阵分片数：每个分片一条独立的流水线 (各自的 DataEngine / AIBrain /
+    两次 AI 调用之间的 Config.AI_CALL_INTERVAL 间隔)，股票池按 shard.partition_watchlist 切分。
+
+    构造时临时改写 Config (外部服务地址、缓存目录等) 和 NO_PROXY，close() / 退出 with 时全部恢复，
+    压测中打开的熔断器也一并复位 (熔断状态是进程级的，不能留给后面的真实运行)。
+    """
+
+    def __init__(self, server, mode="pre", gemini_retry_delay=1.0, ai_interval=None, budget=None, verbose=False):
+        self.base_url = server.base_url
+        self.mode = mode
+        self.gemini_retry_delay = gemini_retry_delay
+        self.budget = Config.RUN_BUDGET if budget is None else budget
+        self.verbose = verbose
+        self._tmp = tempfile.TemporaryDirectory(prefix="sentinel-loadtest-")
+        self._saved_config = {}
+        self._saved_env = {}
+
+        base = self.base_url
+        self._patch(
+            # 本地模式会给请求挂代理，压测必须直连替身服务
+            IS_GITHUB=True,
+            YAHOO_RSS_URL=f"{base}/rss/yahoo?s={{symbol}}",
+            GOOGLE_RSS_URL=f"{base}/rss/google?q={{symbol}}+stock",
+            GEMINI_API_ENDPOINT=base,
+            GOOGLE_API_KEY=Config.GOOGLE_API_KEY or "stand-in",
+            # 压测的就是 Gemini 调用，信号平淡的标的也不走规则模板
+            TEMPLATE_FAST_PATH=False,
+            AI_CALL_INTERVAL=Config.AI_CALL_INTERVAL if ai_interval is None else ai_interval,
+            CACHE_DIR=os.path.join(self._tmp.name, "cache"),
+        )
+        self._setenv("NO_PROXY", "127.0.0.1,localhost")
+
+    def _patch(self, **values):
+        for key, value in values.items():
+            self._saved_config.setdefault(key, getattr(Config, key))
+            setattr(Config, key, value)
+
+    def _setenv(self, key, value):
+        self._saved_env.setdefault(key, os.environ.get(key))
+        os.environ[key] = value
+
+    def close(self):
+        """恢复构造时改写的 Config 和环境变量，复位熔断器，删除临时目录"""
+        for key, value in self._saved_config.items():
+            setattr(Config, key, value)
+        for key, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        self._saved_config, self._saved_env = {}, {}
+        breakers.reset()
+        self._tmp.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run_shard(self, symbols, index, total, workdir, deadline, recorder, failures):
+        """与 CI 里一个矩阵任务相同: 独立的引擎 / 日志 / 历史库，边分析边推送"""
+        engine = StandInEngine(self.base_url, recorder)
+        brain = AIBrain()
+        brain.retry_delay = self.gemini_retry_delay
+        notifier = TimedNotifier(f"{self.base_url}/cgi-bin/webhook/send?key=stand-in", recorder)
+        journal = RunJournal(self.mode, journal_dir=workdir, tag=f"shard{index}of{total}")
+        history = HistoryStore(path=os.path.join(workdir, f"shard{index}of{total}.db"))
+        sender = BatchSender(notifier, self.mode, journal=journal, deadline=deadline)
+        run_ts = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        stages = TimedStages(engine, brain, self.mode, journal, history, deadline.reserve(Config.DELIVERY_RESERVE),
+                             run_ts, sender=sender, recorder=recorder, failures=failures)
+        try:
+            stats = stages.run(symbols)
+            sender.close()
+        finally:
+            history.close()
+            engine.io_pool.shutdown(wait=False)
+        return stats
+
+    def run(self, symbols, concurrency):
+        """
+        把 symbols 切成 concurrency 片并行跑完，返回报告:
+        {concurrency, symbols, processed, failed, skipped, elapsed, throughput, recorder (各阶段耗时), failures,
+         breakers, max_in_flight}
+        """
+        recorder = LatencyRecorder()
+        failures = []
+        # 每个并发度从干净的熔断状态开始，结果才可比
+        breakers.reset()
+        deadline = Deadline(self.budget)
+        shards = [partition_watchlist(symbols, i, concurrency) for i in range(1, concurrency + 1)]
+
+        # 流水线本身打印很多进度信息，压测时默认静音
+        devnull = open(os.devnull, "w")
+        sink = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(devnull)
+        with tempfile.TemporaryDirectory(dir=self._tmp.name) as workdir:
+            start = time.perf_counter()
+            with devnull, sink:
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    results = list(pool.map(
+                        lambda args: self._run_shard(args[1], args[0], concurrency, workdir, deadline,
+                                                     recorder, failures),
+                        enumerate(shards, start=1)))
+            elapsed = time.perf_counter() - start
+
+        processed = sum(r["processed"] for r in results)
+        return {
+            "concurrency": concurrency,
+            "symbols": len(symbols),
+            "processed": processed,
+            "failed": len(failures),
+            "skipped": [s for r in results for s in r["skipped"]],
+            "elapsed": elapsed,
+            "throughput": processed / elapsed if elapsed else 0.0,
+            "recorder": recorder,
+            "failures": failures,
+            "breakers": breakers.summary(),
+            "max_in_flight": max(r["max_in_flight"] for r in results),
+        }
+
+
+def _parse_kv(items, cast):
+    """把 ["chart=300,rss=100", "gemini=50"] 解析成 {"chart": 300, ...}"""
+    result = {}
+    for item in items or []:
+        for pair in item.split(","):
+            if not pair.strip():
+                continue
+            key, _, value = pair.partition("=")
+            key = key.strip()
+            if key not in SERVICES:
+                raise SystemExit(f"未知服务: {key} (可选: {', '.join(SERVICES)})")
+            result[key] = cast(value.strip())
+    return result
+
+
+def build_profiles(args):
+    latency = _parse_kv(args.latency, float)
+    jitter = _parse_kv(args.jitter, float)
+    error_rate = _parse_kv(args.error_rate, float)
+    burst = _parse_kv(args.burst, lambda v: tuple(int(x) for x in v.split(":")))
+    payload = _parse_kv(args.payload, int)
+
+    return {
+        s: FaultProfile(
+            latency_ms=latency.get(s, 0),
+            jitter_ms=jitter.get(s, 0),
+            error_rate=error_rate.get(s, 0.0),
+            burst_every=burst.get(s, (0, 0))[0],
+            burst_len=burst.get(s, (0, 0))[1],
+            payload=payload.get(s),
+        )
+        for s in SERVICES
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenBB Sentinel 本地压测 (替身服务 + 故障注入)")
+    parser.add_argument("--symbols", type=int, default=500, help="模拟的标的数量")
+    parser.add_argument("--concurrency", default="1,4,8", help="要测试的并发度 (并行分片数) 列表，逗号分隔")
+    parser.add_argument("--mode", choices=["pre", "post"], default="pre")
+    parser.add_argument("--latency", action="append", help="固定延迟 (毫秒)，如 chart=300,gemini=800")
+    parser.add_argument("--jitter", action="append", help="随机抖动上限 (毫秒)，如 chart=150")
+    parser.add_argument("--error-rate", action="append", help="500 错误概率，如 rss=0.1")
+    parser.add_argument("--burst", action="append", help="429 风暴: 每 N 个请求前 K 个限流，如 gemini=50:10")
+    parser.add_argument("--payload", action="append", help="返回体规模，如 rss=40,chart=2520,gemini=4000")
+    parser.add_argument("--gemini-retry-delay", type=float, default=1.0, help="AIBrain 限流重试的等待基数 (秒)")
+    parser.add_argument("--ai-interval", type=float, default=None,
+                        help="两次 AI 分析之间的间隔 (秒)，默认 Config.AI_CALL_INTERVAL")
+    parser.add_argument("--budget", type=float, default=None, help="每一轮的时间预算 (秒)，默认 Config.RUN_BUDGET")
+    parser.add_argument("--verbose", action="store_true", help="保留流水线自身的打印输出")
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i:04d}" for i in range(args.symbols)]
+    levels = [int(x) for x in args.concurrency.split(",") if x.strip()]
+
+    server = StandInServer(build_profiles(args)).start()
+    print(f"🧪 替身服务已启动: {server.base_url}")
+    try:
+        with LoadHarness(server, mode=args.mode, gemini_retry_delay=args.gemini_retry_delay,
+                         ai_interval=args.ai_interval, budget=args.budget, verbose=args.verbose) as harness:
+            reports = []
+            for level in levels:
+                print(f"\n🚦 并发度 {level}: 处理 {len(symbols)} 个标的...")
+                report = harness.run(symbols, level)
+                reports.append(report)
+                print(f"⏱️ 总耗时 {report['elapsed']:.2f}s | 吞吐 {report['throughput']:.2f} 个/秒 | "
+                      f"失败 {report['failed']} | 预算不足跳过 {len(report['skipped'])}")
+                print(report["recorder"].format_table())
+                print(breakers.format_table())
+                for symbol, reason in report["failures"][:5]:
+                    print(f"    ❌ {symbol}: {reason}")
+    finally:
+        server.stop()
+
+    print("\n📊 汇总")
+    print(f"{'并发':>4}{'总耗时(s)':>10}{'吞吐(个/s)':>10}{'失败':>6}{'跳过':>6}{'单标的p95(s)':>12}")
+    for r in reports:
+        total = r["recorder"].summary().get("total", {})
+        print(f"{r['concurrency']:>6}{r['elapsed']:>12.2f}{r['throughput']:>12.2f}"
+              f"{r['failed']:>8}{len(r['skipped']):>8}{total.get('p95', 0.0):>14.2f}")
+    print("\n📡 替身服务统计: " + json.dumps(server.stats, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
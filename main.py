@@ -6,9 +6,26 @@ from config import Config
 from data_engine import DataEngine
 from ai_brain import AIBrain
 from notifier import WeChatNotifier
-from datetime import datetime
-import pytz
+from shard import parse_shard, partition_watchlist, ShardWriter, load_shard_artifacts
+from run_journal import RunJournal
+from ai_brain import is_failed_insight
+from cassette import cassette
+from monitor import IntradayMonitor
+from history_store import HistoryStore, snapshot_from_context
+from symbol_context import SymbolContext
+from deadline import Deadline
+from circuit_breaker import breakers
+from trading_calendar import SessionIndex
+from analytics import CrossAssetAnalytics
+from scheduler import priority_inputs, score as score_priority, prioritize
+from pipeline import ChunkedPipeline, format_memory
+from session_delta import SessionSnapshots, published_since
+import asyncio
+import json
+import os
+import sys
 import time
+import pytz
 
 def setup_credentials():
     """统一配置所有数据源凭证"""
@@ -40,13 +57,16 @@ def format_wechat_message(ticker, mode, insight):
     """
     # --- 2. 这里修改为北京时间 ---
     tz = pytz.timezone('Asia/Shanghai')
-    current_time = datetime.now(tz).strftime("%Y-%m-%d %H:%M")
+    current_time = cassette.now(tz).strftime("%Y-%m-%d %H:%M")
     # ---------------------------
 
     if mode == "pre":
         title = f"☀️ 盘前策略: {ticker}"
         # 企业微信支持的颜色: info(绿), warning(橙), comment(灰)
         color_tag = "info"
+    elif mode == "monitor":
+        title = f"⚡ 盘中异动: {ticker}"
+        color_tag = "warning"
     else:
         title = f"🌙 复盘总结: {ticker}"
         color_tag = "warning"
@@ -65,100 +85,450 @@ def format_wechat_message(ticker, mode, insight):
     return msg
 
 
+class BatchSender:
+    """
+    按企业微信长度限制把多条分析合并成若干批推送
+    边分析边 add()：攒满一批立即发出，排在前面 (优先级高) 的标的不必等整次运行结束；
+    传入 journal 时，每批推送成功后记为 delivered
+    """
+
+    MAX_LENGTH = 1800  # 企业微信限制约2048字节，留点余量给标题
+    SEPARATOR = "\n" + "·" * 30 + "\n"
+
+    def __init__(self, notifier, mode, journal=None, deadline=None):
+        self.notifier = notifier
+        self.mode = mode
+        self.journal = journal
+        self.deadline = deadline
+        self.batch = []
+        self.tickers = []
+        self.length = 0
+        self.counter = 1
+
+    def _send(self, final):
+        msg_body = self.SEPARATOR.join(self.batch)
+        suffix = " - 完" if final else ""
+        full_msg = f"【{self.mode.upper()} 汇总 ({self.counter}){suffix}】\n{msg_body}"
+        if self.notifier.send(full_msg, deadline=self.deadline) and self.journal:
+            for t in self.tickers:
+                self.journal.record(t, "delivered")
+        if final:
+            print("📤 最后一批已发送。")
+        else:
+            print(f"📤 第 {self.counter} 批已发送 (长度: {self.length})")
+
+        # 重置
+        self.batch = []
+        self.tickers = []
+        self.length = 0
+        self.counter += 1
+
+    def add(self, ticker, insight):
+        # 估算加入这条消息后的总长度
+        # 注意：这里简单按字符数计算，如果包含大量中文，建议设低一点（如 600-800）
+        insight_len = len(insight.encode('utf-8'))  # 计算字节长度更准确
+
+        # 如果当前缓存 + 新消息 + 分隔符 超过限制，则先发送当前缓存
+        if self.length + insight_len > self.MAX_LENGTH and self.batch:
+            self._send(final=False)
+            cassette.sleep(2)
+
+        # 加入新消息到缓存
+        self.batch.append(insight)
+        self.tickers.append(ticker)
+        self.length += insight_len + len(self.SEPARATOR.encode('utf-8'))
+
+    def close(self):
+        """发送剩余的最后一批"""
+        if self.batch:
+            self._send(final=True)
+
+
+def send_insights(notifier, insights, mode, journal=None, deadline=None):
+    """
+    一次性推送 (ticker, insight) 列表 (merge / 盘中监控用)
+    """
+    print(f"\n📨 正在合并推送 {len(insights)} 个标的的分析报告...")
+    sender = BatchSender(notifier, mode, journal=journal, deadline=deadline)
+    for ticker, insight in insights:
+        sender.add(ticker, insight)
+    sender.close()
+
+
+def run_merge(resume=False, deadline=None):
+    """
+    merge 模式：收集各分片产物，按股票池顺序统一推送一次
+    """
+    mode, all_insights = load_shard_artifacts()
+    if not all_insights:
+        print(f"望天... 在 {Config.ARTIFACT_DIR} 中没有找到任何分片结果。")
+        return
+
+    journal = RunJournal(mode, resume=resume, tag="merge")
+    pending = [(t, i) for t, i in all_insights if not journal.done(t, "delivered")]
+    if not pending:
+        print("✅ 所有分片结果此前均已推送，无需重复发送。")
+        return
+
+    send_insights(WeChatNotifier(), pending, mode, journal=journal, deadline=deadline)
+
+
+def load_closes(engine):
+    """股票池 + 基准的日收盘价面板 (跨标的分析和优先级调度共用)；失败时返回 None"""
+    try:
+        return engine.get_close_panel(Config.WATCHLIST + Config.ANALYTICS_BENCHMARKS)
+    except Exception as e:
+        print(f"⚠️ 日线面板获取失败: {e}")
+        return None
+
+
+def compute_analytics(closes):
+    """跨标的分析每次运行只算一次 (分片时也用完整股票池，排名才有意义)；失败时返回 None"""
+    if closes is None:
+        return None
+    try:
+        analytics = CrossAssetAnalytics.compute(closes)
+        print(f"🧮 跨标的分析完成: {len(analytics.symbols)} 个标的")
+        return analytics
+    except Exception as e:
+        print(f"⚠️ 跨标的分析失败 (不影响单标的分析): {e}")
+        return None
+
+
+def prioritize_watchlist(engine, watchlist, closes, deadline, since=None):
+    """
+    用批量报价 + 日线面板 + 新闻条数给标的打分，按优先级从高到低处理
+    打分失败时保持股票池原顺序；since 原样交给 prefetch_news (盘后增量只看新标题)
+    """
+    if closes is None or len(watchlist) < 2:
+        return watchlist
+    try:
+        quotes = engine.get_batch_quotes(watchlist)
+        news_counts = engine.prefetch_news(watchlist, deadline, since=since)
+        scores = score_priority(priority_inputs(closes, quotes, news_counts))
+    except Exception as e:
+        print(f"⚠️ 优先级打分失败，按股票池顺序处理: {e}")
+        return watchlist
+    ordered = prioritize(watchlist, scores)
+    top = ", ".join(f"{t}({scores['score'].get(t, 0.0):.2f})" for t in ordered[:5])
+    print(f"🚦 优先级排序完成，前几名: {top}")
+    return ordered
+
+
+def run_data_only(engine, watchlist, out, deadline):
+    """
+    --data-only：不调用 AI、不推送，每个标的的上下文一就绪就写出一行 JSON (JSON Lines)
+    逐行写出并 flush，不在内存里攒整次运行的结果，大股票池也可以直接用管道接给其它程序
+    """
+    closes = load_closes(engine)
+    analytics = compute_analytics(closes)
+    if Config.SCHEDULER_ENABLED:
+        watchlist = prioritize_watchlist(engine, watchlist, closes, deadline)
+    run_ts = cassette.now(pytz.utc).isoformat(timespec="seconds")
+
+    async def stream():
+        count = 0
+        async for ctx in engine.astream_contexts(watchlist, deadline=deadline):
+            if analytics:
+                analytics.annotate(ctx)
+            out.write(json.dumps(dict(ctx.to_dict(), run_ts=run_ts), ensure_ascii=False) + "\n")
+            out.flush()
+            count += 1
+        return count
+
+    count = asyncio.run(stream())
+    print(f"📄 已输出 {count}/{len(watchlist)} 个标的的数据快照")
+
+
+class RunStages:
+    """
+    一次运行里每个标的的三段处理，交给 ChunkedPipeline:
+        fetch (抓取线程) -> analyze (分析线程) -> persist (调用 run() 的线程)
+    main() 和压测工具 (loadtest.py) 共用同一份，压测量到的就是生产流水线本身
+    deadline 是分析阶段的预算 (已扣掉留给汇总推送的时间)
+    """
+
+    def __init__(self, engine, brain, mode, journal, history, deadline, run_ts, sender=None,
+                 shard_writer=None, analytics=None, baselines=None, snapshots=None, session_date=None):
+        self.engine = engine
+        self.brain = brain
+        self.mode = mode
+        self.journal = journal
+        self.history = history
+        self.deadline = deadline
+        self.run_ts = run_ts
+        self.run_id = f"{journal.run_date}_{mode}_{run_ts}"
+        self.sender = sender
+        self.shard_writer = shard_writer
+        self.analytics = analytics
+        self.baselines = {} if baselines is None else baselines
+        self.snapshots = snapshots
+        self.session_date = session_date
+        self.order = {t: i for i, t in enumerate(Config.WATCHLIST)}
+        # 结果边处理边推送 / 落盘，内存里只记数量，不攒整次运行的结果
+        self.completed = 0
+        self.last_ai_call = None
+
+    def fetch(self, ticker):
+        """抓取阶段 (流水线的抓取线程)：已有结果 / 已保存的上下文直接复用"""
+        print(f"\n🔍 正在处理: {ticker} ...")
+        # 已分析过的标的直接复用结果，不再重复下载和调用 AI
+        formatted_insight = self.journal.get(ticker, "insight")
+        if formatted_insight:
+            print(f"⏭️ {ticker} 已有分析结果 (断点续跑)，跳过。")
+            return {"insight": formatted_insight}
+
+        saved = self.journal.get(ticker, "context")
+        if saved:
+            print(f"♻️ {ticker} 复用已保存的数据上下文。")
+            return {"context": SymbolContext.from_dict(saved), "latency_data": None}
+
+        # 用过的基线立即丢掉，常驻内存只剩还没处理的标的
+        pre = self.baselines.pop(ticker, None)
+        if pre is not None:
+            pre = (pre[0], SymbolContext.from_dict(pre[1]))
+        start = time.perf_counter()
+        data = self.engine.get_full_context(ticker, deadline=self.deadline, pre=pre)
+        latency_data = time.perf_counter() - start
+        if not data:
+            return None
+        if self.analytics:
+            self.analytics.annotate(data)
+        self.journal.record(ticker, "context", data.to_dict())
+        return {"context": data, "latency_data": latency_data}
+
+    def analyze(self, ticker, item):
+        """分析阶段：两次 AI 分析之间至少间隔 Config.AI_CALL_INTERVAL 秒，等待的同时抓取线程照常预取后面的标的"""
+        if "insight" in item:
+            return item["insight"]
+        if self.last_ai_call is not None:
+            # 休息时间同样从预算里扣，不能把推送的时间也睡掉
+            pause = min(Config.AI_CALL_INTERVAL - (time.monotonic() - self.last_ai_call), self.deadline.remaining())
+            if pause > 0:
+                print(f"☕ 休息 {pause:.0f} 秒避免 API 限流...")
+                cassette.sleep(pause)
+        start = time.perf_counter()
+        insight = self.brain.analyze(item["context"], mode=self.mode, deadline=self.deadline)
+        self.last_ai_call = time.monotonic()
+        item["latency_ai"] = time.perf_counter() - start
+        return insight
+
+    def persist(self, ticker, item, insight):
+        """落盘 / 推送阶段 (主线程)：写历史库、交给推送批次，然后释放这个标的"""
+        if "context" not in item:
+            # 断点续跑复用的结果
+            formatted_insight = insight
+        else:
+            self.history.add(snapshot_from_context(
+                item["context"], self.run_id, self.journal.run_date, self.mode,
+                cassette.now(pytz.utc).isoformat(timespec="seconds"), insight=insight,
+                latency_data=item["latency_data"], latency_ai=item["latency_ai"]))
+            if self.snapshots and self.mode == "pre":
+                # 当天盘后任务的基线；时间记运行开始时刻 (新闻可能在调度阶段就已抓取)，之后发布的标题盘后都算新的
+                self.snapshots.save(self.session_date, item["context"], self.run_ts)
+            formatted_insight = format_wechat_message(ticker, self.mode, insight)
+            if is_failed_insight(insight):
+                # 失败的结果照常推送，但不记为完成，续跑时会重新分析
+                print(f"⚠️ {ticker} 分析失败，续跑时将重试。")
+            else:
+                self.journal.record(ticker, "insight", formatted_insight)
+            print(f"✅ {ticker} 分析完成并已暂存。")
+
+        self.completed += 1
+        # 续跑时只推送此前没有送达的部分
+        if self.sender and not self.journal.done(ticker, "delivered"):
+            self.sender.add(ticker, formatted_insight)
+        if self.shard_writer:
+            self.shard_writer.write(ticker, self.order[ticker], formatted_insight)
+        self.journal.forget(ticker)
+
+    def chunk_done(self, index):
+        self.history.flush()
+        print(f"🧹 第 {index + 1} 块处理完毕，历史快照已落盘")
+
+    def run(self, watchlist):
+        """抓取 / 分析 / 落盘三段流水线，相邻两段之间是有界队列 (背压)，内存占用与股票池大小无关"""
+        return ChunkedPipeline(self.fetch, self.analyze, self.persist, on_chunk=self.chunk_done,
+                               should_stop=lambda: self.deadline.expired).run(watchlist)
+
+
 def main():
     # 1. 解析命令行参数
     parser = argparse.ArgumentParser(description="OpenBB Sentinel 自动化分析系统")
-    parser.add_argument("mode", choices=["pre", "post"], help="pre: 盘前策略, post: 盘后复盘")
+    parser.add_argument("mode", choices=["pre", "post", "merge", "monitor"],
+                        help="pre: 盘前策略, post: 盘后复盘, merge: 合并各分片结果并统一推送, "
+                             "monitor: 常驻盘中监控 (仅在触发时调用 AI)")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="分片执行 (格式 i/n)，只处理第 i 片并把结果写入中间产物，不推送")
+    parser.add_argument("--resume", action="store_true",
+                        help="断点续跑：跳过今天同模式已完成的标的，只推送尚未送达的结果")
+    parser.add_argument("--interval", type=int, default=None,
+                        help="monitor 模式的轮询间隔 (秒)，默认 Config.MONITOR_INTERVAL")
+    parser.add_argument("--iterations", type=int, default=None,
+                        help="monitor 模式轮询多少次后退出 (默认一直运行)")
+    io_group = parser.add_mutually_exclusive_group()
+    io_group.add_argument("--record", metavar="CASSETTE",
+                          help="正常联网运行，同时把所有外部 I/O 录制到 cassette 文件 (*.json.gz)")
+    io_group.add_argument("--replay", metavar="CASSETTE",
+                          help="完全离线，按 cassette 文件回放所有外部 I/O (不联网、不休眠)")
+    parser.add_argument("--force", action="store_true",
+                        help="美股休市日也强制运行 (默认休市日直接退出)")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="本次运行的总时间预算 (秒)，默认 Config.RUN_BUDGET；monitor 模式不限时")
+    parser.add_argument("--data-only", action="store_true",
+                        help="只抓数据不调用 AI、不推送，每个标的输出一行 JSON (JSON Lines)")
+    parser.add_argument("--output", default="-",
+                        help="--data-only 的输出文件，默认 - (标准输出，此时日志改写到标准错误)")
     args = parser.parse_args()
+    if args.data_only and args.mode not in ("pre", "post"):
+        parser.error("--data-only 只支持 pre / post 模式")
+
+    # 数据流占用标准输出时，日志全部改写到标准错误
+    records = sys.stdout
+    if args.data_only and args.output == "-":
+        sys.stdout = sys.stderr
+
+    # 整次运行的时间预算从这里开始计时
+    deadline = Deadline(Config.RUN_BUDGET if args.budget is None else args.budget)
+
+    if args.record:
+        cassette.record(args.record)
+    elif args.replay:
+        cassette.replay(args.replay)
 
     print(f"\n🚀 初始化系统 | 模式: [{args.mode}]")
     print("-" * 50)
 
-    # 2. 初始化环境
-    setup_credentials()
+    if args.mode == "merge":
+        run_merge(resume=args.resume, deadline=deadline)
+        print("-" * 50)
+        print("🏁 所有任务执行完毕。")
+        return
+
+    # 休市日 (周末 / 节假日) 直接退出，不下载任何数据、不调用 AI
+    # 盘前 (纽约早上) 和盘后 (纽约晚上) 两个定时任务对应的都是纽约当天的交易时段
+    calendar = SessionIndex()
+    session_date = calendar.local_date(cassette.now(pytz.utc))
+    session = calendar.session(session_date)
+    if session is None and not args.force:
+        print(f"📅 {session_date} 美股休市，跳过本次运行 (如需强制运行请加 --force)。")
+        return
+    if session is not None and session.early_close:
+        print(f"📅 {session_date} 为半日市，{session.close.astimezone(pytz.timezone('America/New_York')):%H:%M} (纽约时间) 收盘。")
 
-    # 3. 实例化模块
+    # 2. 初始化环境 (离线回放不需要登录数据源)
+    if not cassette.replaying:
+        setup_credentials()
+
+    # 3. 实例化模块 (--data-only 不需要 Gemini Key，也不推送)
     engine = DataEngine()
-    brain = AIBrain()
-    notifier = WeChatNotifier()
+    brain = None if args.data_only else AIBrain()
+    notifier = None if args.data_only else WeChatNotifier()
 
     # 4. 遍历股票池
     if not Config.WATCHLIST:
         print("⚠️ 警告: Config.WATCHLIST 为空。")
         return
 
-    all_insights = []  # 用于存储所有股票的分析结果
-
-    for ticker in Config.WATCHLIST:
-        print(f"\n🔍 正在处理: {ticker} ...")
+    if args.mode == "monitor":
+        monitor = IntradayMonitor(
+            engine, brain,
+            formatter=lambda ticker, insight: format_wechat_message(ticker, "monitor", insight),
+            deliver=lambda items: send_insights(notifier, items, "monitor"),
+            interval=args.interval,
+        )
         try:
-            # Step A: 获取数据
-            data = engine.get_full_context(ticker)
-            if not data:
-                continue
-
-            # Step B: AI 分析
-            insight = brain.analyze(data, mode=args.mode)
-
-            # Step C: 格式化单条消息并存入列表
-            # 注意：这里只负责生成单个标的文本，不直接发送
-            formatted_insight = format_wechat_message(ticker, args.mode, insight)
-            all_insights.append(formatted_insight)
-
-            print(f"✅ {ticker} 分析完成并已暂存。")
+            monitor.run(iterations=args.iterations)
+        except KeyboardInterrupt:
+            print("\n🛑 盘中监控已停止。")
+        return
 
-            # 为了规避 Gemini/数据源 频率限制，依然保留 sleep，但不在此时发消息
-            if ticker != Config.WATCHLIST[-1]:  # 最后一个标的后不需要等
-                print(f"☕ 休息 60 秒避免 API 限流...")
-                time.sleep(60)
+    watchlist = Config.WATCHLIST
+    shard_writer = None
+    if args.shard:
+        shard_index, shard_total = args.shard
+        watchlist = partition_watchlist(Config.WATCHLIST, shard_index, shard_total)
+        shard_writer = None if args.data_only else ShardWriter(args.mode, shard_index, shard_total)
+        print(f"🧩 分片 {shard_index}/{shard_total}: {watchlist}")
 
-        except Exception as e:
-            print(f"💥 处理 {ticker} 时发生意外错误: {e}")
-            continue
+    if args.data_only:
+        out = records if args.output == "-" else open(args.output, "w", encoding="utf-8")
+        try:
+            run_data_only(engine, watchlist, out, deadline)
+        finally:
+            if out is not records:
+                out.close()
+        print("-" * 50)
+        print("🏁 所有任务执行完毕。")
+        return
 
-    # 5. 分批汇总推送
-    if not all_insights:
+    journal_tag = f"shard{args.shard[0]}of{args.shard[1]}" if args.shard else None
+    # 回放的日志单独存放，不影响真实运行的断点续跑
+    journal_dir = os.path.join(Config.JOURNAL_DIR, "replay") if cassette.replaying else None
+    journal = RunJournal(args.mode, resume=args.resume, journal_dir=journal_dir, tag=journal_tag)
+    if args.resume:
+        print(f"♻️ 断点续跑: 读取 {journal.path}")
+
+    # 运行历史库 (回放写到单独的库里，不污染真实历史)
+    history_path = os.path.join(os.path.dirname(Config.HISTORY_DB), "replay.db") if cassette.replaying else None
+    history = HistoryStore(path=history_path)
+    run_ts = cassette.now(pytz.utc).isoformat(timespec="seconds")
+
+    # 盘后增量: 盘前保存的快照做基线 (录制 / 回放时不读写，和本地缓存一样)
+    snapshots = SessionSnapshots() if Config.SESSION_DELTA and not cassette.mode else None
+    baselines = {}
+    if snapshots and args.mode == "pre":
+        snapshots.prune(session_date)
+    elif snapshots and args.mode == "post":
+        baselines = snapshots.load(session_date, "pre", symbols=watchlist)
+        if baselines:
+            print(f"🌗 盘后增量: 复用 {len(baselines)}/{len(watchlist)} 个标的的盘前快照，只补抓盘中变化")
+        else:
+            print(f"🌗 没有找到 {session_date} 的盘前快照，按完整流程抓取")
+
+    closes = load_closes(engine)
+    analytics = compute_analytics(closes)
+
+    # 分析阶段的预算提前到期，最后 DELIVERY_RESERVE 秒留给汇总推送
+    work_deadline = deadline.reserve(Config.DELIVERY_RESERVE)
+
+    # 重要的标的先分析 (预算不够时被跳过的是最不重要的那些)
+    if Config.SCHEDULER_ENABLED:
+        since = {s: published_since(ts) for s, (ts, _) in baselines.items()}
+        watchlist = prioritize_watchlist(engine, watchlist, closes, work_deadline, since=since)
+    del closes
+
+    # 非分片模式边分析边推送：攒满一批就发，不等全部标的分析完
+    sender = None if shard_writer else BatchSender(notifier, args.mode, journal=journal, deadline=deadline)
+
+    stages = RunStages(engine, brain, args.mode, journal, history, work_deadline, run_ts, sender=sender,
+                       shard_writer=shard_writer, analytics=analytics, baselines=baselines,
+                       snapshots=snapshots, session_date=session_date)
+    stats = stages.run(watchlist)
+    if stats["skipped"]:
+        # 剩下的时间只够推送已完成的部分；未分析的标的不记入日志，--resume 时会补上
+        print(f"\n⏱️ 时间预算即将用尽，跳过剩余 {len(stats['skipped'])} 个标的: {stats['skipped']}")
+    print(f"🧠 内存: {format_memory(stats['memory'])} (在途标的最多 {stats['max_in_flight']} 个)")
+
+    history.close()
+
+    # 5. 推送最后一批
+    if not stages.completed:
         print("望天... 没有生成任何有效分析。")
         return
 
-    print(f"\n📨 正在合并推送 {len(all_insights)} 个标的的分析报告...")
-
-    MAX_LENGTH = 1800  # 企业微信限制约2048字节，留点余量给标题
-    current_batch = []
-    current_length = 0
-    batch_counter = 1
-
-    separator = "\n" + "·" * 30 + "\n"
-
-    for insight in all_insights:
-        # 估算加入这条消息后的总长度
-        # 注意：这里简单按字符数计算，如果包含大量中文，建议设低一点（如 600-800）
-        insight_len = len(insight.encode('utf-8'))  # 计算字节长度更准确
-
-        # 如果当前缓存 + 新消息 + 分隔符 超过限制，则先发送当前缓存
-        if current_length + insight_len > MAX_LENGTH and current_batch:
-            # 发送当前批次
-            msg_body = separator.join(current_batch)
-            full_msg = f"【{args.mode.upper()} 汇总 ({batch_counter})】\n{msg_body}"
-            notifier.send(full_msg)
-            print(f"📤 第 {batch_counter} 批已发送 (长度: {current_length})")
-
-            # 重置
-            current_batch = []
-            current_length = 0
-            batch_counter += 1
-            time.sleep(2)
+    if shard_writer:
+        # 分片模式只落盘，由 merge 任务统一推送
+        print(f"\n💾 分片结果已写入 {shard_writer.path} ({stages.completed} 条)，等待 merge 汇总。")
+    elif sender.counter > 1 or sender.batch:
+        sender.close()
+    else:
+        print("✅ 所有分析结果此前均已推送，无需重复发送。")
 
-        # 加入新消息到缓存
-        current_batch.append(insight)
-        current_length += insight_len + len(separator.encode('utf-8'))
-
-    # 发送剩余的最后一批
-    if current_batch:
-        msg_body = separator.join(current_batch)
-        full_msg = f"【{args.mode.upper()} 汇总 ({batch_counter}) - 完】\n{msg_body}"
-        notifier.send(full_msg)
-        print(f"📤 最后一批已发送。")
+    print("\n🔌 数据源熔断器:")
+    print(breakers.format_table())
+    print("\n📡 行情数据源:")
+    print(engine.providers.format_table())
 
     print("-" * 50)
     print("🏁 所有任务执行完毕。")
@@ -0,0 +1,71 @@
+# metrics.py
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+def percentile(values, q):
+    """最近秩法求分位数 (q 取 0-100)，空列表返回 0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class LatencyRecorder:
+    """
+    按阶段 (stage) 记录耗时和错误次数，线程安全
+    用法:
+        with recorder.timer("news"):
+            ...
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, stage, seconds, ok=True):
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+            if not ok:
+                self.errors[stage] = self.errors.get(stage, 0) + 1
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except Exception:
+            ok = False
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, ok)
+
+    def summary(self):
+        """返回 {stage: {count, errors, p50, p95, p99}} (单位: 秒)"""
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self.samples.items()}
+            errors = dict(self.errors)
+        return {
+            stage: {
+                "count": len(values),
+                "errors": errors.get(stage, 0),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+            }
+            for stage, values in snapshot.items()
+        }
+
+    def format_table(self):
+        lines = [f"{'阶段':<10}{'次数':>6}{'错误':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}"]
+        for stage, s in self.summary().items():
+            lines.append(
+                f"{stage:<12}{s['count']:>8}{s['errors']:>8}"
+                f"{s['p50'] * 1000:>10.1f}{s['p95'] * 1000:>10.1f}{s['p99'] * 1000:>10.1f}"
+            )
+        return "\n".join(lines)
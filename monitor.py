@@ -0,0 +1,268 @@
+# monitor.py
+import time
+from collections import deque
+from datetime import date
+
+import pandas as pd
+
+from config import Config
+from cassette import cassette
+from symbol_context import SymbolContext
+
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+
+
+class SymbolState:
+    """
+    单个标的的盘中增量指标
+    开盘前用日线把 Wilder 平滑的 RSI / ATR 状态算好，盘中每来一个报价只做 O(1) 的更新：
+    把"今天到目前为止"当成一根临时 K 线叠加在昨天的状态上，收盘换日时再把它并入状态。
+    """
+
+    def __init__(self, symbol, hist_df):
+        self.symbol = symbol
+        close = hist_df["close"]
+        high = hist_df["high"]
+        low = hist_df["low"]
+
+        change = close.diff()
+        alpha = 1 / RSI_WINDOW
+        self.avg_gain = float(change.clip(lower=0).ewm(alpha=alpha, adjust=False).mean().iloc[-1])
+        self.avg_loss = float((-change).clip(lower=0).ewm(alpha=alpha, adjust=False).mean().iloc[-1])
+
+        prev = close.shift(1)
+        true_range = pd.concat([high - low, (high - prev).abs(), (low - prev).abs()], axis=1).max(axis=1)
+        self.atr = float(true_range.ewm(alpha=1 / ATR_WINDOW, adjust=False).mean().iloc[-1])
+
+        self.prev_close = float(close.iloc[-1])
+        # SMA20 只需要最近 20 个收盘价
+        self.recent_closes = deque(close.iloc[-20:].astype(float), maxlen=20)
+
+        self.session = None
+        self.price = self.prev_close
+        self.day_high = None
+        self.day_low = None
+        self.rsi = self._rsi(self.avg_gain, self.avg_loss)
+        self.live_atr = self.atr
+
+        self.pressure = None
+        self.pcr = None
+        self.news_text = ""
+        self.news_score = None
+        self.seen_headlines = set()
+
+    @staticmethod
+    def _rsi(avg_gain, avg_loss):
+        if avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+    @property
+    def stop_price(self):
+        # 与 AIBrain 的止损公式一致，锚定在昨收 (当天盘中不随价格漂移)
+        return self.prev_close - Config.ATR_MULTIPLIER * self.atr
+
+    @property
+    def sma20(self):
+        closes = list(self.recent_closes)[1:] + [self.price]
+        return sum(closes) / len(closes)
+
+    def roll_session(self, session):
+        """换日：把上一交易日的临时 K 线并入 Wilder 状态"""
+        if self.session is not None and self.day_high is not None:
+            change = self.price - self.prev_close
+            self.avg_gain = (self.avg_gain * (RSI_WINDOW - 1) + max(change, 0)) / RSI_WINDOW
+            self.avg_loss = (self.avg_loss * (RSI_WINDOW - 1) + max(-change, 0)) / RSI_WINDOW
+            self.atr = self.live_atr
+            self.prev_close = self.price
+            self.recent_closes.append(self.price)
+        self.session = session
+        self.day_high = None
+        self.day_low = None
+
+    def update(self, quote):
+        """用最新报价更新临时 K 线，返回更新前的 (price, rsi)，用于判断"穿越" """
+        if quote["session"] != self.session:
+            self.roll_session(quote["session"])
+
+        before = (self.price, self.rsi)
+        self.price = quote["price"]
+        self.day_high = max(self.day_high or quote["high"], quote["high"])
+        self.day_low = min(self.day_low or quote["low"], quote["low"])
+
+        change = self.price - self.prev_close
+        gain = (self.avg_gain * (RSI_WINDOW - 1) + max(change, 0)) / RSI_WINDOW
+        loss = (self.avg_loss * (RSI_WINDOW - 1) + max(-change, 0)) / RSI_WINDOW
+        self.rsi = self._rsi(gain, loss)
+
+        true_range = max(self.day_high - self.day_low,
+                         abs(self.day_high - self.prev_close),
+                         abs(self.day_low - self.prev_close))
+        self.live_atr = (self.atr * (ATR_WINDOW - 1) + true_range) / ATR_WINDOW
+        return before
+
+
+def detect_triggers(state, before_price, before_rsi):
+    """只在"穿越"的那一刻触发，持续停留在区间内不会反复报警"""
+    triggers = []
+    if state.rsi > Config.RSI_OVERBOUGHT >= before_rsi:
+        triggers.append(("rsi", f"RSI 上穿超买线 {Config.RSI_OVERBOUGHT} (当前 {state.rsi:.1f})"))
+    if state.rsi < Config.RSI_OVERSOLD <= before_rsi:
+        triggers.append(("rsi", f"RSI 下穿超卖线 {Config.RSI_OVERSOLD} (当前 {state.rsi:.1f})"))
+    stop = state.stop_price
+    if state.price < stop <= before_price:
+        triggers.append(("atr_stop", f"跌破 ATR 止损位 ${stop:.2f} (现价 ${state.price:.2f})"))
+    if state.pressure and state.price > state.pressure >= before_price:
+        triggers.append(("pressure", f"突破期权压力位 ${state.pressure} (现价 ${state.price:.2f})"))
+    return triggers
+
+
+class IntradayMonitor:
+    """
+    常驻的盘中监控：
+    - 按固定间隔一次请求拉取全部标的的批量报价，在内存里增量更新指标
+    - 只有触发条件命中时 (RSI 穿越阈值 / 跌破 ATR 止损 / 突破期权压力位 / 新闻爆发) 才调用 AI 和推送
+    formatter(ticker, insight) 负责包装单条消息，deliver([(ticker, msg), ...]) 负责推送
+    """
+
+    def __init__(self, engine, brain, formatter, deliver, symbols=None, interval=None):
+        self.engine = engine
+        self.brain = brain
+        self.formatter = formatter
+        self.deliver = deliver
+        self.symbols = list(symbols or Config.WATCHLIST)
+        self.interval = interval or Config.MONITOR_INTERVAL
+        self.states = {}
+        self.last_fired = {}
+        self.pending = deque()
+        self.polls = 0
+        self.macro = {"spy_change": 0.0, "qqq_change": 0.0}
+        self.fundamentals = {}
+
+    def _seed(self, symbol, session, full=True):
+        hist_df = self.engine._fetch_history_direct(symbol)
+        if hist_df is None or hist_df.empty:
+            return None
+        # 日线里可能已经带着今天的未完成 K 线，种子只用之前的交易日
+        hist_df = hist_df[hist_df.index.date < date.fromisoformat(session)]
+        if len(hist_df) < RSI_WINDOW + 1:
+            return None
+        state = SymbolState(symbol, hist_df)
+        state.session = session
+        if full:
+            self._refresh_options(state)
+            self._refresh_news(state, seed=True)
+        return state
+
+    def _refresh_options(self, state):
+        opts = self.engine._get_options_direct(state.symbol)
+        state.pressure = opts["pressure"] if isinstance(opts.get("pressure"), (int, float)) else None
+        state.pcr = opts.get("pcr")
+
+    def _refresh_news(self, state, seed=False):
+        """返回新出现的标题数；首次刷新只记录，不算爆发"""
+        digest = self.engine._get_news(state.symbol)
+        state.news_text, state.news_score = digest["text"], digest["score"]
+        # 用源里的全部标题比对：news_text 只是按相关度 / 时效 / 情绪挑出的几条，不能代表"新出现了几条"
+        titles = set(digest.get("titles") or ())
+        fresh = titles - state.seen_headlines
+        state.seen_headlines |= titles
+        return 0 if seed else len(fresh)
+
+    def _update_macro(self, quotes):
+        for index, key in (("SPY", "spy_change"), ("QQQ", "qqq_change")):
+            state = self.states.get(index)
+            quote = quotes.get(index)
+            if state and quote:
+                self.macro[key] = round((quote["price"] - state.prev_close) / state.prev_close * 100, 2)
+
+    def _fire(self, symbol, kind, reason):
+        key = (symbol, kind)
+        now = time.time()
+        if now - self.last_fired.get(key, float("-inf")) < Config.MONITOR_COOLDOWN:
+            return
+        self.last_fired[key] = now
+        print(f"⚡ [触发] {symbol}: {reason}")
+        self.pending.append((symbol, reason))
+
+    def _build_context(self, state, reason):
+        symbol = state.symbol
+        if symbol not in self.fundamentals:
+            self.fundamentals[symbol] = self.engine._get_fundamental_direct(symbol)
+        change = (state.price - state.prev_close) / state.prev_close * 100
+        return SymbolContext(
+            symbol,
+            price=round(state.price, 2),
+            change_pct=round(change, 2),
+            quote_source="YFinance",
+            rsi=round(state.rsi, 2),
+            atr=round(state.live_atr, 2),
+            sma20=round(state.sma20, 2),
+            pcr=state.pcr,
+            pressure=state.pressure,
+            target_price=self.fundamentals[symbol],
+            spy_change=self.macro["spy_change"],
+            qqq_change=self.macro["qqq_change"],
+            news=state.news_text,
+            news_score=state.news_score,
+            trigger=reason,
+        )
+
+    def poll_once(self):
+        self.polls += 1
+        tracked = self.symbols + [s for s in ("SPY", "QQQ") if s not in self.symbols]
+        quotes = self.engine.get_batch_quotes(tracked)
+        if not quotes:
+            print("⚠️ 本轮没有拿到报价。")
+            return
+
+        for symbol in tracked:
+            quote = quotes.get(symbol)
+            if not quote:
+                continue
+            state = self.states.get(symbol)
+            if state is None:
+                state = self._seed(symbol, quote["session"], full=symbol in self.symbols)
+                if state is None:
+                    continue
+                self.states[symbol] = state
+
+            before_price, before_rsi = state.update(quote)
+            if symbol not in self.symbols:
+                continue  # SPY / QQQ 只用来算大盘涨跌
+
+            for kind, reason in detect_triggers(state, before_price, before_rsi):
+                self._fire(symbol, kind, reason)
+
+            if self.polls % Config.MONITOR_OPTIONS_EVERY == 0:
+                self._refresh_options(state)
+            if self.polls % Config.MONITOR_NEWS_EVERY == 0:
+                fresh = self._refresh_news(state)
+                if fresh >= Config.MONITOR_NEWS_BURST:
+                    self._fire(symbol, "news", f"新闻爆发: 新增 {fresh} 条标题")
+
+        self._update_macro(quotes)
+        self._analyze_pending()
+
+    def _analyze_pending(self):
+        messages = []
+        for _ in range(min(Config.MONITOR_MAX_ALERTS, len(self.pending))):
+            symbol, reason = self.pending.popleft()
+            try:
+                insight = self.brain.analyze(self._build_context(self.states[symbol], reason), mode="monitor")
+                messages.append((symbol, self.formatter(symbol, f"**⚡ 触发原因**: {reason}\n\n{insight}")))
+            except Exception as e:
+                print(f"💥 {symbol} 盘中分析失败: {e}")
+        if messages:
+            self.deliver(messages)
+
+    def run(self, iterations=None):
+        print(f"👀 盘中监控启动: {len(self.symbols)} 个标的, 每 {self.interval} 秒轮询一次")
+        while iterations is None or self.polls < iterations:
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"💥 本轮轮询异常: {e}")
+            if iterations is None or self.polls < iterations:
+                cassette.sleep(self.interval)
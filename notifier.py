@@ -2,6 +2,9 @@
 import requests
 import json
 from config import Config
+from cassette import cassette
+from deadline import DeadlineExceeded, ensure
+from circuit_breaker import breakers
 
 
 class WeChatNotifier:
@@ -47,14 +50,22 @@ class WeChatNotifier:
 
         return text
 
-    def send(self, content, msg_type="text"):
+    def send(self, content, msg_type="text", deadline=None):
         """
         统一发送入口
         msg_type: "markdown" (漂亮，但仅企微可见) / "text" (丑点，但微信可见)
+        deadline: 运行时间预算，请求超时取 Config.WEBHOOK_TIMEOUT 与剩余预算的较小值
+        返回是否推送成功 (未配置 Webhook 时视为失败)
         """
-        if not self.webhook_url:
+        if not self.webhook_url and not cassette.replaying:
             print("⚠️ 未配置 Webhook，跳过推送。")
-            return
+            return False
+
+        try:
+            timeout = ensure(deadline).timeout(Config.WEBHOOK_TIMEOUT)
+        except DeadlineExceeded as e:
+            print(f"⏱️ 跳过推送: {e}")
+            return False
 
         headers = {"Content-Type": "application/json"}
         data = {}
@@ -78,9 +89,20 @@ class WeChatNotifier:
             }
 
         try:
-            response = requests.post(self.webhook_url, headers=headers, data=json.dumps(data))
+            # 推送内容带时间戳，回放时按发送顺序匹配
+            status_code, text = breakers["webhook"].call(
+                lambda: cassette.call("webhook", cassette.next_key("webhook"),
+                                      lambda: self._post(headers, data, timeout)),
+                failed=lambda r: r[0] != 200)
             # 简单的错误处理
-            if response.status_code != 200:
-                print(f"❌ 推送失败: {response.text}")
+            if status_code != 200:
+                print(f"❌ 推送失败: {text}")
+                return False
+            return True
         except Exception as e:
-            print(f"❌ 网络错误: {e}")
\ No newline at end of file
+            print(f"❌ 网络错误: {e}")
+            return False
+
+    def _post(self, headers, data, timeout=None):
+        response = requests.post(self.webhook_url, headers=headers, data=json.dumps(data), timeout=timeout)
+        return response.status_code, response.text
\ No newline at end of file
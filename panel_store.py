@@ -0,0 +1,205 @@
+# panel_store.py
+"""
+整个股票池的日线面板文件 (日期 × 字段 × 标的)，供多进程 / 多次运行共享
+
+文件布局:
+  [0, 8)        魔数 b"SNTLPNL1"
+  [8, 16)       头部长度 (uint64，4096 的整数倍)
+  [16, 头部长度) JSON 头部: dtype / fields / symbols / rows，空格补齐
+  之后          rows 条定长记录，每条 = int64 日期 (纳秒) + fields × symbols 个数值 (缺失为 NaN)
+
+读者用 np.memmap 直接映射，不解析、不复制；同一台机器上的多个进程共用操作系统的页缓存。
+新的交易日按记录追加到文件末尾，只改写头部的 rows；标的 / 字段变化或历史被复权修订时整体重写
+(先写临时文件再原子替换，已经打开的读者继续读旧文件)。同一时间只应有一个写者。
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+MAGIC = b"SNTLPNL1"
+PREFIX = 16
+ALIGN = 4096
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def _record_dtype(dtype, n_fields, n_symbols):
+    return np.dtype([("date", "<i8"), ("values", np.dtype(dtype), (n_fields, n_symbols))])
+
+
+def _date_ints(dates):
+    return np.asarray(dates).astype("datetime64[ns]").astype("<i8")
+
+
+def frames_to_values(frames, fields=FIELDS):
+    """{symbol: DataFrame} -> (日期并集, (日期, 字段, 标的) 数组)，某标的当天没有数据为 NaN"""
+    symbols = list(frames)
+    columns = {f: pd.DataFrame({s: frames[s][f] for s in symbols if f in frames[s]}) for f in fields}
+    index = pd.DatetimeIndex(sorted(set().union(*(df.index for df in frames.values()))))
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    values = np.full((len(index), len(fields), len(symbols)), np.nan)
+    for i, f in enumerate(fields):
+        df = columns[f]
+        if df.index.tz is not None:
+            df.index = df.index.tz_localize(None)
+        values[:, i, :] = df.reindex(index=index, columns=symbols).to_numpy(dtype=np.float64)
+    return index, values
+
+
+class Panel:
+    """打开后的只读面板；values 是 (日期, 字段, 标的) 的 memmap 视图，切片都不复制数据"""
+
+    def __init__(self, path, header, records):
+        self.path = path
+        self.fields = list(header["fields"])
+        self.symbols = list(header["symbols"])
+        self.position = {s: i for i, s in enumerate(self.symbols)}
+        self.records = records
+        self.values = records["values"]
+        self.dates = pd.to_datetime(np.asarray(records["date"]), unit="ns")
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def last_date(self):
+        return self.dates[-1] if len(self.dates) else None
+
+    def field(self, name):
+        """某个字段的 (日期 × 标的) 矩阵视图"""
+        return self.values[:, self.fields.index(name), :]
+
+    def frame(self, name):
+        return pd.DataFrame(self.field(name), index=self.dates, columns=self.symbols, copy=False)
+
+    def bars(self, symbol):
+        """单个标的的 OHLCV DataFrame (与 BarCache 存的形状一致)，没有数据的日子去掉"""
+        j = self.position[symbol]
+        df = pd.DataFrame(self.values[:, :, j], index=self.dates, columns=self.fields)
+        return df.dropna(subset=["close"]) if "close" in df else df
+
+
+class PanelStore:
+    def __init__(self, cache_dir=None, path=None, dtype=None):
+        self.path = path or os.path.join(cache_dir or Config.CACHE_DIR, "panel", "ohlcv.bin")
+        self.dtype = np.dtype(dtype or Config.PANEL_DTYPE)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+    # ---------------- 读 ----------------
+    def read_header(self):
+        """返回 (头部长度, 头部字典)，文件不存在或格式不对返回 (None, None)"""
+        if not os.path.exists(self.path):
+            return None, None
+        with open(self.path, "rb") as f:
+            prefix = f.read(PREFIX)
+            if len(prefix) < PREFIX or prefix[:8] != MAGIC:
+                return None, None
+            size = int(np.frombuffer(prefix[8:], dtype="<u8")[0])
+            return size, json.loads(f.read(size - PREFIX).decode("utf-8"))
+
+    def open(self):
+        """memmap 打开整个面板 (只读)；没有文件时返回 None"""
+        size, header = self.read_header()
+        if header is None:
+            return None
+        dtype = _record_dtype(header["dtype"], len(header["fields"]), len(header["symbols"]))
+        if header["rows"]:
+            records = np.memmap(self.path, dtype=dtype, mode="r", offset=size, shape=(header["rows"],))
+        else:
+            records = np.zeros(0, dtype=dtype)
+        return Panel(self.path, header, records)
+
+    # ---------------- 写 ----------------
+    @staticmethod
+    def _encode_header(header, size=None):
+        text = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        if size is None:
+            # 多留一点空间，rows 位数变多时追加不必重写整个文件
+            size = -(-(PREFIX + len(text) + 64) // ALIGN) * ALIGN
+        if PREFIX + len(text) > size:
+            return None
+        return MAGIC + np.uint64(size).astype("<u8").tobytes() + text.ljust(size - PREFIX)
+
+    def _records(self, dates, values):
+        records = np.empty(len(dates), dtype=_record_dtype(self.dtype, values.shape[1], values.shape[2]))
+        records["date"] = _date_ints(dates)
+        records["values"] = values
+        return records
+
+    def write(self, dates, values, symbols, fields=FIELDS):
+        """整体重写 (临时文件 + 原子替换)"""
+        values = np.asarray(values)
+        header = {"version": 1, "dtype": self.dtype.str, "fields": list(fields),
+                  "symbols": list(symbols), "rows": len(dates)}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self._encode_header(header))
+            self._records(dates, values).tofile(f)
+        os.replace(tmp, self.path)
+
+    def append(self, dates, values):
+        """在末尾追加新的交易日 (日期必须晚于已有的最后一天)；头部放不下时返回 False"""
+        size, header = self.read_header()
+        if header is None:
+            raise FileNotFoundError(self.path)
+        panel = self.open()
+        if panel.last_date is not None and len(dates) and pd.Timestamp(dates[0]) <= panel.last_date:
+            raise ValueError(f"追加的日期 {dates[0]} 不晚于面板最后一天 {panel.last_date}")
+        header["rows"] += len(dates)
+        encoded = self._encode_header(header, size)
+        if encoded is None:
+            return False
+        with open(self.path, "r+b") as f:
+            # 先写数据再改 rows，追加过程中打开的读者只会看到旧的行数
+            f.seek(0, os.SEEK_END)
+            self._records(dates, np.asarray(values)).tofile(f)
+            f.flush()
+            f.seek(0)
+            f.write(encoded)
+        return True
+
+    def update(self, frames, fields=FIELDS):
+        """
+        用 {symbol: DataFrame} 更新面板:
+          标的 / 字段一致、重叠区间的数值没变 -> 只追加新的交易日
+          否则 (新标的、复权修订等) -> 整体重写
+        """
+        if not frames:
+            return None
+        symbols = list(frames)
+        dates, values = frames_to_values(frames, fields)
+        panel = self.open()
+        if panel is not None and panel.symbols == symbols and panel.fields == list(fields) and len(panel):
+            overlap = dates <= panel.last_date
+            rows = panel.dates.get_indexer(dates[overlap])
+            unchanged = (rows >= 0).all() and np.allclose(
+                np.asarray(panel.values[rows]), values[overlap].astype(self.dtype), equal_nan=True)
+            if unchanged and (overlap.all() or self.append(dates[~overlap], values[~overlap])):
+                return self.open()
+        self.write(dates, values, symbols, fields)
+        return self.open()
+
+    def sync(self, cache, symbols, fields=FIELDS):
+        """
+        从 BarCache 同步: 面板比所有 pickle 都新且标的一致时直接打开，否则读 pickle 重建
+        多次运行 / 多个进程只需解析一次 pickle
+        """
+        symbols = [s for s in symbols if os.path.exists(cache._path(s))]
+        _, header = self.read_header()
+        if header is not None and header["symbols"] == symbols and header["fields"] == list(fields):
+            built = os.path.getmtime(self.path)
+            if all(os.path.getmtime(cache._path(s)) <= built for s in symbols):
+                return self.open()
+        frames = {}
+        for symbol in symbols:
+            df = cache.load(symbol)
+            if df is not None and not df.empty:
+                frames[symbol] = df
+        if not frames:
+            return None
+        self.write(*frames_to_values(frames, fields), list(frames), fields)
+        return self.open()
@@ -0,0 +1,244 @@
+# pipeline.py
+"""
+分块流水线：大股票池按 Config.PIPELINE_CHUNK 个标的一块，逐块 抓取 → 分析 → 落盘 / 推送 → 释放
+
+    抓取线程 --(有界队列)--> 分析线程 --(有界队列)--> 落盘 (调用 run() 的线程)
+
+- 阶段之间的队列最多放 Config.PIPELINE_QUEUE 个标的，下游慢 (AI 限流) 时上游自动阻塞 (背压)，
+  任何时刻常驻内存的只有在途的这几个标的，与股票池大小无关
+- 常驻内存上限 Config.PIPELINE_MEMORY_MB：超过时抓取阶段暂停，等下游把在途的标的消化掉再继续
+- 每块结束时回调 on_chunk (刷盘) 并 gc；运行结束报告 RSS 峰值 (resource) 和 tracemalloc 峰值
+"""
+import gc
+import queue
+import sys
+import threading
+import time
+
+from config import Config
+
+CHUNK_END = object()
+DONE = object()
+
+
+def _rss_mb():
+    """当前常驻内存 (MB)；读不到 (非 Linux) 返回 None"""
+    try:
+        import os
+
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss_mb():
+    """进程生命周期内的 RSS 峰值 (MB)；没有 resource 模块 (Windows) 返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位是 KB，macOS 是字节
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+class MemoryGuard:
+    """
+    常驻内存检查：开启 tracemalloc 时按 Python 分配的内存算 (精确但有额外开销)，否则按进程 RSS 算
+    limit_mb 为 0 / None 表示不限
+    """
+
+    def __init__(self, limit_mb=None, trace=None):
+        self.limit_mb = Config.PIPELINE_MEMORY_MB if limit_mb is None else limit_mb
+        self.trace = Config.PIPELINE_TRACEMALLOC if trace is None else trace
+        self._started_trace = False
+
+    def start(self):
+        import tracemalloc
+
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_trace = True
+        return self
+
+    def current_mb(self):
+        import tracemalloc
+
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[0] / 2 ** 20
+        return _rss_mb()
+
+    def over(self):
+        if not self.limit_mb:
+            return False
+        current = self.current_mb()
+        return current is not None and current > self.limit_mb
+
+    def report(self):
+        """{limit_mb, current_mb, peak_rss_mb, peak_traced_mb}，拿不到的为 None"""
+        import tracemalloc
+
+        peak_traced = tracemalloc.get_traced_memory()[1] / 2 ** 20 if tracemalloc.is_tracing() else None
+        return {"limit_mb": self.limit_mb or None, "current_mb": _round(self.current_mb()),
+                "peak_rss_mb": _round(_peak_rss_mb()), "peak_traced_mb": _round(peak_traced)}
+
+    def stop(self):
+        import tracemalloc
+
+        report = self.report()
+        if self._started_trace:
+            tracemalloc.stop()
+            self._started_trace = False
+        return report
+
+
+class ChunkedPipeline:
+    """
+    fetch(symbol)        -> item，返回 None 表示跳过 (抓取线程里按顺序调用)
+    analyze(symbol, item) -> result (分析线程)
+    persist(symbol, item, result)   (调用 run() 的线程)
+    on_chunk(index)      每块全部落盘后调用 (刷缓冲、释放)
+    should_stop()        为真时不再抓取新的标的 (比如时间预算用尽)
+    任何一步抛出的异常只影响当前标的
+    """
+
+    def __init__(self, fetch, analyze, persist, on_chunk=None, should_stop=None,
+                 chunk_size=None, queue_size=None, guard=None):
+        self.fetch = fetch
+        self.analyze = analyze
+        self.persist = persist
+        self.on_chunk = on_chunk or (lambda index: None)
+        self.should_stop = should_stop or (lambda: False)
+        self.chunk_size = chunk_size or Config.PIPELINE_CHUNK
+        self.queue_size = queue_size or Config.PIPELINE_QUEUE
+        self.guard = guard or MemoryGuard()
+
+        self._lock = threading.Condition()
+        self.in_flight = 0
+        self._warned = False
+        self.stats = {"processed": 0, "failed": 0, "skipped": [], "chunks": 0,
+                      "max_in_flight": 0, "memory_waits": 0}
+
+    def _admit(self):
+        """抓取下一个标的前调用：超出内存上限时等下游消化完在途的标的"""
+        waited = False
+        with self._lock:
+            while self.in_flight and self.guard.over():
+                if not waited:
+                    self.stats["memory_waits"] += 1
+                    waited = True
+                self._lock.wait(timeout=1.0)
+            if not self.in_flight and self.guard.over():
+                gc.collect()
+                if self.guard.over() and not self._warned:
+                    print(f"🧠 [流水线] 在途为空仍超出内存上限 {self.guard.limit_mb} MB，继续逐个处理")
+                    self._warned = True
+            self.in_flight += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.in_flight)
+
+    def _fail(self):
+        with self._lock:
+            self.stats["failed"] += 1
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._lock.notify_all()
+
+    def _fetch_stage(self, symbols, out):
+        try:
+            for start in range(0, len(symbols), self.chunk_size):
+                for position in range(start, min(start + self.chunk_size, len(symbols))):
+                    symbol = symbols[position]
+                    if self.should_stop():
+                        self.stats["skipped"] = list(symbols[position:])
+                        out.put(CHUNK_END)
+                        return
+                    self._admit()
+                    try:
+                        item = self.fetch(symbol)
+                    except Exception as e:
+                        print(f"💥 抓取 {symbol} 时发生意外错误: {e}")
+                        item = None
+                    if item is None:
+                        self._release()
+                        continue
+                    out.put((symbol, item))
+                out.put(CHUNK_END)
+        finally:
+            out.put(DONE)
+
+    def _analyze_stage(self, source, out):
+        while True:
+            task = source.get()
+            if task is CHUNK_END or task is DONE:
+                out.put(task)
+                if task is DONE:
+                    return
+                continue
+            symbol, item = task
+            try:
+                result = self.analyze(symbol, item)
+            except Exception as e:
+                print(f"💥 分析 {symbol} 时发生意外错误: {e}")
+                self._fail()
+                self._release()
+                continue
+            out.put((symbol, item, result))
+
+    def run(self, symbols):
+        """按顺序处理 symbols，返回统计 (含内存报告)"""
+        symbols = list(symbols)
+        self.guard.start()
+        fetched = queue.Queue(maxsize=self.queue_size)
+        analyzed = queue.Queue(maxsize=self.queue_size)
+        workers = [
+            threading.Thread(target=self._fetch_stage, args=(symbols, fetched), name="pipeline-fetch", daemon=True),
+            threading.Thread(target=self._analyze_stage, args=(fetched, analyzed), name="pipeline-analyze",
+                             daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+
+        start = time.perf_counter()
+        while True:
+            task = analyzed.get()
+            if task is DONE:
+                break
+            if task is CHUNK_END:
+                self.on_chunk(self.stats["chunks"])
+                self.stats["chunks"] += 1
+                gc.collect()
+                continue
+            symbol, item, result = task
+            try:
+                self.persist(symbol, item, result)
+                self.stats["processed"] += 1
+            except Exception as e:
+                print(f"💥 处理 {symbol} 时发生意外错误: {e}")
+                self._fail()
+            finally:
+                # 在这里丢掉对上下文 / 结果的引用，整块结束时一起回收
+                del task, item, result
+                self._release()
+
+        for worker in workers:
+            worker.join()
+        self.stats["elapsed"] = time.perf_counter() - start
+        self.stats["memory"] = self.guard.stop()
+        return self.stats
+
+
+def format_memory(report):
+    parts = [f"{label} {report[key]:.1f} MB" for key, label in
+             (("peak_rss_mb", "RSS 峰值"), ("peak_traced_mb", "tracemalloc 峰值"), ("current_mb", "当前"))
+             if report.get(key) is not None]
+    if report.get("limit_mb"):
+        parts.append(f"上限 {report['limit_mb']:.0f} MB")
+    return " | ".join(parts) or "无法读取内存统计"
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
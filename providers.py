@@ -0,0 +1,343 @@
+# providers.py
+"""
+历史 K 线 / 批量报价的多数据源层
+  - yfinance: 直连 yf.download
+  - fmp / tiingo: OpenBB obb.equity.price.historical (配置了对应 Key 才启用)
+  - cache: 本地日线缓存 (BarCache)，数据可能过期，只在所有在线数据源都失败时兜底
+
+每个在线数据源记录最近 Config.PROVIDER_WINDOW 次请求的延迟和成败：
+请求先发给健康 (错误率不超过 Config.PROVIDER_MAX_ERROR_RATE) 的数据源里平均延迟最低的，
+失败 (抛异常 / 空数据 / 熔断) 自动换下一个，不健康的排在最后仍可作为备选。
+各数据源返回的表统一经 normalize_bars 整理成 open/high/low/close/volume + 升序日期索引。
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from circuit_breaker import breakers, CircuitOpen
+
+COLUMNS = ["open", "high", "low", "close", "volume"]
+EXCHANGE_TZ = "America/New_York"
+
+
+def normalize_bars(df, daily=True):
+    """
+    各数据源的 K 线表 -> 小写 open/high/low/close/volume 列、升序去重的 DatetimeIndex
+    - yfinance 新版单标的也是 MultiIndex 列，只取第一层
+    - OpenBB 的日期可能在 date 列里
+    - daily=True 时去掉时区 (日线按交易所日期)，分钟线保留并转成美东时间
+    缺的列补 NaN，收盘价为空的行丢掉；整理后为空返回 None
+    """
+    if df is None or len(df) == 0:
+        return None
+    df = df.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    df.columns = [str(c).lower().replace(" ", "_") for c in df.columns]
+    if "date" in df.columns:
+        df = df.set_index("date")
+    df.index = pd.to_datetime(df.index)
+    if df.index.tz is not None:
+        df.index = df.index.tz_convert(EXCHANGE_TZ)
+        if daily:
+            df.index = df.index.tz_localize(None)
+    df.index.name = None
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    df = df.reindex(columns=COLUMNS).astype(float).dropna(subset=["close"])
+    return None if df.empty else df
+
+
+def summarize_intraday(df):
+    """当天分钟线 -> {"price", "high", "low", "session"}；没有数据返回 None"""
+    df = normalize_bars(df, daily=False)
+    if df is None:
+        return None
+    return {
+        "price": round(float(df["close"].iloc[-1]), 2),
+        "high": round(float(df["high"].max()), 2),
+        "low": round(float(df["low"].min()), 2),
+        "session": df.index[-1].date().isoformat(),
+    }
+
+
+class ProviderStats:
+    """单个数据源最近 window 次请求的延迟 / 成败，线程安全"""
+
+    def __init__(self, window=None):
+        self._lock = threading.Lock()
+        self.samples = deque(maxlen=window or Config.PROVIDER_WINDOW)
+        self.calls = 0
+        self.failures = 0
+
+    def record(self, latency, ok):
+        with self._lock:
+            self.samples.append((latency, ok))
+            self.calls += 1
+            self.failures += not ok
+
+    @property
+    def latency(self):
+        """窗口内成功请求的平均耗时 (秒)，还没有成功过返回 None"""
+        with self._lock:
+            ok = [latency for latency, success in self.samples if success]
+        return sum(ok) / len(ok) if ok else None
+
+    @property
+    def error_rate(self):
+        with self._lock:
+            if not self.samples:
+                return 0.0
+            return sum(not success for _, success in self.samples) / len(self.samples)
+
+    def healthy(self):
+        # 样本太少时不下结论
+        with self._lock:
+            enough = len(self.samples) >= Config.PROVIDER_MIN_SAMPLES
+        return not enough or self.error_rate <= Config.PROVIDER_MAX_ERROR_RATE
+
+    def snapshot(self):
+        latency = self.latency
+        return {"calls": self.calls, "failures": self.failures, "error_rate": round(self.error_rate, 3),
+                "latency_ms": None if latency is None else round(latency * 1000), "healthy": self.healthy()}
+
+
+class Provider:
+    """
+    数据源基类。history / quotes 返回原始结果，由 ProviderRouter 统一整理和计时；
+    supports_quotes 为 False 的数据源不参与报价路由
+    """
+
+    name = None
+    label = None  # 写进报价 source 字段的名字
+    breaker = None  # circuit_breaker.breakers 里的名字，None 表示不经过熔断器
+    supports_quotes = False
+
+    def available(self):
+        return True
+
+    def history(self, symbol, days):
+        raise NotImplementedError
+
+    def quotes(self, symbols):
+        raise NotImplementedError
+
+
+class YFinanceProvider(Provider):
+    name = "yfinance"
+    label = "YFinance"
+    breaker = "chart"
+    supports_quotes = True
+
+    def __init__(self, proxy=None):
+        self.proxy = proxy
+
+    def history(self, symbol, days):
+        # 放在函数里导入：测试和只用缓存的场景不需要 yfinance
+        import yfinance as yf
+
+        return yf.download(symbol, start=_start_date(days), progress=False, proxy=self.proxy, timeout=30)
+
+    def quotes(self, symbols):
+        import yfinance as yf
+
+        df = yf.download(symbols, period="1d", interval="1m", group_by="ticker",
+                         progress=False, proxy=self.proxy, timeout=30)
+        result = {}
+        for symbol in symbols:
+            if isinstance(df.columns, pd.MultiIndex):
+                if symbol not in df.columns.get_level_values(0):
+                    continue
+                sub = df[symbol]
+            else:
+                sub = df
+            quote = summarize_intraday(sub)
+            if quote:
+                result[symbol] = quote
+        return result
+
+
+class OpenBBProvider(Provider):
+    """obb.equity.price.historical / quote，provider 为 fmp 或 tiingo (需要对应的 API Key)"""
+
+    def __init__(self, name, key, label=None, supports_quotes=False):
+        self.name = name
+        self.breaker = name
+        self.key = key
+        self.label = label or name.upper()
+        self.supports_quotes = supports_quotes
+
+    def available(self):
+        return bool(self.key)
+
+    def history(self, symbol, days):
+        from openbb import obb
+
+        return obb.equity.price.historical(symbol, start_date=_start_date(days), provider=self.name).to_df()
+
+    def quotes(self, symbols):
+        from openbb import obb
+
+        df = obb.equity.price.quote(",".join(symbols), provider=self.name).to_df()
+        result = {}
+        for _, row in df.iterrows():
+            price = _first(row, ("last_price", "price", "close"))
+            if row.get("symbol") not in symbols or np.isnan(price):
+                continue
+            stamp = _first_stamp(row, ("last_timestamp", "timestamp", "date"))
+            result[row["symbol"]] = {
+                "price": round(price, 2),
+                "high": round(_first(row, ("high", "day_high"), price), 2),
+                "low": round(_first(row, ("low", "day_low"), price), 2),
+                "session": stamp.date().isoformat(),
+            }
+        return result
+
+
+class CacheProvider(Provider):
+    """本地日线缓存：不联网，数据停在上次保存的那天，所以永远排在在线数据源之后"""
+
+    name = "cache"
+
+    def __init__(self, bar_cache, enabled=None):
+        self.bar_cache = bar_cache
+        self.enabled = enabled or (lambda: True)
+
+    def available(self):
+        return self.enabled()
+
+    def history(self, symbol, days):
+        df = self.bar_cache.load(symbol)
+        if df is not None and not df.empty:
+            df = df[df.index >= pd.Timestamp(_start_date(days))]
+        return df
+
+
+class ProviderRouter:
+    """按健康度和延迟给数据源排序，依次尝试直到拿到数据"""
+
+    def __init__(self, providers, fallback=None):
+        self.providers = list(providers)
+        self.fallback = fallback
+        self.stats = {p.name: ProviderStats() for p in self.providers}
+
+    def ranked(self, quotes=False):
+        """
+        健康的在前，按平均延迟从低到高；还没有成功记录的视为 0 (先试一次才知道快慢)
+        同等条件下保持配置顺序
+        """
+        candidates = [p for p in self.providers if p.available() and (p.supports_quotes or not quotes)]
+
+        def key(item):
+            i, provider = item
+            stats = self.stats[provider.name]
+            latency = stats.latency
+            return (not stats.healthy(), 0.0 if latency is None else latency, i)
+
+        return [p for _, p in sorted(enumerate(candidates), key=key)]
+
+    def _attempt(self, provider, fn, is_empty):
+        """计时调用一个数据源；异常 / 空结果计为失败并返回 None，熔断打开不计入统计"""
+        start = time.perf_counter()
+        try:
+            if provider.breaker:
+                result = breakers[provider.breaker].call(fn, failed=is_empty)
+            else:
+                result = fn()
+        except CircuitOpen as e:
+            print(f"    🔌 {e}，换下一个数据源")
+            return None
+        except Exception as e:
+            self.stats[provider.name].record(time.perf_counter() - start, False)
+            print(f"    ⚠️ {provider.name} 请求失败: {e}，换下一个数据源")
+            return None
+        ok = not is_empty(result)
+        self.stats[provider.name].record(time.perf_counter() - start, ok)
+        if not ok:
+            print(f"    ⚠️ {provider.name} 返回空数据，换下一个数据源")
+            return None
+        return result
+
+    def history(self, symbol, days=None):
+        """
+        日线 DataFrame (COLUMNS 五列)，df.attrs["source"] 记录来自哪个数据源；都失败返回 None
+        """
+        days = days or Config.PROVIDER_HISTORY_DAYS
+        for provider in self.ranked():
+            df = self._attempt(provider, lambda: normalize_bars(provider.history(symbol, days)), _empty)
+            if df is not None:
+                df.attrs["source"] = provider.label
+                return df
+
+        if self.fallback is not None and self.fallback.available():
+            df = normalize_bars(self.fallback.history(symbol, days))
+            if df is not None:
+                print(f"    ♻️ 在线数据源全部失败，使用本地缓存 (截至 {df.index[-1]:%Y-%m-%d})")
+                df.attrs["source"] = f"Cache {df.index[-1]:%Y-%m-%d}"
+                return df
+        return None
+
+    def quotes(self, symbols):
+        """
+        {symbol: {"price", "high", "low", "session"}}；第一个数据源缺的标的交给下一个补齐
+        """
+        result = {}
+        for provider in self.ranked(quotes=True):
+            missing = [s for s in symbols if s not in result]
+            if not missing:
+                break
+            got = self._attempt(provider, lambda: provider.quotes(missing), lambda r: not r)
+            result.update(got or {})
+        return result
+
+    def summary(self):
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+    def format_table(self):
+        lines = [f"{'行情源':<10}{'健康':>6}{'调用':>6}{'失败':>6}{'错误率':>8}{'延迟ms':>8}"]
+        for name, s in self.summary().items():
+            latency = "-" if s["latency_ms"] is None else s["latency_ms"]
+            lines.append(f"{name:<13}{'✅' if s['healthy'] else '❌':>6}{s['calls']:>8}{s['failures']:>8}"
+                         f"{s['error_rate']:>10.0%}{latency:>10}")
+        return "\n".join(lines)
+
+
+def default_providers(proxy=None):
+    """按 Config.PROVIDER_ORDER 构造在线数据源 (没有 Key 的 fmp / tiingo 构造了也不会被选中)"""
+    known = {
+        "yfinance": lambda: YFinanceProvider(proxy),
+        "fmp": lambda: OpenBBProvider("fmp", Config.FMP_KEY, supports_quotes=True),
+        "tiingo": lambda: OpenBBProvider("tiingo", Config.TIINGO_KEY, label="Tiingo"),
+    }
+    return [known[name]() for name in Config.PROVIDER_ORDER if name in known]
+
+
+def _empty(df):
+    return df is None or df.empty
+
+
+def _start_date(days):
+    return (datetime.now() - timedelta(days=days)).date().isoformat()
+
+
+def _first(row, names, default=np.nan):
+    """row 里第一个有值的字段 (不同数据源字段名不同)"""
+    for name in names:
+        value = row.get(name)
+        if value is not None and not pd.isna(value):
+            return float(value)
+    return default
+
+
+def _first_stamp(row, names):
+    """报价时间 -> 美东时间；没有时间字段时用当前时间"""
+    for name in names:
+        value = row.get(name)
+        if value is not None and not pd.isna(value):
+            stamp = pd.Timestamp(value)
+            return stamp.tz_convert(EXCHANGE_TZ) if stamp.tzinfo else stamp
+    return pd.Timestamp.now(tz=EXCHANGE_TZ)
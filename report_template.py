@@ -0,0 +1,218 @@
+# report_template.py
+"""
+规则模板报告：不调用 AI，直接用上下文字段生成与 AI 报告相同的四段式结构
+
+两个用途:
+  1. 快速通道 —— 信号平淡的标的 (涨跌小、RSI 在中性区、离压力位远、没有盘中触发) 不值得一次 LLM 调用
+  2. 降级 —— Gemini 限流 / 熔断 / 超时时，推送模板报告而不是一行错误提示
+纯字符串拼接，没有 I/O，每秒可以生成数千份。
+"""
+from config import Config
+from symbol_context import SymbolContext, fmt, is_missing
+
+TEMPLATE_TAG = "📐 [规则模板]"
+# 降级报告以此开头，is_failed_insight 据此判断 (续跑时仍会重试 AI)
+FALLBACK_TAG = "⚠️ [降级]"
+
+
+def pct_gap(value, base):
+    """(value - base) / base，百分比；任一缺失为 NaN"""
+    return (value - base) / base * 100
+
+
+def _signed(value, digits=2):
+    return "N/A" if is_missing(value) else f"{value:+.{digits}f}"
+
+
+def rsi_zone(rsi):
+    if is_missing(rsi):
+        return "RSI 缺失"
+    if rsi >= Config.RSI_OVERBOUGHT:
+        return "超买区，短线追高风险大"
+    if rsi <= Config.RSI_OVERSOLD:
+        return "超卖区，留意反弹"
+    return "中性区"
+
+
+def pcr_reading(pcr):
+    if is_missing(pcr):
+        return "无期权数据"
+    if pcr >= Config.PCR_BEARISH:
+        return "看跌期权偏多，主力在防守"
+    if pcr <= Config.PCR_BULLISH:
+        return "看涨期权偏多，情绪乐观"
+    return "多空均衡"
+
+
+def news_tone(score):
+    if is_missing(score):
+        return "规则模板不评估新闻性质；无明确催化剂时跟随大盘"
+    if score >= Config.QUIET_NEWS_SCORE:
+        return f"标题情绪偏多 ({score:+.2f})，留意利好兑现"
+    if score <= -Config.QUIET_NEWS_SCORE:
+        return f"标题情绪偏空 ({score:+.2f})，控制仓位"
+    return f"标题情绪中性 ({score:+.2f})，无明确催化剂时跟随大盘"
+
+
+def sma_position(ctx):
+    gap = pct_gap(ctx.price, ctx.sma20)
+    if is_missing(gap):
+        return "SMA20 缺失，无法判断"
+    side = "上方" if gap >= 0 else "下方"
+    return f"现价位于 SMA20 (${fmt(ctx.sma20)}) {side} {abs(gap):.2f}%"
+
+
+def market_tone(ctx):
+    moves = [m for m in (ctx.spy_change, ctx.qqq_change) if not is_missing(m)]
+    if not moves:
+        return "大盘数据缺失"
+    avg = sum(moves) / len(moves)
+    if avg >= 0.5:
+        return "大盘偏强，支持做多"
+    if avg <= -0.5:
+        return "大盘偏弱，控制仓位"
+    return "大盘窄幅震荡"
+
+
+def relative_strength(ctx):
+    if is_missing(ctx.change_pct) or is_missing(ctx.qqq_change):
+        return "无法对比"
+    diff = ctx.change_pct - ctx.qqq_change
+    if diff >= 1:
+        return f"跑赢 QQQ {diff:.2f}%"
+    if diff <= -1:
+        return f"跑输 QQQ {-diff:.2f}%"
+    return "与 QQQ 基本同步"
+
+
+def risk_rating(ctx):
+    """隔夜风险评级 (高 / 中 / 低) 和理由，按几条规则累计计分"""
+    reasons = []
+    gap = pct_gap(ctx.price, ctx.sma20)
+    if not is_missing(gap) and gap < 0:
+        reasons.append("跌破 SMA20")
+    if not is_missing(ctx.rsi) and (ctx.rsi >= Config.RSI_OVERBOUGHT or ctx.rsi <= Config.RSI_OVERSOLD):
+        reasons.append("RSI 处于极端区")
+    if not is_missing(ctx.pcr) and ctx.pcr >= Config.PCR_BEARISH:
+        reasons.append("PCR 偏高")
+    distance = pct_gap(ctx.pressure, ctx.price)
+    if not is_missing(distance) and 0 <= distance < Config.QUIET_PRESSURE_PCT:
+        reasons.append("贴近期权压力位")
+    if not is_missing(ctx.change_pct) and abs(ctx.change_pct) >= 2 * Config.QUIET_MOVE_PCT:
+        reasons.append("当日波动较大")
+    level = "高" if len(reasons) >= 3 else "中" if reasons else "低"
+    return level, "、".join(reasons) or "各项指标平稳"
+
+
+def stance(ctx):
+    gap = pct_gap(ctx.price, ctx.sma20)
+    if not is_missing(ctx.rsi) and ctx.rsi >= Config.RSI_OVERBOUGHT:
+        return "短线超买，不追高，持仓可分批止盈"
+    if not is_missing(ctx.rsi) and ctx.rsi <= Config.RSI_OVERSOLD:
+        return "超卖区域，等待企稳信号再轻仓试探"
+    if is_missing(gap):
+        return "关键数据缺失，观望为主"
+    if gap >= 0:
+        return "趋势向上，回踩不破 SMA20 可继续持有"
+    return "位于生命线下方，反抽 SMA20 不过则以观望为主"
+
+
+def is_low_signal(ctx):
+    """
+    信号平淡: 没有盘中触发、涨跌幅小、RSI 离超买 / 超卖线足够远、离期权压力位足够远、标题情绪不强烈
+    关键字段缺失时不算平淡 (交给 AI 判断)；没有情绪分不影响判断
+    """
+    if ctx.trigger:
+        return False
+    if not is_missing(ctx.news_score) and abs(ctx.news_score) >= Config.QUIET_NEWS_SCORE:
+        return False
+    margin = Config.QUIET_RSI_MARGIN
+    distance = pct_gap(ctx.pressure, ctx.price)
+    if is_missing(ctx.change_pct) or is_missing(ctx.rsi):
+        return False
+    return (abs(ctx.change_pct) < Config.QUIET_MOVE_PCT
+            and Config.RSI_OVERSOLD + margin <= ctx.rsi <= Config.RSI_OVERBOUGHT - margin
+            and (is_missing(distance) or abs(distance) >= Config.QUIET_PRESSURE_PCT))
+
+
+def _news(ctx):
+    if "news" in ctx.missing:
+        return "新闻获取超时 (数据缺失)"
+    return ctx.news or "暂无重大新闻"
+
+
+def render(ctx, mode="pre"):
+    """生成四段式报告 (mode: "pre" 盘前计划 / "monitor" 盘中异动 / 其他为盘后复盘)"""
+    if not isinstance(ctx, SymbolContext):
+        ctx = SymbolContext.from_dict(ctx)
+    news = _news(ctx).replace("\n", "\n     ")
+    stop = fmt(ctx.stop_loss(Config.ATR_MULTIPLIER))
+    pressure_gap = _signed(pct_gap(ctx.pressure, ctx.price))
+    target_gap = _signed(pct_gap(ctx.target_price, ctx.price))
+    quote = f"现价 ${ctx.show('price')} (涨跌幅 {ctx.show('change_pct')}%)"
+
+    if mode == "pre":
+        return f"""{TEMPLATE_TAG} {ctx.symbol} 盘前计划
+{quote}
+
+1. 📰 **消息面解读**：
+   - {news}
+   - {news_tone(ctx.news_score)}
+
+2. 🌍 **宏观与情绪**：
+   - SPY {ctx.show('spy_change')}% / QQQ {ctx.show('qqq_change')}%：{market_tone(ctx)}
+   - RSI {ctx.show('rsi')}：{rsi_zone(ctx.rsi)}；PCR {ctx.show('pcr')}：{pcr_reading(ctx.pcr)}
+
+3. 🎯 **关键博弈点**：
+   - 上方压力位 ${ctx.show('pressure')}，距现价 {pressure_gap}%
+   - 下方支撑：{sma_position(ctx)}
+
+4. 🚀 **操作策略**：
+   - {stance(ctx)}
+   - ATR 止损 < ${stop}；机构目标价 ${ctx.show('target_price')} (空间 {target_gap}%)"""
+
+    if mode == "monitor":
+        return f"""{TEMPLATE_TAG} {ctx.symbol} 盘中异动
+⚡ 触发: {ctx.trigger or '未注明触发原因'}
+{quote}
+
+1. ⚡ **触发解读**：
+   - 新闻：{news}
+   - {news_tone(ctx.news_score)}
+
+2. 🌍 **大盘配合**：
+   - 个股 {ctx.show('change_pct')}% vs QQQ {ctx.show('qqq_change')}% vs SPY {ctx.show('spy_change')}%，{relative_strength(ctx)}；{market_tone(ctx)}
+
+3. 🎯 **关键价位**：
+   - 止损位 ${stop}；压力位 ${ctx.show('pressure')} (距现价 {pressure_gap}%)
+   - {sma_position(ctx)}；RSI {ctx.show('rsi')}，{rsi_zone(ctx.rsi)}
+
+4. 🚀 **即时操作**：
+   - {stance(ctx)}"""
+
+    level, reasons = risk_rating(ctx)
+    return f"""{TEMPLATE_TAG} {ctx.symbol} 盘后复盘
+{quote}
+
+1. 🔍 **复盘归因**：
+   - 新闻：{news}
+   - 强弱对比：个股 {ctx.show('change_pct')}% vs QQQ {ctx.show('qqq_change')}% vs SPY {ctx.show('spy_change')}%，{relative_strength(ctx)}
+
+2. ⚖️ **趋势与形态**：
+   - 生命线：{sma_position(ctx)}
+   - 动能：RSI {ctx.show('rsi')}，{rsi_zone(ctx.rsi)}
+
+3. ⚠️ **持仓体检**：
+   - 期权筹码：PCR {ctx.show('pcr')} ({pcr_reading(ctx.pcr)})，压力位 ${ctx.show('pressure')} 距现价 {pressure_gap}%
+   - 估值参考：机构目标价 ${ctx.show('target_price')}，距现价 {target_gap}%
+   - 隔夜风险评级：{level} —— {reasons}
+
+4. 🔮 **明日剧本**：
+   - 防守价：${stop} (现价 - {Config.ATR_MULTIPLIER} × ATR)
+   - 阻力位：${ctx.show('pressure')}"""
+
+
+def render_fallback(ctx, mode, reason):
+    """AI 失败时的降级报告：注明原因，正文用模板"""
+    reason = reason.strip().lstrip("❌").strip() if reason else "无返回内容"
+    return f"{FALLBACK_TAG} AI 分析不可用 ({reason})，以下为规则模板报告\n\n{render(ctx, mode)}"
@@ -0,0 +1,94 @@
+# run_journal.py
+import json
+import os
+import threading
+from datetime import datetime
+
+import pytz
+
+from config import Config
+
+
+class RunJournal:
+    """
+    断点续跑日志 (只追加的 JSON Lines)
+    每一行以 (date, mode, symbol, stage) 为键，记录已完成的数据上下文、分析结果和推送状态。
+    stage 取值: context (数据已拿到) / insight (AI 已分析) / delivered (已推送)
+    流水线的抓取线程和落盘线程会同时写，追加操作加锁
+    """
+
+    RUN_START = "run_start"
+
+    def __init__(self, mode, resume=False, run_date=None, journal_dir=None, tag=None):
+        tz = pytz.timezone('Asia/Shanghai')
+        self.mode = mode
+        self.run_date = run_date or datetime.now(tz).strftime("%Y-%m-%d")
+        journal_dir = journal_dir or Config.JOURNAL_DIR
+        os.makedirs(journal_dir, exist_ok=True)
+        # tag 用来区分分片 / merge，多个进程各写各的文件，互不覆盖起点标记
+        suffix = f"_{tag}" if tag else ""
+        self.path = os.path.join(journal_dir, f"{self.run_date}_{mode}{suffix}.jsonl")
+
+        self._lock = threading.Lock()
+        self._repair_tail()
+        self.entries = {}
+        if resume:
+            self._load()
+        else:
+            # 全新运行：写一个起点标记，之后 --resume 只认这个标记之后的记录
+            self._append(None, self.RUN_START, None)
+
+    def _repair_tail(self):
+        """进程被杀时最后一行可能只写了一半，补一个换行，免得和新记录粘在一起"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 写了一半的残行直接忽略
+                    continue
+                if record["stage"] == self.RUN_START:
+                    self.entries = {}
+                else:
+                    self.entries[(record["symbol"], record["stage"])] = record.get("payload")
+
+    def _append(self, symbol, stage, payload):
+        record = {
+            "date": self.run_date,
+            "mode": self.mode,
+            "symbol": symbol,
+            "stage": stage,
+            "payload": payload,
+            "ts": datetime.now(pytz.utc).isoformat(timespec="seconds"),
+        }
+        # 单次 write + flush，尽量保证每条记录完整落盘
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+
+    def record(self, symbol, stage, payload=None):
+        self._append(symbol, stage, payload)
+        self.entries[(symbol, stage)] = payload
+
+    def get(self, symbol, stage):
+        return self.entries.get((symbol, stage))
+
+    def done(self, symbol, stage):
+        return (symbol, stage) in self.entries
+
+    def forget(self, symbol):
+        """标的处理完后释放内存里的上下文 / 分析结果 (文件里的记录不动)，done() 的结果不变"""
+        for stage in ("context", "insight"):
+            if (symbol, stage) in self.entries:
+                self.entries[(symbol, stage)] = None
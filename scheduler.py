@@ -0,0 +1,82 @@
+# scheduler.py
+"""
+优先级调度：在昂贵的阶段 (完整数据抓取 + AI) 之前先用廉价数据给每个标的打分，
+重要的标的先分析、先推送。运行被时间预算截断或被限流时，丢掉的是最不重要的那些。
+
+打分输入只有一次批量报价、已经下载好的日线收盘价面板和 RSS 新闻条数:
+  - gap:  最新报价相对前一交易日收盘的涨跌幅 (绝对值)
+  - stop: 现价向 ATR 止损线 (前收盘 - ATR_MULTIPLIER × ATR) 靠近的程度，跌破为满分
+  - rsi:  RSI 超出中性区的程度
+  - news: 最近 Config.SCHEDULER_NEWS_HOURS 小时的新闻条数
+每项归一化到 0-1，按 Config.SCHEDULER_WEIGHTS 加权求和。收盘价面板只有收盘价，
+ATR 用收盘价变动的 Wilder 均值近似 (排序够用，报告里的 ATR 仍来自完整 K 线)。
+"""
+import numpy as np
+import pandas as pd
+
+from config import Config
+from indicators import wilder
+
+COMPONENTS = ("gap", "stop", "rsi", "news")
+WINDOW = 14
+
+
+def priority_inputs(closes, quotes=None, news_counts=None):
+    """
+    closes: DataFrame (日期 × 标的) 日收盘价；quotes: DataEngine.get_batch_quotes 的结果；
+    news_counts: {symbol: 新闻条数}
+    返回 DataFrame (标的 × [price, prev_close, gap_pct, atr, rsi, news])，算不出来的为 NaN
+    """
+    closes = closes.sort_index()
+    quotes = quotes or {}
+    news_counts = news_counts or {}
+    change = closes.diff()
+    atr = wilder(change.abs(), WINDOW).iloc[-1]
+    avg_gain, avg_loss = wilder(change.clip(lower=0), WINDOW).iloc[-1], wilder((-change).clip(lower=0), WINDOW).iloc[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = (100 - 100 / (1 + avg_gain / avg_loss)).where(avg_loss != 0, 100.0)
+
+    dates = closes.index.date
+    rows = {}
+    for symbol in closes.columns:
+        series = closes[symbol]
+        quote = quotes.get(symbol)
+        if quote:
+            # 报价所在交易日之前的最后一个收盘价 (盘后报价和日线可能是同一天)
+            prior = series[dates < pd.Timestamp(quote["session"]).date()].dropna()
+            price = quote["price"]
+        else:
+            # 没有报价时用日线最后两天
+            prior = series.dropna().iloc[:-1]
+            price = series.dropna().iloc[-1] if series.notna().any() else np.nan
+        prev_close = prior.iloc[-1] if len(prior) else np.nan
+        rows[symbol] = {"price": price, "prev_close": prev_close,
+                        "gap_pct": (price - prev_close) / prev_close * 100,
+                        "atr": atr[symbol], "rsi": rsi[symbol], "news": news_counts.get(symbol, np.nan)}
+    return pd.DataFrame.from_dict(rows, orient="index", columns=["price", "prev_close", "gap_pct", "atr", "rsi", "news"])
+
+
+def score(inputs, weights=None):
+    """各项归一化到 0-1 后加权求和；缺失的项记 0 分。返回带各分项和 score 列的 DataFrame"""
+    weights = weights or Config.SCHEDULER_WEIGHTS
+    k = Config.ATR_MULTIPLIER
+    band = (Config.RSI_OVERBOUGHT - Config.RSI_OVERSOLD) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 现价离止损线还有几个 ATR: 平盘时正好是 k，下跌越多越接近 0
+        stop_distance = (inputs["price"] - (inputs["prev_close"] - k * inputs["atr"])) / inputs["atr"]
+        parts = pd.DataFrame({
+            "gap": (inputs["gap_pct"].abs() / Config.SCHEDULER_GAP_FULL).clip(0, 1),
+            "stop": ((k - stop_distance) / k).clip(0, 1),
+            # 偏离 50 超过半个中性区开始计分，到超买 / 超卖线时满分
+            "rsi": (((inputs["rsi"] - 50).abs() - band / 2) / (band / 2)).clip(0, 1),
+            "news": (inputs["news"] / Config.SCHEDULER_NEWS_FULL).clip(0, 1),
+        }, index=inputs.index).fillna(0.0)
+    parts["score"] = sum(weights.get(name, 0.0) * parts[name] for name in COMPONENTS)
+    return parts
+
+
+def prioritize(symbols, scores):
+    """按 score 从高到低排序；同分 (以及面板里没有的标的) 保持原来的股票池顺序"""
+    ranked = scores["score"].reindex(symbols).fillna(0.0).to_numpy()
+    order = sorted(range(len(symbols)), key=lambda i: -ranked[i])
+    return [symbols[i] for i in order]
@@ -0,0 +1,142 @@
+# sentiment.py
+"""
+新闻标题本地情绪打分 (纯 NumPy / pandas，不调用 AI)
+
+整个股票池抓到的所有标题放进一张表一次打分:
+  - sentiment: 金融词典加权求和 (前两个词里有否定词时反向)，再压缩到 -1 ~ 1
+  - relevance: 标题里直接出现代码的记 1，否则记 Config.NEWS_OFFTOPIC_WEIGHT (搜索结果常常只提公司名或行业)
+  - recency:   按发布时间指数衰减，Config.NEWS_HALF_LIFE_HOURS 小时减半
+  - rank:      relevance × recency × (基础分 + |sentiment|)，决定哪几条标题写进 Prompt
+每个标的的 news_score 是 relevance × recency 加权的平均情绪。
+每个标的都能看完整个 RSS 源，Prompt 里仍然只放 Config.NEWS_PROMPT_HEADLINES 条最有信息量的标题。
+"""
+import re
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+# 权重 2: 明确的利好 / 利空事件；权重 1: 语气偏向
+POSITIVE = {
+    "beat": 2, "beats": 2, "surge": 2, "surges": 2, "soar": 2, "soars": 2, "upgrade": 2, "upgraded": 2,
+    "upgrades": 2, "outperform": 2, "record": 1, "rally": 2, "rallies": 2, "jump": 2, "jumps": 2,
+    "breakthrough": 2, "approval": 2, "approved": 2, "buyback": 2, "exceeds": 2, "tops": 1,
+    "strong": 1, "growth": 1, "profit": 1, "profits": 1, "gain": 1, "gains": 1, "rise": 1, "rises": 1,
+    "bullish": 2, "buy": 1, "raise": 1, "raises": 1, "raised": 1, "boost": 1, "boosts": 1, "expands": 1,
+    "win": 1, "wins": 1, "partnership": 1, "dividend": 1, "optimistic": 1, "rebound": 1, "rebounds": 1,
+    "recovery": 1, "upside": 1, "higher": 1, "climbs": 1, "accelerates": 1, "demand": 1,
+}
+NEGATIVE = {
+    "miss": 2, "misses": 2, "missed": 2, "plunge": 2, "plunges": 2, "tumble": 2, "tumbles": 2,
+    "sink": 2, "sinks": 2, "slump": 2, "slumps": 2, "crash": 2, "downgrade": 2, "downgraded": 2,
+    "downgrades": 2, "underperform": 2, "lawsuit": 2, "probe": 2, "investigation": 2, "recall": 2,
+    "fraud": 2, "bankruptcy": 2, "layoffs": 2, "subpoena": 2, "antitrust": 1, "bearish": 2,
+    "selloff": 2, "warns": 2, "warning": 2, "halt": 2, "halts": 2, "fined": 2,
+    "drop": 1, "drops": 1, "fall": 1, "falls": 1, "decline": 1, "declines": 1, "weak": 1, "weaker": 1,
+    "loss": 1, "losses": 1, "cut": 1, "cuts": 1, "sell": 1, "delay": 1, "delayed": 1, "risk": 1,
+    "risks": 1, "concern": 1, "concerns": 1, "lower": 1, "slows": 1, "slowdown": 1, "fears": 1,
+    "lawsuits": 2, "tariff": 1, "tariffs": 1, "fail": 1, "fails": 1, "failed": 1,
+}
+LEXICON = {**POSITIVE, **{word: -weight for word, weight in NEGATIVE.items()}}
+NEGATORS = {"not", "no", "never", "without", "isn't", "doesn't", "didn't", "won't", "can't", "fails", "failed"}
+
+TOKEN = re.compile(r"[a-z][a-z']*")
+ALPHA = 4.0  # 压缩系数: 单个权重 2 的词约 ±0.71，权重 1 的词约 ±0.45
+BASE_RANK = 0.25  # 中性标题也有基础分，相关且新鲜的仍可能入选
+
+
+def parse_published(value):
+    """RSS pubDate -> UTC 时间 (没写时区的按 UTC)，解析不了返回 NaT"""
+    try:
+        published = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return pd.NaT
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return pd.Timestamp(published).tz_convert("UTC")
+
+
+def headline_frame(items_by_symbol):
+    """
+    {symbol: [(标题, pubDate 原文), ...]} -> DataFrame [symbol, title, pub_date, published]
+    整个股票池拼成一张表，后面的打分都是整列运算
+    """
+    rows = [(symbol, title, pub_date or "") for symbol, items in items_by_symbol.items()
+            for title, pub_date in items if title]
+    frame = pd.DataFrame(rows, columns=["symbol", "title", "pub_date"])
+    frame["published"] = pd.to_datetime(frame["pub_date"].map(parse_published), utc=True)
+    return frame
+
+
+def lexicon_scores(titles):
+    """一批标题 -> -1 ~ 1 的情绪分 (np.ndarray)；所有标题的词拼成一个数组一次查词典"""
+    tokens = [TOKEN.findall(t.lower()) for t in titles]
+    lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+    if not lengths.sum():
+        return np.zeros(len(tokens))
+    words = pd.Series(np.concatenate([np.asarray(t, dtype=object) for t in tokens if t]))
+    owner = np.repeat(np.arange(len(tokens)), lengths)
+
+    weights = words.map(LEXICON).fillna(0.0).to_numpy()
+    negator = words.isin(NEGATORS).to_numpy()
+    # 同一条标题里前一个或前两个词是否定词时反向 ("not a miss" / "fails to beat")
+    flip = np.zeros(len(words), dtype=bool)
+    for lag in (1, 2):
+        flip[lag:] |= negator[:-lag] & (owner[lag:] == owner[:-lag])
+    weights = np.where(flip, -weights, weights)
+
+    raw = np.bincount(owner, weights=weights, minlength=len(tokens))
+    return raw / np.sqrt(raw ** 2 + ALPHA)
+
+
+def score_headlines(frame, now):
+    """在 headline_frame 的结果上加 sentiment / relevance / recency / rank 列"""
+    frame = frame.copy()
+    frame["sentiment"] = lexicon_scores(frame["title"].tolist())
+
+    mentions = [bool(re.search(rf"(?<![A-Za-z]){re.escape(s)}(?![A-Za-z])", t))
+                for s, t in zip(frame["symbol"], frame["title"])]
+    frame["relevance"] = np.where(mentions, 1.0, Config.NEWS_OFFTOPIC_WEIGHT)
+
+    age_hours = (pd.Timestamp(now) - frame["published"]).dt.total_seconds() / 3600
+    # 没有发布时间的按一个半衰期算
+    age_hours = age_hours.fillna(Config.NEWS_HALF_LIFE_HOURS).clip(lower=0)
+    frame["recency"] = 0.5 ** (age_hours / Config.NEWS_HALF_LIFE_HOURS)
+
+    frame["rank"] = frame["relevance"] * frame["recency"] * (BASE_RANK + frame["sentiment"].abs())
+    return frame
+
+
+def summarize(scored, limit=None):
+    """
+    每个标的: 按 rank 选出前 limit 条写成 Prompt 文本，加权平均情绪作为 news_score
+    返回 {symbol: {"text", "score", "count"}}
+    """
+    limit = limit or Config.NEWS_PROMPT_HEADLINES
+    weight = scored["relevance"] * scored["recency"]
+    scores = (scored["sentiment"] * weight).groupby(scored["symbol"]).sum() / weight.groupby(scored["symbol"]).sum()
+
+    result = {}
+    ranked = scored.sort_values("rank", ascending=False, kind="stable")
+    for symbol, group in ranked.groupby("symbol", sort=False):
+        lines = [f"- {row.title} [{_short_date(row.pub_date)}] (情绪 {row.sentiment:+.2f})"
+                 for row in group.head(limit).itertuples()]
+        result[symbol] = {"text": "\n".join(lines), "score": round(float(scores[symbol]), 2),
+                          "count": len(group)}
+    return result
+
+
+def summarize_news(items_by_symbol, now, limit=None):
+    """{symbol: [(标题, pubDate), ...]} -> {symbol: {"text", "score", "count"}} (没有标题的标的不出现)"""
+    frame = headline_frame(items_by_symbol)
+    if frame.empty:
+        return {}
+    return summarize(score_headlines(frame, now), limit)
+
+
+def _short_date(pub_date):
+    # 原格式: Tue, 09 Dec 2025 10:30:00 GMT -> 去掉时分和时区
+    return pub_date[:16] if len(pub_date) > 16 else "近期"
@@ -0,0 +1,348 @@
+# service.py
+"""
+本地查询服务：两次定时任务之间按需查看单个标的的最新数据 / 分析，不用手动跑整套 main.py
+
+    python service.py [--host 127.0.0.1] [--port 8765] [--no-ai] [--analytics]
+
+    GET /context/<SYMBOL>              完整数据上下文 (SymbolContext.to_dict)
+    GET /analysis/<SYMBOL>?mode=pre    AI 报告 (mode: pre / post)
+    GET /metrics                       每个接口的请求数 / 缓存命中 / 合并次数 / p50-p99 耗时
+    GET /health
+
+- 结果按 Config.SERVICE_*_TTL 缓存，没过期直接返回；DataEngine 自己的日线 / 期权缓存照常生效
+- 同一个标的的并发请求合并成一次上游调用 (singleflight)：第一个请求去抓，其余的等它的结果
+- 报告跟着上下文走：上下文刷新后，旧上下文上生成的报告不再复用
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from config import Config
+from deadline import Deadline, DeadlineExceeded
+from metrics import LatencyRecorder
+
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9.\-^=]{1,15}$")
+MODES = ("pre", "post")
+
+
+class TTLCache:
+    """带过期时间的字典，线程安全；过期的条目在写入时顺带清理"""
+
+    def __init__(self, ttl, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        """返回 (value, 已缓存秒数)；没有或已过期返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            age = self.clock() - entry[1]
+            if age > self.ttl:
+                del self._entries[key]
+                return None
+            return entry[0], age
+
+    def set(self, key, value):
+        """写入并返回写入时刻 (单调时钟)"""
+        with self._lock:
+            now = self.clock()
+            self._entries = {k: e for k, e in self._entries.items() if now - e[1] <= self.ttl}
+            self._entries[key] = (value, now)
+            return now
+
+    def stored_at(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    同一个 key 同一时刻只执行一次 fn：先到的请求执行，后到的阻塞等待并拿到同一个结果 (或同一个异常)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """返回 (结果, 是否复用了别人的调用)"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class UpstreamError(Exception):
+    """上游没有返回数据 (标的不存在 / 数据源全部失败)"""
+
+
+class SentinelService:
+    """
+    与传输层无关的查询逻辑 (HTTP 层见 ServiceServer)
+    engine: 提供 get_full_context(symbol, deadline) / get_close_panel(symbols) 的对象 (DataEngine 或测试替身)
+    brain:  提供 analyze(ctx, mode, deadline) 的对象；None 表示只提供数据接口
+    with_analytics: 是否注入跨标的分析 (要拉整个股票池的日线面板，盘中首次请求会慢很多)
+    """
+
+    def __init__(self, engine, brain=None, context_ttl=None, analysis_ttl=None, analytics_ttl=None,
+                 with_analytics=False, is_failed=None, clock=time.monotonic):
+        self.engine = engine
+        self.brain = brain
+        self.with_analytics = with_analytics
+        if brain is not None and is_failed is None:
+            from ai_brain import is_failed_insight as is_failed
+        self.is_failed = is_failed or (lambda text: not text)
+
+        self.contexts = TTLCache(context_ttl or Config.SERVICE_CONTEXT_TTL, clock)
+        self.insights = TTLCache(analysis_ttl or Config.SERVICE_ANALYSIS_TTL, clock)
+        self.analytics = TTLCache(analytics_ttl or Config.SERVICE_ANALYTICS_TTL, clock)
+        self.flights = SingleFlight()
+
+        self.recorder = LatencyRecorder()
+        self._lock = threading.Lock()
+        self.counters = {}
+
+    def _count(self, endpoint, name):
+        if endpoint is None:
+            return
+        with self._lock:
+            counters = self.counters.setdefault(endpoint, {"requests": 0, "cache_hits": 0,
+                                                           "coalesced": 0, "upstream": 0})
+            counters[name] += 1
+
+    def _cross_asset(self):
+        """跨标的分析 (整个股票池一次)，同样缓存 + 合并；失败时返回 None"""
+        if not self.with_analytics:
+            return None
+        hit = self.analytics.get("all")
+        if hit is not None:
+            return hit[0]
+
+        def compute():
+            from analytics import CrossAssetAnalytics
+
+            try:
+                closes = self.engine.get_close_panel(Config.WATCHLIST + Config.ANALYTICS_BENCHMARKS)
+                result = CrossAssetAnalytics.compute(closes)
+            except Exception as e:
+                print(f"⚠️ [服务] 跨标的分析失败 (不影响单标的数据): {e}")
+                return None
+            self.analytics.set("all", result)
+            return result
+
+        return self.flights.do(("analytics",), compute)[0]
+
+    def _context(self, symbol, endpoint=None):
+        """
+        返回 (ctx, 元信息)；元信息里的 cached / coalesced 说明这次有没有真的打到上游
+        endpoint 为 None 时不计数 (分析接口内部取上下文，计数只算报告本身)
+        """
+        hit = self.contexts.get(symbol)
+        if hit is not None:
+            self._count(endpoint, "cache_hits")
+            return hit[0], {"cached": True, "coalesced": False, "age": round(hit[1], 1)}
+
+        def fetch():
+            self._count(endpoint, "upstream")
+            ctx = self.engine.get_full_context(symbol, deadline=Deadline(Config.SERVICE_REQUEST_BUDGET))
+            if ctx is None:
+                raise UpstreamError(f"{symbol} 没有拿到数据")
+            analytics = self._cross_asset()
+            if analytics:
+                analytics.annotate(ctx)
+            self.contexts.set(symbol, ctx)
+            return ctx
+
+        ctx, shared = self.flights.do(("context", symbol), fetch)
+        if shared:
+            self._count(endpoint, "coalesced")
+        return ctx, {"cached": False, "coalesced": shared, "age": 0.0}
+
+    def context(self, symbol):
+        self._count("context", "requests")
+        with self.recorder.timer("context"):
+            ctx, meta = self._context(symbol, "context")
+        return dict(ctx.to_dict(), **meta)
+
+    def analysis(self, symbol, mode="pre"):
+        self._count("analysis", "requests")
+        with self.recorder.timer("analysis"):
+            ctx, _ = self._context(symbol)
+            # 报告缓存以所用上下文的写入时刻为版本，上下文刷新后自然失效
+            key = (symbol, mode, self.contexts.stored_at(symbol))
+            hit = self.insights.get(key)
+            if hit is not None:
+                self._count("analysis", "cache_hits")
+                return {"symbol": symbol, "mode": mode, "insight": hit[0], "cached": True,
+                        "coalesced": False, "age": round(hit[1], 1)}
+
+            def run():
+                self._count("analysis", "upstream")
+                insight = self.brain.analyze(ctx, mode=mode, deadline=Deadline(Config.SERVICE_REQUEST_BUDGET))
+                # 失败 / 降级的报告不缓存，下一次请求重试
+                if not self.is_failed(insight):
+                    self.insights.set(key, insight)
+                return insight
+
+            insight, shared = self.flights.do(("analysis",) + key, run)
+            if shared:
+                self._count("analysis", "coalesced")
+        return {"symbol": symbol, "mode": mode, "insight": insight, "cached": False,
+                "coalesced": shared, "age": 0.0}
+
+    def metrics(self):
+        """{接口: {requests, cache_hits, coalesced, upstream, errors, p50_ms, p95_ms, p99_ms}}"""
+        with self._lock:
+            result = {k: dict(v) for k, v in self.counters.items()}
+        for endpoint, s in self.recorder.summary().items():
+            entry = result.setdefault(endpoint, {})
+            entry["errors"] = s["errors"]
+            entry.update({f"{q}_ms": round(s[q] * 1000, 1) for q in ("p50", "p95", "p99")})
+        return result
+
+
+class ServiceServer:
+    """在后台线程里运行的 HTTP 服务 (写法与 loadtest.StandInServer 一致)"""
+
+    def __init__(self, service, host=None, port=None):
+        self.service = service
+        host = Config.SERVICE_HOST if host is None else host
+        port = Config.SERVICE_PORT if port is None else port
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def handle(self, path):
+        """返回 (状态码, JSON 可序列化的返回体)"""
+        url = urlparse(path)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+
+        if parts == ["health"]:
+            return 200, {"status": "ok"}
+        if parts == ["metrics"]:
+            return 200, self.service.metrics()
+        if len(parts) != 2 or parts[0] not in ("context", "analysis"):
+            return 404, {"error": "not found"}
+
+        symbol = parts[1].upper()
+        if not SYMBOL_PATTERN.match(symbol):
+            return 400, {"error": f"无效的代码: {parts[1]}"}
+        try:
+            if parts[0] == "context":
+                return 200, self.service.context(symbol)
+            if self.service.brain is None:
+                return 404, {"error": "服务以 --no-ai 启动，没有分析接口"}
+            mode = (query.get("mode") or ["pre"])[0]
+            if mode not in MODES:
+                return 400, {"error": f"mode 只能是 {'/'.join(MODES)}"}
+            return 200, self.service.analysis(symbol, mode)
+        except UpstreamError as e:
+            return 502, {"error": str(e)}
+        except DeadlineExceeded as e:
+            return 504, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, body = server.handle(self.path)
+                data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenBB Sentinel 本地查询服务")
+    parser.add_argument("--host", default=Config.SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=Config.SERVICE_PORT)
+    parser.add_argument("--no-ai", action="store_true", help="只提供数据接口，不加载 Gemini")
+    parser.add_argument("--analytics", action="store_true", help="注入跨标的分析 (Beta / 相对强弱 / 联动分组)")
+    args = parser.parse_args()
+
+    from main import setup_credentials
+    from data_engine import DataEngine
+
+    setup_credentials()
+    brain = None
+    if not args.no_ai:
+        from ai_brain import AIBrain
+
+        brain = AIBrain()
+    server = ServiceServer(SentinelService(DataEngine(), brain, with_analytics=args.analytics), args.host, args.port)
+    print(f"🛰️ Sentinel 查询服务已启动: {server.base_url} (Ctrl+C 退出)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print("\n📊 接口统计: " + json.dumps(server.service.metrics(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# session_delta.py
+"""
+盘后增量模式: 盘后复用同一交易日盘前保存的快照，只补抓盘中会变的部分
+
+- 盘前每个标的分析完，把完整的 SymbolContext 追加写进 {CACHE_DIR}/engine/session/{纽约日期}_pre.jsonl
+  (与日线缓存放在同一目录，CI 里随 actions/cache 从盘前任务带到盘后任务)
+- 盘后读出这份快照作为基线: 目标价直接沿用，日线只补最近几天 (data_engine 的增量日线)，
+  新闻只看快照之后发布的标题，期权 / 大盘照常刷新
+- 基线挂在 ctx.session 上，AI 收到的是 "盘前 → 收盘" 的变化 (价格 / RSI / PCR / 新标题)，而不是整份数据
+"""
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from config import Config
+from symbol_context import SymbolContext, fmt, is_missing, to_number
+
+# 基线里保存的盘前数值 (其余字段盘后重新计算)
+BASELINE_FIELDS = ("price", "rsi", "pcr", "pressure", "news_score")
+
+
+class SessionSnapshots:
+    """
+    按纽约交易日存放的盘前快照 (只追加的 JSON Lines，一行一个标的，同一标的以最后一行为准)
+    """
+
+    def __init__(self, cache_dir=None):
+        self.dir = os.path.join(cache_dir or os.path.join(Config.CACHE_DIR, "engine"), "session")
+        os.makedirs(self.dir, exist_ok=True)
+
+    def path(self, session_date, mode="pre"):
+        return os.path.join(self.dir, f"{session_date}_{mode}.jsonl")
+
+    def save(self, session_date, ctx, ts, mode="pre"):
+        record = {"symbol": ctx.symbol, "ts": ts, "context": ctx.to_dict()}
+        # 单次 write + flush，分片进程各自追加一行，互不覆盖
+        with open(self.path(session_date, mode), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+
+    def load(self, session_date, mode="pre", symbols=None):
+        """{symbol: (快照时间 ISO 字符串, 上下文字典)}；没有快照返回空字典"""
+        path = self.path(session_date, mode)
+        if not os.path.exists(path):
+            return {}
+        wanted = set(symbols) if symbols is not None else None
+        snapshots = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程被杀时写了一半的残行
+                    continue
+                if wanted is None or record["symbol"] in wanted:
+                    snapshots[record["symbol"]] = (record["ts"], record["context"])
+        return snapshots
+
+    def prune(self, today, keep_days=None):
+        """删掉 keep_days 天之前的快照文件，缓存目录不无限增长"""
+        keep_days = Config.SESSION_KEEP_DAYS if keep_days is None else keep_days
+        cutoff = (today - timedelta(days=keep_days)).isoformat()
+        for name in os.listdir(self.dir):
+            if name.endswith(".jsonl") and name[:10] < cutoff:
+                os.remove(os.path.join(self.dir, name))
+
+
+def baseline_from(pre, ts):
+    """盘前 SymbolContext -> 挂到盘后 ctx.session 上的基线 {ts, price, rsi, pcr, pressure, news_score}"""
+    baseline = {"ts": ts}
+    for name in BASELINE_FIELDS:
+        value = getattr(pre, name)
+        baseline[name] = None if is_missing(value) else value
+    return baseline
+
+
+def published_since(ts):
+    """基线时间 (ISO 字符串) -> UTC datetime，新闻只保留这之后发布的"""
+    moment = datetime.fromisoformat(ts)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def session_deltas(ctx):
+    """
+    盘前 → 收盘的变化: {price_pct, rsi, pcr, news_score, new_headlines}，任一端缺失为 NaN
+    price_pct 是相对盘前快照价 (通常就是前一日收盘) 的百分比
+    """
+    base = ctx.session or {}
+
+    def diff(name):
+        return round(getattr(ctx, name) - to_number(base.get(name)), 2)
+
+    pre_price = to_number(base.get("price"))
+    price_pct = round((ctx.price - pre_price) / pre_price * 100, 2) if pre_price else float("nan")
+    return {
+        "price_pct": price_pct,
+        "rsi": diff("rsi"),
+        "pcr": diff("pcr"),
+        "news_score": diff("news_score"),
+        "new_headlines": int(base.get("new_headlines") or 0),
+    }
+
+
+def _signed(value, digits=2):
+    return "N/A" if is_missing(value) else f"{value:+.{digits}f}"
+
+
+def delta_context(ctx):
+    """给 AI 的精简上下文: 只列盘前 → 收盘的变化和新标题"""
+    base = ctx.session or {}
+    deltas = session_deltas(ctx)
+    pre = SymbolContext(ctx.symbol, **{k: base.get(k) for k in BASELINE_FIELDS})
+    news = ctx.news if deltas["new_headlines"] else "盘前快照之后没有新标题"
+    if "news" in ctx.missing:
+        news = "新闻获取超时 (数据缺失)"
+
+    lines = [
+        f"标的: {ctx.symbol} (盘前快照 {base.get('ts', '未知')})",
+        f"价格: ${pre.show('price')} → ${ctx.show('price')} ({_signed(deltas['price_pct'])}%)",
+        f"RSI(14): {pre.show('rsi')} → {ctx.show('rsi')} ({_signed(deltas['rsi'])})",
+        f"PCR: {pre.show('pcr')} → {ctx.show('pcr')} ({_signed(deltas['pcr'])})",
+        f"压力位: ${pre.show('pressure')} → ${ctx.show('pressure')}",
+        f"SMA20: ${ctx.show('sma20')} | 建议止损: < ${fmt(ctx.stop_loss(Config.ATR_MULTIPLIER))}",
+        f"SPY / QQQ: {ctx.show('spy_change')}% / {ctx.show('qqq_change')}%",
+        f"新标题 {deltas['new_headlines']} 条 (情绪 {ctx.show('news_score')}，较盘前 {_signed(deltas['news_score'])}):",
+        news,
+    ]
+    if ctx.missing:
+        lines.append(f"超时未获取 (请勿臆测): {', '.join(ctx.missing)}")
+    return "\n".join(lines)
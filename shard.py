@@ -0,0 +1,94 @@
+# shard.py
+import argparse
+import glob
+import json
+import os
+import re
+
+from config import Config
+
+
+def parse_shard(spec):
+    """
+    解析命令行里的分片参数 "i/n" (i 从 1 开始)，返回 (i, n)
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", spec or "")
+    if not match:
+        raise argparse.ArgumentTypeError(f"分片格式应为 i/n (例如 1/4)，收到: {spec}")
+
+    index, total = int(match.group(1)), int(match.group(2))
+    if total < 1 or not 1 <= index <= total:
+        raise argparse.ArgumentTypeError(f"分片编号越界: {spec} (要求 1 <= i <= n)")
+    return index, total
+
+
+def partition_watchlist(watchlist, index, total):
+    """
+    按声明顺序轮转切分股票池 (第 i 片拿第 i, i+n, i+2n... 个)
+    只依赖 WATCHLIST 本身，同一次提交下每个矩阵任务算出来的结果完全一致，
+    而且 8 个标的切 4 片时每片正好 2 个，比按哈希分更均匀。
+    """
+    return list(watchlist[index - 1::total])
+
+
+def artifact_path(mode, index, total, artifact_dir=None):
+    artifact_dir = artifact_dir or Config.ARTIFACT_DIR
+    return os.path.join(artifact_dir, f"{mode}_shard_{index}of{total}.jsonl")
+
+
+class ShardWriter:
+    """
+    把单个分片的分析结果逐条写入中间产物 (JSON Lines)
+    每处理完一个标的就落盘一行，任务中途被杀也能保住已完成的部分。
+    """
+
+    def __init__(self, mode, index, total, artifact_dir=None):
+        self.mode = mode
+        self.path = artifact_path(mode, index, total, artifact_dir)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # 每次运行都从空文件开始，避免混入上一次的结果
+        open(self.path, "w", encoding="utf-8").close()
+
+    def write(self, ticker, order, insight):
+        record = {"mode": self.mode, "ticker": ticker, "order": order, "insight": insight}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_shard_artifacts(artifact_dir=None):
+    """
+    收集所有分片产物，按原始股票池顺序排好
+    返回 (mode, [(ticker, insight), ...])；没有任何产物时返回 (None, [])
+    """
+    artifact_dir = artifact_dir or Config.ARTIFACT_DIR
+    # download-artifact 可能把每个分片放进各自的子目录，所以递归查找
+    paths = sorted(glob.glob(os.path.join(artifact_dir, "**", "*_shard_*of*.jsonl"), recursive=True))
+    if not paths:
+        return None, []
+
+    records = []
+    seen_shards = set()
+    expected_total = None
+    for path in paths:
+        match = re.search(r"_shard_(\d+)of(\d+)\.jsonl$", path)
+        if match:
+            seen_shards.add(int(match.group(1)))
+            expected_total = int(match.group(2))
+
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+
+    if expected_total and len(seen_shards) < expected_total:
+        missing = sorted(set(range(1, expected_total + 1)) - seen_shards)
+        print(f"⚠️ 缺少分片产物: {missing} (共 {expected_total} 片)，将只合并已有结果。")
+
+    modes = {r["mode"] for r in records}
+    if len(modes) > 1:
+        raise ValueError(f"分片产物的模式不一致: {sorted(modes)}")
+
+    records.sort(key=lambda r: r["order"])
+    mode = modes.pop() if modes else None
+    return mode, [(r["ticker"], r["insight"]) for r in records]
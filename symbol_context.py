@@ -0,0 +1,236 @@
+# symbol_context.py
+"""
+单个标的的数据上下文 (SymbolContext) 以及按列存储的批量形式 (ContextBatch)
+
+- 数值字段一律是 float，缺失就是 NaN，不再混入 "N/A" / "近期" 这类占位字符串
+- 用 __slots__ 省掉每个实例的 __dict__，几千个标的常驻内存也很小
+- ContextBatch 把同一字段放进一个 NumPy 数组，整批序列化就是几次连续内存拷贝
+"""
+import json
+import math
+
+NUMERIC_FIELDS = (
+    "price", "change_pct",
+    "rsi", "atr", "sma20",
+    "pcr", "pressure",
+    "target_price",
+    "spy_change", "qqq_change",
+    # 跨标的分析 (analytics.py)
+    "beta_spy", "beta_qqq", "corr_spy", "rs_rank", "rs_excess",
+    # 新闻标题本地情绪 (sentiment.py)，-1 ~ 1
+    "news_score",
+)
+TEXT_FIELDS = ("news", "quote_source", "trigger", "peers")
+# ContextBatch 额外用逗号拼接的文本列保存 missing，indicators 存成 JSON 文本
+BATCH_TEXT_FIELDS = TEXT_FIELDS + ("missing", "indicators")
+CORE_TECHNICALS = ("rsi", "atr", "sma20")
+
+NAN = float("nan")
+
+
+def to_number(value):
+    """把数据源返回的任意值转成 float，"N/A"、None、无法解析的字符串都变成 NaN"""
+    if value is None or isinstance(value, bool):
+        return NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def fmt(value, digits=2):
+    """给 Prompt / 报告用的显示格式，缺失统一显示 N/A"""
+    if is_missing(value):
+        return "N/A"
+    return f"{round(value, digits)}"
+
+
+class SymbolContext:
+    # missing: 因超出时间预算而没有拿到的字段名 (与"数据源本来就没有"的 NaN 区分开)
+    # indicators: Config.AI_INDICATORS 选出的额外指标 {注册名: float}，键随配置变化所以不占固定字段
+    # session: 盘后增量模式下的盘前基线 (session_delta.py)，其它模式为 None；不进 ContextBatch / 历史库
+    __slots__ = NUMERIC_FIELDS + TEXT_FIELDS + ("symbol", "missing", "indicators", "session")
+
+    def __init__(self, symbol, news="", quote_source="", trigger=None, peers="", missing=(), indicators=None,
+                 session=None, **numbers):
+        self.symbol = symbol
+        for name in NUMERIC_FIELDS:
+            setattr(self, name, to_number(numbers.pop(name, None)))
+        if numbers:
+            raise TypeError(f"未知字段: {sorted(numbers)}")
+        self.news = news or ""
+        self.quote_source = quote_source or ""
+        self.trigger = trigger
+        self.peers = peers or ""
+        if isinstance(missing, str):
+            missing = missing.split(",")
+        self.missing = tuple(m for m in missing if m)
+        if isinstance(indicators, str):
+            indicators = json.loads(indicators) if indicators else {}
+        self.indicators = {k: to_number(v) for k, v in (indicators or {}).items()}
+        self.session = session
+
+    def __repr__(self):
+        return f"SymbolContext({self.symbol}, price={fmt(self.price)}, rsi={fmt(self.rsi)})"
+
+    def stop_loss(self, multiplier):
+        """现价 - 倍数 × ATR，任一缺失则为 NaN"""
+        return round(self.price - multiplier * self.atr, 2)
+
+    def show(self, name, digits=2):
+        """报告里的显示值：超时未取到的字段单独标出来"""
+        if name in self.missing:
+            return "N/A (超时)"
+        return fmt(getattr(self, name), digits)
+
+    # ---------------- 序列化 ----------------
+    def to_record(self):
+        """拍平成一行 (历史库 / 批量存储用)，缺失值为 NaN"""
+        record = {"symbol": self.symbol}
+        for name in NUMERIC_FIELDS + TEXT_FIELDS:
+            record[name] = getattr(self, name)
+        record["missing"] = ",".join(self.missing)
+        record["indicators"] = self._indicators_json()
+        return record
+
+    def _indicators_json(self):
+        if not self.indicators:
+            return ""
+        return json.dumps({k: None if is_missing(v) else v for k, v in self.indicators.items()})
+
+    @classmethod
+    def from_record(cls, record):
+        known = NUMERIC_FIELDS + TEXT_FIELDS + ("missing", "indicators")
+        return cls(record["symbol"], **{k: v for k, v in record.items() if k in known})
+
+    def to_dict(self):
+        """
+        嵌套结构 (与旧版 get_full_context 的形状一致)，缺失值为 None，可直接 json.dumps
+        """
+        def clean(value):
+            return None if is_missing(value) else value
+
+        data = {
+            "symbol": self.symbol,
+            "quote": {"price": clean(self.price), "change_pct": clean(self.change_pct),
+                      "source": self.quote_source},
+            "technicals": {"rsi": clean(self.rsi), "atr": clean(self.atr), "sma20": clean(self.sma20),
+                           **{k: clean(v) for k, v in self.indicators.items()}},
+            "news": self.news,
+            "news_score": clean(self.news_score),
+            "options": {"pcr": clean(self.pcr), "pressure": clean(self.pressure)},
+            "fundamental": clean(self.target_price),
+            "macro": {"spy_change": clean(self.spy_change), "qqq_change": clean(self.qqq_change)},
+            "analytics": {"beta_spy": clean(self.beta_spy), "beta_qqq": clean(self.beta_qqq),
+                          "corr_spy": clean(self.corr_spy), "rs_rank": clean(self.rs_rank),
+                          "rs_excess": clean(self.rs_excess), "peers": self.peers},
+        }
+        if self.trigger:
+            data["trigger"] = self.trigger
+        if self.missing:
+            data["missing"] = list(self.missing)
+        if self.session:
+            data["session"] = dict(self.session)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """读取 to_dict() 的结果 (也兼容旧版带 "N/A" 的上下文字典)"""
+        quote = data.get("quote") or {}
+        tech = data.get("technicals") or {}
+        opt = data.get("options") or {}
+        macro = data.get("macro") or {}
+        analytics = data.get("analytics") or {}
+        return cls(
+            data["symbol"],
+            price=quote.get("price"),
+            change_pct=quote.get("change_pct"),
+            quote_source=quote.get("source"),
+            rsi=tech.get("rsi"),
+            atr=tech.get("atr"),
+            sma20=tech.get("sma20"),
+            pcr=opt.get("pcr"),
+            pressure=opt.get("pressure"),
+            target_price=data.get("fundamental"),
+            spy_change=macro.get("spy_change"),
+            qqq_change=macro.get("qqq_change"),
+            beta_spy=analytics.get("beta_spy"),
+            beta_qqq=analytics.get("beta_qqq"),
+            corr_spy=analytics.get("corr_spy"),
+            rs_rank=analytics.get("rs_rank"),
+            rs_excess=analytics.get("rs_excess"),
+            peers=analytics.get("peers"),
+            news=data.get("news"),
+            news_score=data.get("news_score"),
+            trigger=data.get("trigger"),
+            missing=data.get("missing") or (),
+            session=data.get("session"),
+            indicators={k: v for k, v in tech.items() if k not in CORE_TECHNICALS},
+        )
+
+
+class ContextBatch:
+    """
+    列式批量上下文: 每个数值字段一个 float64 数组，文本字段各一个列表
+    适合几千个标的的筛选 / 排序 / 落盘，需要单个对象时再用 row(i) 取出
+    """
+
+    def __init__(self, symbols, columns, texts=None):
+        import numpy as np
+
+        self.symbols = list(symbols)
+        self.columns = {name: np.asarray(columns[name], dtype=np.float64) for name in NUMERIC_FIELDS}
+        texts = texts or {}
+        self.texts = {name: list(texts.get(name) or [""] * len(self.symbols)) for name in BATCH_TEXT_FIELDS}
+
+    @classmethod
+    def from_contexts(cls, contexts):
+        import numpy as np
+
+        contexts = list(contexts)
+        columns = {name: np.fromiter((getattr(c, name) for c in contexts), dtype=np.float64, count=len(contexts))
+                   for name in NUMERIC_FIELDS}
+        texts = {name: [getattr(c, name) or "" for c in contexts] for name in TEXT_FIELDS}
+        texts["missing"] = [",".join(c.missing) for c in contexts]
+        texts["indicators"] = [c._indicators_json() for c in contexts]
+        return cls([c.symbol for c in contexts], columns, texts)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def row(self, i):
+        numbers = {name: float(self.columns[name][i]) for name in NUMERIC_FIELDS}
+        texts = {name: self.texts[name][i] for name in BATCH_TEXT_FIELDS}
+        texts["trigger"] = texts["trigger"] or None
+        return SymbolContext(self.symbols[i], **texts, **numbers)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def save(self, path):
+        """存成 .npz：数值列原样写入，文本列存成定长 Unicode 数组 (不需要 pickle)"""
+        import numpy as np
+
+        arrays = {f"num_{k}": v for k, v in self.columns.items()}
+        arrays.update({f"txt_{k}": np.asarray(v, dtype=str) for k, v in self.texts.items()})
+        np.savez(path, symbols=np.asarray(self.symbols, dtype=str), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        import numpy as np
+
+        with np.load(path, allow_pickle=False) as f:
+            symbols = f["symbols"].tolist()
+            # 早期文件没有后来新增的列 (news_score / indicators 等)，数值列补 NaN
+            columns = {k: f[f"num_{k}"] if f"num_{k}" in f.files else np.full(len(symbols), np.nan)
+                       for k in NUMERIC_FIELDS}
+            texts = {k: f[f"txt_{k}"].tolist() for k in BATCH_TEXT_FIELDS if f"txt_{k}" in f.files}
+            return cls(symbols, columns, texts)
@@ -1,31 +1,51 @@
+# tests/final_test.py
+# Gemini Key / 代理诊断 (联网): 用 .env 里的 GOOGLE_API_KEY 和本地代理真正调用 Gemini
+# 直接运行本文件，或 SENTINEL_LIVE=1 时由 pytest 运行
+import sys
 import os
-import google.generativeai as genai
 
-# 1. 填入从 https://aistudio.google.com 申请的新 Key
-os.environ["GOOGLE_API_KEY"] = ""
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# 2. 填入你的代理 (确保不是香港节点)
-os.environ["HTTP_PROXY"] = "http://127.0.0.1:10809"  # <--- 注意端口号
-os.environ["HTTPS_PROXY"] = "http://127.0.0.1:10809"
+from config import Config
+from tests.live import live_only
 
-# 3. 强制 REST 协议
-genai.configure(api_key=os.environ["GOOGLE_API_KEY"], transport="rest")
 
-print(f"当前使用的 Key 前缀: {os.environ['GOOGLE_API_KEY'][:5]}...")
-print("正在尝试列出模型...")
+def _configure():
+    """代理 (确保不是香港节点) + 强制 REST 协议"""
+    import google.generativeai as genai
 
-try:
+    if not Config.IS_GITHUB:
+        os.environ.setdefault("HTTP_PROXY", Config.LOCAL_PROXY)
+        os.environ.setdefault("HTTPS_PROXY", Config.LOCAL_PROXY)
+    genai.configure(api_key=Config.GOOGLE_API_KEY, transport="rest")
+    print(f"当前使用的 Key 前缀: {(Config.GOOGLE_API_KEY or '')[:5]}...")
+    return genai
+
+
+@live_only
+def test_list_models():
+    print("🔧 [测试] 正在尝试列出模型...")
+    genai = _configure()
     # 不猜名字，直接让它列出允许的模型
-    models = list(genai.list_models())
+    models = [m.name for m in genai.list_models() if 'generateContent' in m.supported_generation_methods]
+
+    assert models, "没有可用于 generateContent 的模型"
     print("✅ 连接成功！可用模型如下：")
-    for m in models:
-        if 'generateContent' in m.supported_generation_methods:
-            print(f"   - {m.name}")
+    for name in models:
+        print(f"   - {name}")
+
+
+@live_only
+def test_say_hello():
+    print("🔧 [测试] 尝试调用一次模型...")
+    genai = _configure()
+    model = genai.GenerativeModel(Config.GEMINI_MODEL)
+    text = model.generate_content("Say Hello").text
+
+    assert text and text.strip()
+    print(f"✅ 对话测试成功: {text}")
 
-    # 如果能列出，尝试调用一次
-    model = genai.GenerativeModel('gemini-pro')
-    response = model.generate_content("Say Hello")
-    print(f"✅ 对话测试成功: {response.text}")
 
-except Exception as e:
-    print(f"❌ 依然失败: {e}")
+if __name__ == "__main__":
+    test_list_models()
+    test_say_hello()
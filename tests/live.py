@@ -0,0 +1,37 @@
+# tests/live.py
+"""
+联网诊断的开关
+
+test_news / test_proxy / final_test / test_ai / test_data 会真正访问 Yahoo / Google / Gemini (需要 Key / 代理)，
+跑 pytest 时默认跳过，设置 SENTINEL_LIVE=1 才运行；直接 python tests/xxx.py 执行时总是联网。
+test_ai / test_data 也可以用 SENTINEL_REPLAY=<路径> 离线回放 main.py --record 录的一整次运行。
+整条流水线的离线回放由 tests/test_replay.py 覆盖。
+"""
+import os
+from contextlib import contextmanager
+
+import pytest
+
+from cassette import cassette
+
+LIVE = os.getenv("SENTINEL_LIVE") == "1"
+REPLAY = os.getenv("SENTINEL_REPLAY")
+
+live_only = pytest.mark.skipif(not LIVE, reason="联网诊断: 设置 SENTINEL_LIVE=1 后运行")
+live_or_replay = pytest.mark.skipif(not (LIVE or REPLAY),
+                                    reason="联网诊断: 设置 SENTINEL_LIVE=1 或 SENTINEL_REPLAY=<cassette> 后运行")
+
+
+@contextmanager
+def maybe_replay():
+    """设置了 SENTINEL_REPLAY 时在回放模式下运行，退出时恢复全局 cassette，不影响同一进程里的其它测试"""
+    if not REPLAY:
+        yield
+        return
+    saved = (cassette.mode, cassette.path, cassette.entries, cassette.meta, cassette.counters)
+    cassette.counters = {}
+    cassette.replay(REPLAY)
+    try:
+        yield
+    finally:
+        (cassette.mode, cassette.path, cassette.entries, cassette.meta, cassette.counters) = saved
@@ -4,33 +4,31 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from ai_brain import AIBrain
+from ai_brain import AIBrain, is_failed_insight
 from tests.mock_data import MOCK_CONTEXT
+from tests.live import live_or_replay, maybe_replay
 
 
+@live_or_replay
 def test_gemini_connection():
+    # 联网诊断: SENTINEL_LIVE=1 时真正调用 Gemini；SENTINEL_REPLAY=<路径> 时回放 main.py --record 录的一整次运行
     print("🧠 [测试] 正在连接 Google Gemini...")
-
-    try:
+    with maybe_replay():
         brain = AIBrain()
 
         # 简单测试一个 Hello World 级别的对话，确保连通性
         print("    正在发送测试请求...")
         insight = brain.analyze(MOCK_CONTEXT, mode="pre")
 
-        print("\n--- Gemini 回复 ---")
-        print(insight)
-        print("-------------------\n")
-
-        if len(insight) > 10:
-            print("✅ Gemini 连接成功且响应正常！")
-        else:
-            print("⚠️ Gemini 响应内容为空。")
+    print("\n--- Gemini 回复 ---")
+    print(insight)
+    print("-------------------\n")
 
-    except Exception as e:
-        print(f"\n❌ 测试失败: {e}")
-        print("提示：请检查 .env 里的 GOOGLE_API_KEY 是否正确，以及是否有 Google AI Studio 的访问权限（需科学上网）。")
+    # 提示：失败时请检查 .env 里的 GOOGLE_API_KEY 是否正确，以及是否有 Google AI Studio 的访问权限（需科学上网）
+    assert not is_failed_insight(insight), insight
+    assert len(insight) > 10, "Gemini 响应内容为空"
+    print("✅ Gemini 连接成功且响应正常！")
 
 
 if __name__ == "__main__":
-    test_gemini_connection()
\ No newline at end of file
+    test_gemini_connection()
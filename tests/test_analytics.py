@@ -0,0 +1,80 @@
+# tests/test_analytics.py
+import sys
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import CrossAssetAnalytics, cluster_labels
+from symbol_context import SymbolContext
+
+
+def _panel(n_stocks, n_days=253, seed=0):
+    """两个行业因子驱动的模拟收盘价，外加 SPY / QQQ"""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0005, 0.01, n_days)
+    sectors = rng.normal(0, 0.01, (n_days, 2))
+    stocks = {}
+    for i in range(n_stocks):
+        noise = rng.normal(0, 0.004, n_days)
+        stocks[f"S{i:03d}"] = (1 + 0.2 * i / n_stocks) * market + sectors[:, i % 2] + noise
+    stocks["SPY"] = market
+    stocks["QQQ"] = 1.2 * market + 0.3 * sectors[:, 0]
+    index = pd.bdate_range("2025-01-01", periods=n_days)
+    return pd.DataFrame({s: 100 * np.cumprod(1 + r) for s, r in stocks.items()}, index=index)
+
+
+def test_matches_pandas_reference():
+    print("🧮 [测试] 跨标的分析与 pandas 逐项计算一致...")
+    closes = _panel(12)
+    closes.iloc[:40, 3] = np.nan  # 上市晚的标的
+    result = CrossAssetAnalytics.compute(closes, beta_window=60, rs_window=20, cluster_threshold=0.6)
+
+    returns = closes.pct_change(fill_method=None).iloc[1:]
+    reference = returns.corr(min_periods=20).to_numpy()
+    assert np.allclose(result.corr, reference, equal_nan=True)
+
+    window = returns.iloc[-60:][["S005", "SPY"]].dropna()
+    beta = window["S005"].cov(window["SPY"]) / window["SPY"].var()
+    assert abs(result.betas["SPY"][result.position["S005"]] - beta) < 1e-9
+
+    # 两个行业因子 -> 两个联动组，基准不参与分组
+    groups = {result.labels[result.position[s]] for s in closes.columns if s not in ("SPY", "QQQ")}
+    assert len(groups) == 2
+    assert all(peer[0] not in ("SPY", "QQQ") for peer in result.peers("S000"))
+    assert {p[0] for p in result.peers("S000")} <= {f"S{i:03d}" for i in range(0, 12, 2)}
+
+    ctx = result.annotate(SymbolContext("S000", price=100))
+    assert 0 <= ctx.rs_rank <= 100 and ctx.beta_spy > 0 and ctx.peers
+    assert SymbolContext.from_dict(ctx.to_dict()).peers == ctx.peers
+    print("✅ 跨标的分析正常")
+
+
+def test_cluster_components():
+    corr = np.array([
+        [1.0, 0.9, 0.1, 0.0],
+        [0.9, 1.0, 0.8, 0.0],
+        [0.1, 0.8, 1.0, 0.0],
+        [0.0, 0.0, 0.0, 1.0],
+    ])
+    # 0-1、1-2 相连 -> 0/1/2 传递成一组
+    assert cluster_labels(corr, 0.7).tolist() == [0, 0, 0, 3]
+
+
+def test_500_names_under_a_second():
+    closes = _panel(500, seed=1)
+    start = time.perf_counter()
+    result = CrossAssetAnalytics.compute(closes)
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ 502 × 502 相关矩阵 + Beta + 排名 + 分组: {elapsed * 1000:.0f} ms")
+    assert result.corr.shape == (502, 502)
+    assert elapsed < 1.0
+
+
+if __name__ == "__main__":
+    test_matches_pandas_reference()
+    test_cluster_components()
+    test_500_names_under_a_second()
@@ -0,0 +1,44 @@
+# tests/test_backtest.py
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import prepare, evaluate, sweep
+
+
+def _synthetic_panel(n_dates=600, n_symbols=20, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_dates, n_symbols)), axis=0))
+    spread = np.abs(rng.normal(0, 0.01, (n_dates, n_symbols))) * close
+    return {"dates": np.arange(n_dates), "symbols": [f"S{i}" for i in range(n_symbols)],
+            "close": close, "high": close + spread, "low": close - spread}
+
+
+def test_evaluate_metrics_are_sane():
+    print("🧮 [测试] 向量化回测指标范围...")
+    panel = prepare(_synthetic_panel())
+    result = evaluate(panel, 30, 70, 1.5, horizon=20)
+    assert result["trades"] > 0
+    assert 0 <= result["hit_rate"] <= 1
+    assert 0 <= result["stop_out_rate"] <= 1
+    assert result["max_drawdown"] <= 0
+
+    # 止损越紧，止损率只会更高
+    tight = evaluate(panel, 30, 70, 0.5, horizon=20)
+    loose = evaluate(panel, 30, 70, 3.0, horizon=20)
+    assert tight["stop_out_rate"] >= loose["stop_out_rate"]
+    print("✅ 回测指标正常")
+
+
+def test_sweep_matches_serial():
+    panel = prepare(_synthetic_panel(n_dates=300, n_symbols=5))
+    grid = [(25, 70, 1.0), (30, 75, 2.0), (35, 80, 3.0)]
+    assert sweep(panel, grid, workers=2) == sweep(panel, grid, workers=1)
+
+
+if __name__ == "__main__":
+    test_evaluate_metrics_are_sane()
+    test_sweep_matches_serial()
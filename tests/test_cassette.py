@@ -0,0 +1,92 @@
+# tests/test_cassette.py
+import sys
+import os
+import asyncio
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cassette import Cassette, CassetteMiss, decode_frame, encode_frame
+
+
+def test_record_then_replay():
+    print("📼 [测试] 录制后离线回放...")
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return [200, "<rss></rss>"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "run.json.gz")
+
+        recorder = Cassette()
+        recorder.record(path)
+        assert recorder.call("rss", "https://example/rss?s=TSLA", fetch) == [200, "<rss></rss>"]
+        recorder.save()
+
+        player = Cassette()
+        player.replay(path)
+        assert player.call("rss", "https://example/rss?s=TSLA", fetch) == [200, "<rss></rss>"]
+        # 回放时绝不能再真的发请求
+        assert len(calls) == 1
+
+        try:
+            player.call("rss", "https://example/rss?s=NVDA", fetch)
+        except CassetteMiss:
+            pass
+        else:
+            raise AssertionError("缺失的记录应该抛出 CassetteMiss")
+    print("✅ 回放结果与录制一致")
+
+
+def test_async_call_shares_recording():
+    print("📼 [测试] 异步调用与同步调用共用录制记录...")
+
+    async def fetch():
+        await asyncio.sleep(0)
+        return [200, "<rss>async</rss>"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "run.json.gz")
+
+        recorder = Cassette()
+        recorder.record(path)
+        assert asyncio.run(recorder.acall("rss", "https://example/rss?s=TSLA", fetch)) == [200, "<rss>async</rss>"]
+        recorder.save()
+
+        player = Cassette()
+        player.replay(path)
+        # 异步录制的结果，同步回放也能拿到
+        assert player.call("rss", "https://example/rss?s=TSLA", lambda: None) == [200, "<rss>async</rss>"]
+        assert asyncio.run(player.acall("rss", "https://example/rss?s=TSLA", fetch)) == [200, "<rss>async</rss>"]
+    print("✅ 异步回放正常")
+
+
+def test_frame_keeps_source():
+    print("📼 [测试] 录制的日线保留数据源标记...")
+    import pandas as pd
+
+    df = pd.DataFrame({"close": [1.0, 2.0]}, index=pd.to_datetime(["2025-12-08", "2025-12-09"]))
+    df.attrs["source"] = "Cache 2025-12-09"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "run.json.gz")
+        recorder = Cassette()
+        recorder.record(path)
+        recorder.call("history", "NVDA", lambda: df, encode=encode_frame, decode=decode_frame)
+        recorder.save()
+
+        player = Cassette()
+        player.replay(path)
+        replayed = player.call("history", "NVDA", lambda: None, encode=encode_frame, decode=decode_frame)
+        assert replayed.attrs["source"] == "Cache 2025-12-09"
+        assert replayed["close"].tolist() == [1.0, 2.0]
+    # 早期录制 (没有 attrs) 照常解码
+    old = {"index": ["2025-12-09"], "columns": ["close"], "data": [[1.0]]}
+    assert decode_frame(old).attrs == {}
+
+
+if __name__ == "__main__":
+    test_record_then_replay()
+    test_async_call_shares_recording()
+    test_frame_keeps_source()
@@ -0,0 +1,104 @@
+# tests/test_circuit_breaker.py
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from circuit_breaker import CircuitBreaker, CircuitOpen, BreakerBoard, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _boom():
+    raise TimeoutError("read timed out")
+
+
+def test_trip_reject_and_recover():
+    print("🔌 [测试] 连续失败熔断 -> 拒绝 -> 半开探测恢复...")
+    clock = FakeClock()
+    breaker = CircuitBreaker("yahoo_rss", failure_threshold=3, reset_timeout=60, clock=clock)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return 200, b"<rss/>"
+
+    for _ in range(3):
+        try:
+            breaker.call(_boom)
+        except TimeoutError:
+            pass
+    assert breaker.state == OPEN
+
+    # 熔断期间不发请求，直接拒绝
+    try:
+        breaker.call(fetch)
+    except CircuitOpen:
+        pass
+    else:
+        raise AssertionError("熔断期间应拒绝调用")
+    assert calls == []
+
+    # 冷却后放行一次探测；探测失败 (非 200) 重新打开
+    clock.now = 61
+    breaker.call(lambda: (503, b""), failed=lambda r: r[0] != 200)
+    assert breaker.state == OPEN
+
+    clock.now = 122
+    assert breaker.call(fetch) == (200, b"<rss/>")
+    assert breaker.state == CLOSED and len(calls) == 1
+    assert breaker.snapshot()["trips"] == 2
+    print("✅ 熔断器正常")
+
+
+def test_half_open_allows_single_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker("gemini", failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 11
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+    # 探测还没返回时，其它线程的调用仍被拒绝
+    assert breaker.allow() is False
+
+
+def test_cancelled_async_probe_counts_as_failure():
+    breaker = CircuitBreaker("google_rss", failure_threshold=1, reset_timeout=0)
+
+    async def hang():
+        await asyncio.sleep(5)
+
+    async def run():
+        try:
+            await asyncio.wait_for(breaker.acall(hang), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(run())
+    assert breaker.snapshot()["failures"] == 1
+
+
+def test_board_summary_lists_every_source():
+    board = BreakerBoard(failure_threshold=2, reset_timeout=30)
+    board["options"].record_failure()
+    board["options"].record_failure()
+    summary = board.summary()
+    assert set(summary) >= {"yahoo_rss", "google_rss", "chart", "options", "info", "gemini", "webhook"}
+    assert summary["options"]["state"] == OPEN
+    assert "options" in board.format_table()
+    board.reset()
+    assert board.summary()["options"]["state"] == CLOSED
+
+
+if __name__ == "__main__":
+    test_trip_reject_and_recover()
+    test_half_open_allows_single_probe()
+    test_cancelled_async_probe_counts_as_failure()
+    test_board_summary_lists_every_source()
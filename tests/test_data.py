@@ -6,33 +6,27 @@ import json
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from data_engine import DataEngine
+from tests.live import live_or_replay, maybe_replay
 
 
+@live_or_replay
 def test_data_fetching():
     symbol = "TSLA"  # 用一个流动性好的股票测试
+    # 联网诊断: SENTINEL_LIVE=1 时真正联网；SENTINEL_REPLAY=<路径> 时回放 main.py --record 录的一整次运行
     print(f"🌍 [测试] 正在尝试从 OpenBB 获取 {symbol} 数据...")
-    print("    (这一步取决于网速和 API 限制，请耐心等待...)")
+    with maybe_replay():
+        engine = DataEngine()
+        data = engine.get_full_context(symbol)
 
-    engine = DataEngine()
-    data = engine.get_full_context(symbol)
+    assert data, "数据获取失败，返回为 None。请检查 FMP Key 或网络。"
+    print("\n✅ 数据获取成功！结构如下：")
+    print(json.dumps(data.to_dict(), indent=2, ensure_ascii=False))
 
-    if data:
-        print("\n✅ 数据获取成功！结构如下：")
-        print(json.dumps(data, indent=2, ensure_ascii=False))
-
-        # 简单断言检查
-        if data['quote']['price'] > 0:
-            print("\n✅ 价格数据正常")
-        else:
-            print("\n❌ 价格数据异常")
-
-        if data['technicals']['rsi'] > 0:
-            print("✅ 技术指标 (RSI) 计算正常")
-        else:
-            print("❌ 技术指标计算失败 (可能是 yfinance 网络问题)")
-    else:
-        print("\n❌ 数据获取失败，返回为 None。请检查 FMP Key 或网络。")
+    assert data.price > 0, "价格数据异常"
+    print("\n✅ 价格数据正常")
+    assert data.rsi > 0, "技术指标计算失败 (可能是 yfinance 网络问题)"
+    print("✅ 技术指标 (RSI) 计算正常")
 
 
 if __name__ == "__main__":
-    test_data_fetching()
\ No newline at end of file
+    test_data_fetching()
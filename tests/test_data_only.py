@@ -0,0 +1,74 @@
+# tests/test_data_only.py
+import sys
+import os
+import asyncio
+import io
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_engine import DataEngine
+from symbol_context import SymbolContext
+
+DELAYS = {"SLOW": 0.05, "FAST": 0.0, "BAD": 0.01, "MID": 0.02}
+
+
+class FakeEngine(DataEngine):
+    """不联网: aget_full_context 按设定的延迟返回，记录同时在途的标的数"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def aget_full_context(self, symbol, session=None, deadline=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(DELAYS.get(symbol, 0.01))
+        self.active -= 1
+        if symbol == "BAD":
+            return None
+        return SymbolContext(symbol, price=100.0, rsi=50)
+
+    def get_close_panel(self, symbols):
+        raise RuntimeError("离线测试不做跨标的分析")
+
+
+def _collect(engine, symbols, concurrency):
+    async def run():
+        return [ctx.symbol async for ctx in engine.astream_contexts(symbols, concurrency=concurrency)]
+
+    return asyncio.run(run())
+
+
+def test_streams_in_completion_order():
+    print("🔧 [测试] 先完成的标的先输出...")
+    engine = FakeEngine()
+    symbols = _collect(engine, ["SLOW", "FAST", "BAD", "MID"], concurrency=4)
+    # 没有数据的标的跳过，其余按完成顺序产出
+    assert symbols == ["FAST", "MID", "SLOW"]
+
+
+def test_bounded_in_flight():
+    print("🔧 [测试] 在途标的数不超过并发上限...")
+    engine = FakeEngine()
+    symbols = [f"S{i}" for i in range(50)]
+    assert sorted(_collect(engine, symbols, concurrency=3)) == sorted(symbols)
+    assert engine.peak <= 3
+
+
+def test_json_lines_output():
+    print("🔧 [测试] 每个标的一行 JSON...")
+    from main import run_data_only
+
+    out = io.StringIO()
+    run_data_only(FakeEngine(), ["FAST", "BAD", "MID"], out, deadline=None)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [line["symbol"] for line in lines] == ["FAST", "MID"]
+    assert lines[0]["technicals"]["rsi"] == 50
+    assert lines[0]["quote"]["change_pct"] is None
+
+
+if __name__ == "__main__":
+    test_streams_in_completion_order()
+    test_bounded_in_flight()
+    test_json_lines_output()
@@ -0,0 +1,71 @@
+# tests/test_deadline.py
+import sys
+import os
+import asyncio
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deadline import Deadline, DeadlineExceeded, wait_within
+from symbol_context import SymbolContext
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_budget_caps_every_stage():
+    print("⏱️ [测试] 时间预算截断各阶段超时...")
+    clock = FakeClock()
+    deadline = Deadline(100, clock=clock)
+    assert deadline.timeout(10) == 10
+
+    clock.now = 95
+    assert deadline.timeout(10) == 5
+    assert deadline.child(45).remaining() == 5
+    assert deadline.reserve(60).expired
+
+    clock.now = 99.5
+    try:
+        deadline.timeout(10)
+    except DeadlineExceeded:
+        pass
+    else:
+        raise AssertionError("剩余不足 1 秒时应拒绝开始新阶段")
+
+    assert Deadline().timeout(10) == 10  # 不限时只受阶段上限约束
+    print("✅ 时间预算正常")
+
+
+def test_slow_source_marked_missing():
+    print("⏱️ [测试] 慢数据源超时后返回部分结果...")
+
+    async def fast():
+        return 1.2
+
+    async def hang():
+        await asyncio.sleep(5)
+        return 950.0
+
+    async def run(budget):
+        start = time.perf_counter()
+        (pcr, _), (target, target_timed_out) = await asyncio.gather(
+            wait_within(fast(), budget), wait_within(hang(), budget))
+        missing = ["target_price"] if target_timed_out else []
+        return SymbolContext("NVDA", pcr=pcr, target_price=target, missing=missing), time.perf_counter() - start
+
+    ctx, elapsed = asyncio.run(run(Deadline(0.2)))
+    assert elapsed < 1.0
+    assert ctx.pcr == 1.2 and ctx.missing == ("target_price",)
+    assert ctx.show("target_price") == "N/A (超时)" and ctx.show("pcr") == "1.2"
+    assert SymbolContext.from_dict(ctx.to_dict()).missing == ("target_price",)
+    print("✅ 部分结果正常")
+
+
+if __name__ == "__main__":
+    test_budget_caps_every_stage()
+    test_slow_source_marked_missing()
@@ -0,0 +1,67 @@
+# tests/test_history_store.py
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import HistoryStore, find_databases, snapshot_from_context
+from symbol_context import SymbolContext
+from tests.mock_data import MOCK_CONTEXT
+
+
+def test_batched_append_and_queries():
+    print("🗄️ [测试] 运行历史库写入与查询...")
+    with tempfile.TemporaryDirectory() as tmp:
+        with HistoryStore(path=os.path.join(tmp, "history.db"), batch_size=2) as store:
+            for day, (rsi, pcr) in enumerate([(55.0, 0.8), (68.0, 1.3), (74.0, "N/A")], start=1):
+                record = dict(MOCK_CONTEXT.to_record(), symbol="NVDA", rsi=rsi, pcr=pcr)
+                data = SymbolContext.from_record(record)
+                ts = f"2025-12-0{day}T12:30:00+00:00"
+                store.add(snapshot_from_context(data, f"run{day}", f"2025-12-0{day}", "pre", ts,
+                                                insight="测试", latency_data=1.0, latency_ai=2.0))
+
+            assert [v for _, v in store.series("NVDA", "rsi")] == [55.0, 68.0, 74.0]
+            assert [v for _, v in store.series("NVDA", "rsi", limit=2)] == [68.0, 74.0]
+
+            high_pcr = store.where("pcr", ">", 1.2)
+            assert [r["run_id"] for r in high_pcr] == ["run2"]
+            # "N/A" 存成 NULL，不会被任何数值条件命中
+            assert store.latest("NVDA")["pcr"] is None
+
+            try:
+                store.where("pcr; DROP TABLE snapshots", ">", 1)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("非法字段名应被拒绝")
+    print("✅ 运行历史库正常")
+
+
+def test_merge_shard_databases():
+    print("🗄️ [测试] 各分片的历史库并入主库...")
+    with tempfile.TemporaryDirectory() as tmp:
+        shard_dir = os.path.join(tmp, "history-shards")
+        for shard, symbols in enumerate([["NVDA", "TSLA"], ["AAPL"]], start=1):
+            with HistoryStore(path=os.path.join(shard_dir, f"shard-{shard}.db")) as store:
+                for symbol in symbols:
+                    data = SymbolContext.from_record(dict(MOCK_CONTEXT.to_record(), symbol=symbol))
+                    store.add(snapshot_from_context(data, "2025-12-01_pre_x", "2025-12-01", "pre",
+                                                    "2025-12-01T12:30:00+00:00", insight=f"{symbol} 分片 {shard}"))
+
+        main_db = os.path.join(tmp, "sentinel.db")
+        with HistoryStore(path=main_db) as store:
+            # 不存在的分片 (该分片失败) 跳过
+            paths = find_databases([shard_dir, os.path.join(tmp, "missing.db")], exclude=main_db)
+            assert [os.path.basename(p) for p in paths] == ["shard-1.db", "shard-2.db"]
+            assert store.merge(paths) == 3
+            # 重复合并不产生重复行
+            assert store.merge(paths) == 0
+            assert store.latest("AAPL")["insight"] == "AAPL 分片 2"
+            assert store.conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0] == 3
+    print("✅ 分片历史库合并正常")
+
+
+if __name__ == "__main__":
+    test_batched_append_and_queries()
+    test_merge_shard_databases()
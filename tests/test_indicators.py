@@ -0,0 +1,94 @@
+# tests/test_indicators.py
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import indicators
+from indicators import IndicatorEngine, plan, label
+from backtest import wilder_rsi, wilder_atr
+from symbol_context import SymbolContext, ContextBatch
+
+
+def _bars(n_days=260, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0.0005, 0.015, n_days))
+    high = close * (1 + rng.uniform(0, 0.02, n_days))
+    low = close * (1 - rng.uniform(0, 0.02, n_days))
+    index = pd.bdate_range("2025-01-01", periods=n_days)
+    return pd.DataFrame({"open": close, "high": high, "low": low, "close": close,
+                         "volume": rng.integers(1e6, 2e6, n_days)}, index=index)
+
+
+def test_shared_intermediates_computed_once():
+    print("🔧 [测试] 共享中间结果只计算一次...")
+    calls = {"change": 0}
+    original = indicators.REGISTRY["change"]
+
+    def counting(close):
+        calls["change"] += 1
+        return original.fn(close)
+
+    indicators.REGISTRY["change"] = original._replace(fn=counting)
+    try:
+        engine = IndicatorEngine(_bars())
+        engine.compute(["rsi14", "weekly.rsi14"])
+        engine.compute(["rsi14"])
+    finally:
+        indicators.REGISTRY["change"] = original
+    # 日线和周线各一次，重复请求不再计算
+    assert calls["change"] == 2
+
+    order = plan(["rsi14", "atr14", "atr_pct"])
+    assert len(order) == len(set(order))
+    assert order.index(("daily", "true_range")) < order.index(("daily", "atr14")) < order.index(("daily", "atr_pct"))
+
+
+def test_matches_backtest_reference():
+    print("🔧 [测试] 与回测的 Wilder RSI / ATR 一致...")
+    bars = _bars()
+    values = IndicatorEngine(bars).compute(["rsi14", "atr14"])
+    column = lambda name: bars[[name]].to_numpy(dtype=np.float64)
+    rsi = wilder_rsi(column("close"))[:, 0]
+    atr = wilder_atr(column("high"), column("low"), column("close"))[:, 0]
+    assert np.allclose(values["rsi14"].to_numpy(), rsi, equal_nan=True)
+    assert np.allclose(values["atr14"].to_numpy(), atr, equal_nan=True)
+
+
+def test_weekly_resample():
+    print("🔧 [测试] 周线由日线重采样...")
+    bars = _bars()
+    engine = IndicatorEngine(bars)
+    weekly = engine.compute(["weekly.close"])["weekly.close"]
+    assert len(weekly) == bars.resample("W-FRI")["close"].last().dropna().shape[0]
+    assert weekly.iloc[-1] == bars["close"].iloc[-1]
+    assert label("weekly.rsi14") == "周线 RSI(14)"
+
+
+def test_context_round_trip():
+    print("🔧 [测试] 扩展指标随上下文序列化...")
+    values = IndicatorEngine(_bars()).latest(["sma50", "weekly.rsi14", "monthly.sma20"])
+    # 一年日线不够算月线 SMA20，明确为 NaN
+    assert np.isnan(values["monthly.sma20"])
+    ctx = SymbolContext("TEST", price=100, rsi=50, indicators=values)
+
+    data = ctx.to_dict()
+    assert data["technicals"]["weekly.rsi14"] == values["weekly.rsi14"]
+    assert data["technicals"]["monthly.sma20"] is None
+    again = SymbolContext.from_dict(data)
+    assert again.indicators["sma50"] == values["sma50"]
+    assert again.rsi == 50
+
+    row = ContextBatch.from_contexts([ctx]).row(0)
+    assert row.indicators["weekly.rsi14"] == values["weekly.rsi14"]
+    assert SymbolContext.from_record(ctx.to_record()).indicators["sma50"] == values["sma50"]
+
+
+if __name__ == "__main__":
+    test_shared_intermediates_computed_once()
+    test_matches_backtest_reference()
+    test_weekly_resample()
+    test_context_round_trip()
@@ -0,0 +1,53 @@
+# tests/test_journal.py
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_journal import RunJournal
+
+
+def test_resume_skips_finished_work():
+    print("♻️ [测试] 检查断点续跑日志...")
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = RunJournal("pre", run_date="2025-12-09", journal_dir=tmp)
+        journal.record("NVDA", "context", {"symbol": "NVDA", "quote": {"price": 140.0}})
+        journal.record("NVDA", "insight", "NVDA 分析")
+        journal.record("AAPL", "context", {"symbol": "AAPL"})
+
+        # 模拟进程在写最后一行时被杀
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('{"symbol": "MSFT", "sta')
+
+        resumed = RunJournal("pre", resume=True, run_date="2025-12-09", journal_dir=tmp)
+        assert resumed.get("NVDA", "insight") == "NVDA 分析"
+        assert resumed.get("AAPL", "context") == {"symbol": "AAPL"}
+        assert not resumed.done("AAPL", "insight")
+        assert not resumed.done("NVDA", "delivered")
+
+        # 不带 --resume 的新一轮运行会让旧记录失效
+        RunJournal("pre", run_date="2025-12-09", journal_dir=tmp)
+        fresh = RunJournal("pre", resume=True, run_date="2025-12-09", journal_dir=tmp)
+        assert not fresh.done("NVDA", "insight")
+    print("✅ 断点续跑日志正常")
+
+
+def test_forget_releases_payloads():
+    print("🧹 [测试] 处理完的标的释放内存里的记录...")
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = RunJournal("pre", run_date="2025-12-09", journal_dir=tmp)
+        journal.record("NVDA", "context", {"symbol": "NVDA"})
+        journal.record("NVDA", "insight", "NVDA 分析")
+        journal.forget("NVDA")
+        assert journal.get("NVDA", "context") is None
+        assert journal.done("NVDA", "insight")
+
+        # 文件里的记录不受影响，续跑照常复用
+        resumed = RunJournal("pre", resume=True, run_date="2025-12-09", journal_dir=tmp)
+        assert resumed.get("NVDA", "insight") == "NVDA 分析"
+
+
+if __name__ == "__main__":
+    test_resume_skips_finished_work()
+    test_forget_releases_payloads()
@@ -0,0 +1,105 @@
+# tests/test_loadtest.py
+import sys
+import os
+import urllib.error
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from circuit_breaker import breakers
+from config import Config
+from loadtest import StandInServer, FaultProfile, LoadHarness
+from metrics import percentile
+
+# 本地替身服务不走代理 (data_engine / ai_brain 导入时可能设置了 HTTP_PROXY)
+OPENER = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
+
+
+def test_standin_burst_429():
+    print("🧪 [测试] 替身服务的 429 风暴注入...")
+    server = StandInServer({"gemini": FaultProfile(burst_every=4, burst_len=2)}).start()
+    try:
+        statuses = []
+        for _ in range(8):
+            req = urllib.request.Request(f"{server.base_url}/v1beta/models/test:generateContent",
+                                         data=b"{}", method="POST")
+            try:
+                statuses.append(OPENER.open(req).status)
+            except urllib.error.HTTPError as e:
+                statuses.append(e.code)
+        assert statuses == [429, 429, 200, 200] * 2
+        assert server.stats["gemini"]["throttled"] == 4
+    finally:
+        server.stop()
+    print("✅ 429 风暴按配置注入")
+
+
+SYMBOLS = [f"SYM{i:04d}" for i in range(6)]
+PATCHED = ("IS_GITHUB", "YAHOO_RSS_URL", "GOOGLE_RSS_URL", "GEMINI_API_ENDPOINT", "GOOGLE_API_KEY",
+           "TEMPLATE_FAST_PATH", "AI_CALL_INTERVAL", "CACHE_DIR")
+
+
+def _harness_run(profiles, levels, symbols=SYMBOLS):
+    server = StandInServer(dict({"gemini": FaultProfile(payload=30)}, **profiles)).start()
+    try:
+        with LoadHarness(server, gemini_retry_delay=0.01, ai_interval=0) as harness:
+            return server, [harness.run(symbols, level) for level in levels]
+    finally:
+        server.stop()
+
+
+def test_harness_end_to_end():
+    print("🧪 [测试] 压测工具跑完整条流水线 (两个并发度) 并输出报告...")
+    before = {key: getattr(Config, key) for key in PATCHED}
+    no_proxy = os.environ.get("NO_PROXY")
+    # 期权接口全部 500，Gemini 每 3 个请求限流 1 个 (重试后成功)
+    server, reports = _harness_run({"options": FaultProfile(error_rate=1.0),
+                                    "gemini": FaultProfile(burst_every=3, burst_len=1, payload=30)}, [1, 2])
+
+    for level, report in zip([1, 2], reports):
+        assert report["concurrency"] == level and report["symbols"] == len(SYMBOLS)
+        assert report["processed"] == len(SYMBOLS) and report["failed"] == 0 and not report["skipped"]
+        assert report["elapsed"] > 0 and report["throughput"] > 0
+        summary = report["recorder"].summary()
+        for stage in ("data", "chart", "technicals", "news", "options", "fundamental", "macro",
+                      "gemini", "webhook", "total"):
+            s = summary[stage]
+            assert s["p50"] <= s["p95"] <= s["p99"], stage
+        for stage in ("data", "gemini", "total"):
+            assert summary[stage]["count"] == len(SYMBOLS)
+        # 注入的期权错误按标的计入 options 阶段 (熔断后的也算)，但不影响整条流水线
+        assert summary["options"]["errors"] == len(SYMBOLS)
+        assert summary["gemini"]["errors"] == 0
+        assert report["breakers"]["options"]["trips"] >= 1
+    assert server.stats["gemini"]["throttled"] > 0
+
+    # 构造时改写的全局配置都已恢复
+    assert {key: getattr(Config, key) for key in PATCHED} == before
+    assert os.environ.get("NO_PROXY") == no_proxy
+    # 压测中打开的熔断器不会留给后面的运行
+    assert all(s["state"] == "closed" for s in breakers.summary().values())
+    print("✅ 报告结构完整，注入的错误已计入")
+
+
+def test_harness_counts_failures():
+    print("🧪 [测试] Gemini 全部报错时记为失败...")
+    symbols = SYMBOLS[:3]
+    _, (report,) = _harness_run({"gemini": FaultProfile(error_rate=1.0, payload=30)}, [1], symbols)
+    assert report["failed"] == len(symbols)
+    assert sorted(symbol for symbol, _ in report["failures"]) == symbols
+    assert report["recorder"].summary()["gemini"]["errors"] == len(symbols)
+    print("✅ 失败标的已计入报告")
+
+
+if __name__ == "__main__":
+    test_percentile()
+    test_standin_burst_429()
+    test_harness_end_to_end()
+    test_harness_counts_failures()
@@ -0,0 +1,113 @@
+# tests/test_monitor.py
+import sys
+import os
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_brain import AIBrain
+from config import Config
+from monitor import IntradayMonitor, SymbolState, detect_triggers
+
+
+def _history(closes):
+    index = pd.date_range("2025-01-01", periods=len(closes), freq="B")
+    return pd.DataFrame({
+        "open": closes,
+        "high": [c * 1.01 for c in closes],
+        "low": [c * 0.99 for c in closes],
+        "close": closes,
+    }, index=index)
+
+
+def test_atr_stop_trigger_fires_once():
+    print("👀 [测试] 盘中跌破 ATR 止损位只触发一次...")
+    state = SymbolState("TEST", _history([100.0 + (i % 3) for i in range(60)]))
+    state.session = "2025-03-26"
+    stop = state.stop_price
+    assert stop < state.prev_close
+
+    before = state.update({"price": state.prev_close, "high": state.prev_close,
+                           "low": state.prev_close, "session": "2025-03-26"})
+    assert detect_triggers(state, *before) == []
+
+    crash = stop - 1
+    before = state.update({"price": crash, "high": state.prev_close, "low": crash, "session": "2025-03-26"})
+    kinds = [kind for kind, _ in detect_triggers(state, *before)]
+    assert "atr_stop" in kinds
+
+    # 继续停留在止损位下方不会重复触发
+    before = state.update({"price": crash - 0.5, "high": state.prev_close, "low": crash - 0.5,
+                           "session": "2025-03-26"})
+    assert "atr_stop" not in [kind for kind, _ in detect_triggers(state, *before)]
+    print("✅ 止损触发正常")
+
+
+def test_rsi_cross_overbought():
+    state = SymbolState("TEST", _history([100.0 + (i % 2) * 0.5 for i in range(60)]))
+    state.session = "2025-03-26"
+    before = state.update({"price": state.prev_close * 1.3, "high": state.prev_close * 1.3,
+                           "low": state.prev_close, "session": "2025-03-26"})
+    assert state.rsi > Config.RSI_OVERBOUGHT
+    assert "rsi" in [kind for kind, _ in detect_triggers(state, *before)]
+
+
+def test_news_burst_counts_all_new_titles():
+    print("👀 [测试] 新闻爆发按源里的全部标题计数，而不是 Prompt 里的前几条...")
+
+    class NewsEngine:
+        def __init__(self):
+            self.feeds = [["old strong beat", "old surge"],
+                          ["old strong beat", "old surge", "neutral a", "neutral b", "neutral c"]]
+
+        def _get_news(self, symbol):
+            titles = self.feeds.pop(0)
+            # Prompt 文本始终只有排名靠前的旧闻
+            return {"text": "- old strong beat [近期] (情绪 +0.71)\n- old surge [近期] (情绪 +0.71)",
+                    "score": 0.5, "count": len(titles), "titles": titles}
+
+    monitor = IntradayMonitor(NewsEngine(), None, formatter=None, deliver=None, symbols=["TEST"])
+    state = SymbolState("TEST", _history([100.0] * 30))
+    assert monitor._refresh_news(state, seed=True) == 0
+    assert monitor._refresh_news(state) == 3
+
+
+def test_alert_uses_intraday_prompt():
+    print("👀 [测试] 盘中触发用盘中模式的 Prompt，并以触发原因开头...")
+
+    class Engine:
+        def _get_fundamental_direct(self, symbol):
+            return 120.0
+
+    key = Config.GOOGLE_API_KEY
+    Config.GOOGLE_API_KEY = key or "test"
+    try:
+        brain = AIBrain()
+    finally:
+        Config.GOOGLE_API_KEY = key
+    prompts = []
+    brain._generate = lambda system, prompt, *args: prompts.append((system, prompt)) or ("盘中应对", "STOP")
+
+    sent = []
+    monitor = IntradayMonitor(Engine(), brain, formatter=lambda ticker, insight: insight,
+                              deliver=sent.extend, symbols=["TEST"])
+    state = SymbolState("TEST", _history([100.0 + (i % 3) for i in range(60)]))
+    monitor.states["TEST"] = state
+    reason = f"跌破 ATR 止损位 ${state.stop_price:.2f} (现价 $90.00)"
+    monitor.pending.append(("TEST", reason))
+    monitor._analyze_pending()
+
+    (system, prompt), = prompts
+    assert "盘中异动" in system
+    assert prompt.strip().startswith(f"盘中触发: {reason}")
+    assert "盘前交易计划" not in prompt
+    assert sent == [("TEST", f"**⚡ 触发原因**: {reason}\n\n盘中应对")]
+    print("✅ 盘中 Prompt 以触发原因开头")
+
+
+if __name__ == "__main__":
+    test_atr_stop_trigger_fires_once()
+    test_rsi_cross_overbought()
+    test_news_burst_counts_all_new_titles()
+    test_alert_uses_intraday_prompt()
@@ -0,0 +1,104 @@
+# tests/test_panel_store.py
+import sys
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from panel_store import PanelStore
+from bar_cache import BarCache
+from backtest import load_panel, prepare, evaluate, sweep
+
+
+def _frames(n_days=120, symbols=("AAA", "BBB", "CCC"), seed=3):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2025-01-01", periods=n_days)
+    frames = {}
+    for k, symbol in enumerate(symbols):
+        close = 100 * np.cumprod(1 + rng.normal(0, 0.01, n_days))
+        df = pd.DataFrame({"open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+                           "volume": rng.integers(1000, 2000, n_days).astype(float)}, index=index)
+        # 上市晚的标的前面没有数据
+        frames[symbol] = df.iloc[10 * k:]
+    return frames
+
+
+def _last_close(path, symbol):
+    panel = PanelStore(path=path).open()
+    return float(panel.bars(symbol)["close"].iloc[-1])
+
+
+def test_round_trip_is_memmap():
+    print("🔧 [测试] 面板文件写入 / memmap 读取...")
+    frames = _frames()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PanelStore(tmp)
+        panel = store.update(frames)
+        assert isinstance(panel.values, np.memmap)
+        assert panel.symbols == ["AAA", "BBB", "CCC"]
+        assert len(panel) == 120
+        assert np.isnan(panel.field("close")[0, 2])
+        pd.testing.assert_frame_equal(panel.bars("CCC"), frames["CCC"], check_freq=False, check_index_type=False)
+
+
+def test_append_new_sessions_only():
+    print("🔧 [测试] 新交易日追加到文件末尾...")
+    frames = _frames()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PanelStore(tmp)
+        store.update({s: df.iloc[:-5] for s, df in frames.items()})
+        size = os.path.getsize(store.path)
+        inode = os.stat(store.path).st_ino
+
+        panel = store.update(frames)
+        assert len(panel) == 120
+        # 追加而不是重写: 还是同一个文件，只多了 5 行
+        assert os.stat(store.path).st_ino == inode
+        row = 8 + 5 * 3 * 8
+        assert os.path.getsize(store.path) == size + 5 * row
+
+        # 历史被修订 (复权) 时整体重写
+        revised = {s: df * 2 for s, df in frames.items()}
+        panel = store.update(revised)
+        assert np.allclose(panel.bars("AAA")["close"], frames["AAA"]["close"] * 2)
+
+
+def test_workers_share_one_file():
+    print("🔧 [测试] 多个进程映射同一个面板文件...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PanelStore(tmp)
+        store.update(_frames())
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            closes = list(pool.map(_last_close, [store.path] * 3, ["AAA", "BBB", "CCC"]))
+        panel = store.open()
+        assert closes == [float(panel.bars(s)["close"].iloc[-1]) for s in ["AAA", "BBB", "CCC"]]
+
+
+def test_backtest_reads_panel_from_bar_cache():
+    print("🔧 [测试] 回测从日线缓存同步面板...")
+    frames = _frames(n_days=300)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = BarCache(tmp)
+        for symbol, df in frames.items():
+            cache.save(symbol, df)
+        panel = load_panel(["AAA", "BBB", "CCC", "MISSING"], cache)
+        assert panel["symbols"] == ["AAA", "BBB", "CCC"]
+        built = os.path.getmtime(os.path.join(tmp, "panel", "ohlcv.bin"))
+        # pickle 没变时第二次直接打开，不重建
+        load_panel(["AAA", "BBB", "CCC"], cache)
+        assert os.path.getmtime(os.path.join(tmp, "panel", "ohlcv.bin")) == built
+
+        prepared = prepare(panel)
+        grid = [(30, 70, 1.5), (35, 75, 2.0)]
+        assert sweep(prepared, grid, workers=2) == [evaluate(prepared, *p) for p in grid]
+
+
+if __name__ == "__main__":
+    test_round_trip_is_memmap()
+    test_append_new_sessions_only()
+    test_workers_share_one_file()
+    test_backtest_reads_panel_from_bar_cache()
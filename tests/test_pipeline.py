@@ -0,0 +1,123 @@
+# tests/test_pipeline.py
+import sys
+import os
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import ChunkedPipeline, MemoryGuard, format_memory
+
+
+class FakeGuard:
+    """替身内存检查: 在途标的数超过 cap 时报告超限"""
+
+    limit_mb = 1
+
+    def __init__(self, pipeline_ref, cap=0):
+        self.ref = pipeline_ref
+        self.cap = cap
+
+    def start(self):
+        return self
+
+    def over(self):
+        return self.ref[0].in_flight > self.cap
+
+    def stop(self):
+        return {"limit_mb": 1, "current_mb": None, "peak_rss_mb": None, "peak_traced_mb": None}
+
+
+def _run(symbols, analyze_delay=0.0, **kwargs):
+    persisted, chunks = [], []
+    ref = []
+
+    def analyze(symbol, item):
+        time.sleep(analyze_delay)
+        if symbol == "BOOM":
+            raise RuntimeError("analyze boom")
+        return f"{symbol}:{item}"
+
+    def persist(symbol, item, result):
+        persisted.append(result)
+
+    pipeline = ChunkedPipeline(kwargs.pop("fetch", lambda s: s.lower()), analyze, persist,
+                               on_chunk=chunks.append, **kwargs)
+    ref.append(pipeline)
+    if isinstance(pipeline.guard, FakeGuard):
+        pipeline.guard.ref = ref
+    stats = pipeline.run(symbols)
+    return stats, persisted, chunks
+
+
+def test_order_chunks_and_back_pressure():
+    print("🔧 [测试] 顺序 / 分块回调 / 有界队列背压...")
+    symbols = [f"S{i}" for i in range(23)]
+    stats, persisted, chunks = _run(symbols, analyze_delay=0.005, chunk_size=10, queue_size=2,
+                                    guard=MemoryGuard(limit_mb=0, trace=False))
+    assert persisted == [f"S{i}:s{i}" for i in range(23)]
+    assert chunks == [0, 1, 2] and stats["chunks"] == 3
+    assert stats["processed"] == 23 and stats["failed"] == 0
+    # 分析慢时抓取被队列挡住: 两个队列各 2 个 + 分析中 1 个 + 落盘中 1 个 + 刚抓完等待入队 1 个
+    assert stats["max_in_flight"] <= 2 * 2 + 3
+    assert stats["memory"]["peak_rss_mb"] is None or stats["memory"]["peak_rss_mb"] > 0
+
+
+def test_failures_are_isolated():
+    print("🔧 [测试] 单个标的出错不影响其它标的...")
+
+    def fetch(symbol):
+        if symbol == "NODATA":
+            return None
+        if symbol == "BAD":
+            raise ValueError("fetch boom")
+        return symbol.lower()
+
+    stats, persisted, _ = _run(["A", "BAD", "NODATA", "BOOM", "B"], fetch=fetch,
+                               guard=MemoryGuard(limit_mb=0, trace=False))
+    assert persisted == ["A:a", "B:b"]
+    assert stats["failed"] == 1 and stats["processed"] == 2
+
+
+def test_memory_cap_serializes_work():
+    print("🔧 [测试] 超出内存上限时只保留一个在途标的...")
+    stats, persisted, _ = _run([f"S{i}" for i in range(8)], analyze_delay=0.01, queue_size=4,
+                               guard=FakeGuard(None, cap=0))
+    assert len(persisted) == 8
+    assert stats["max_in_flight"] == 1
+    assert stats["memory_waits"] >= 1
+    assert "上限 1 MB" in format_memory(stats["memory"])
+
+
+def test_should_stop_skips_rest():
+    print("🔧 [测试] 预算用尽后剩下的标的记为跳过...")
+    processed = threading.Event()
+
+    def fetch(symbol):
+        if symbol == "S3":
+            processed.set()
+        return symbol
+
+    stats, persisted, chunks = _run([f"S{i}" for i in range(10)], fetch=fetch,
+                                    should_stop=processed.is_set, chunk_size=4,
+                                    guard=MemoryGuard(limit_mb=0, trace=False))
+    assert len(persisted) == 4
+    assert stats["skipped"] == [f"S{i}" for i in range(4, 10)]
+    assert chunks == [0, 1]
+
+
+def test_tracemalloc_report():
+    guard = MemoryGuard(limit_mb=0, trace=True).start()
+    blob = bytearray(2 * 2 ** 20)
+    report = guard.stop()
+    del blob
+    assert report["peak_traced_mb"] >= 2
+    assert "tracemalloc 峰值" in format_memory(report)
+
+
+if __name__ == "__main__":
+    test_order_chunks_and_back_pressure()
+    test_failures_are_isolated()
+    test_memory_cap_serializes_work()
+    test_should_stop_skips_rest()
+    test_tracemalloc_report()
@@ -0,0 +1,125 @@
+# tests/test_providers.py
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from providers import ProviderRouter, Provider, CacheProvider, normalize_bars, summarize_intraday
+
+
+def _bars(n_days=30, start="2026-01-01"):
+    index = pd.bdate_range(start, periods=n_days)
+    close = 100 + np.arange(n_days, dtype=float)
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1,
+                         "Close": close, "Adj Close": close, "Volume": 1e6}, index=index)
+
+
+class FakeProvider(Provider):
+    """不联网: 按设定的结果返回，记录被调用的次数"""
+
+    supports_quotes = True
+
+    def __init__(self, name, fail=False, empty=False, quotes=None):
+        self.name = self.label = name
+        self.fail = fail
+        self.empty = empty
+        self.quote_map = quotes or {}
+        self.calls = 0
+
+    def history(self, symbol, days):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError(f"{self.name} down")
+        return pd.DataFrame() if self.empty else _bars()
+
+    def quotes(self, symbols):
+        self.calls += 1
+        return {s: q for s, q in self.quote_map.items() if s in symbols}
+
+
+class FakeCache:
+    def __init__(self, df):
+        self.df = df
+
+    def load(self, symbol):
+        return self.df
+
+
+def test_normalize_shared_schema():
+    print("🔧 [测试] 各数据源的表统一成 open/high/low/close/volume...")
+    yf_style = _bars()
+    yf_style.columns = pd.MultiIndex.from_product([yf_style.columns, ["AAPL"]])
+    obb_style = _bars().rename(columns=str.lower).drop(columns="adj close")
+    obb_style = obb_style.iloc[::-1].reset_index(names="date")
+    obb_style["date"] = obb_style["date"].dt.date
+
+    a, b = normalize_bars(yf_style), normalize_bars(obb_style)
+    assert list(a.columns) == ["open", "high", "low", "close", "volume"]
+    pd.testing.assert_frame_equal(a, b, check_index_type=False, check_freq=False)
+    assert a.index.is_monotonic_increasing
+    assert normalize_bars(pd.DataFrame()) is None
+
+    intraday = _bars(3).iloc[:, :5]
+    intraday.index = pd.date_range("2026-03-02 14:30", periods=3, freq="min", tz="UTC")
+    quote = summarize_intraday(intraday)
+    assert quote == {"price": 102.0, "high": 103.0, "low": 99.0, "session": "2026-03-02"}
+
+
+def test_failover_and_health():
+    print("🔧 [测试] 失败自动切换，错误率高的数据源排到后面...")
+    down, backup = FakeProvider("down", fail=True), FakeProvider("backup")
+    router = ProviderRouter([down, backup])
+
+    df = router.history("AAPL")
+    assert df is not None and df.attrs["source"] == "backup"
+    assert list(df.columns) == ["open", "high", "low", "close", "volume"]
+
+    for _ in range(3):
+        router.history("AAPL")
+    # 连续失败后 down 不再被优先尝试
+    assert router.ranked()[0] is backup
+    assert down.calls == 3
+    assert router.summary()["down"]["error_rate"] == 1.0
+
+
+def test_routes_to_fastest():
+    print("🔧 [测试] 健康的数据源里选平均延迟最低的...")
+    slow, fast = FakeProvider("slow"), FakeProvider("fast")
+    router = ProviderRouter([slow, fast])
+    router.stats["slow"].record(0.8, True)
+    router.stats["fast"].record(0.1, True)
+    assert router.history("AAPL").attrs["source"] == "fast"
+    assert (slow.calls, fast.calls) == (0, 1)
+
+    # 还没有记录的数据源先试一次
+    fresh = FakeProvider("fresh")
+    router = ProviderRouter([slow, fresh])
+    router.stats["slow"].record(0.1, True)
+    assert router.ranked()[0] is fresh
+
+
+def test_cache_fallback_and_quotes():
+    print("🔧 [测试] 在线数据源全部失败时用缓存兜底；报价缺的标的由下一个数据源补齐...")
+    cached = normalize_bars(_bars())
+    router = ProviderRouter([FakeProvider("down", fail=True), FakeProvider("empty", empty=True)],
+                            fallback=CacheProvider(FakeCache(cached)))
+    df = router.history("AAPL", days=10_000)
+    assert df.attrs["source"].startswith("Cache")
+    assert len(df) == len(cached)
+
+    quote = {"price": 1.0, "high": 1.0, "low": 1.0, "session": "2026-03-02"}
+    first = FakeProvider("first", quotes={"AAPL": quote})
+    second = FakeProvider("second", quotes={"AAPL": dict(quote, price=2.0), "MSFT": quote})
+    quotes = ProviderRouter([first, second]).quotes(["AAPL", "MSFT", "NONE"])
+    assert quotes["AAPL"]["price"] == 1.0 and quotes["MSFT"] == quote
+    assert "NONE" not in quotes
+
+
+if __name__ == "__main__":
+    test_normalize_shared_schema()
+    test_failover_and_health()
+    test_routes_to_fastest()
+    test_cache_fallback_and_quotes()
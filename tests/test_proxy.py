@@ -1,30 +1,45 @@
-import yfinance as yf
-import requests
+# tests/test_proxy.py
+# 代理连通性诊断 (联网): 直接运行本文件，或 SENTINEL_LIVE=1 时由 pytest 运行
+import sys
+import os
 
-# 你的端口
-PROXY_URL = "http://127.0.0.1:10809"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from tests.live import live_only
+
+# 你的端口 (config.py 里的 LOCAL_PROXY)
+PROXY_URL = Config.LOCAL_PROXY
+
+
+@live_only
+def test_requests_via_proxy():
+    print(f"🔧 [测试] 1. 测试 requests 连通性 (代理: {PROXY_URL})...")
+    import requests
 
-print(f"1. 测试 requests 连通性 (代理: {PROXY_URL})...")
-try:
     # 先测能不能访问 Google，验证代理本身是通的
     resp = requests.get("https://www.google.com", proxies={"http": PROXY_URL, "https": PROXY_URL}, timeout=5)
+
+    assert resp.status_code == 200, "代理连不通！请检查你的梯子软件是否开启，端口是不是写错了？"
     print(f"✅ 代理连通成功！状态码: {resp.status_code}")
-except Exception as e:
-    print(f"❌ 代理连不通！请检查你的梯子软件是否开启，端口是不是写错了？\n错误: {e}")
-    exit()
 
-print("\n2. 测试 yfinance 下载...")
-try:
+
+@live_only
+def test_yfinance_download():
+    print("\n🔧 [测试] 2. 测试 yfinance 下载...")
+    import yfinance as yf
+
     # 显式配置 yfinance
     yf.set_config(proxy=PROXY_URL)
+    # 下载数据 (单个标的，列名只保留 Close / High ...)
+    df = yf.download("TSLA", period="1d", progress=False, multi_level_index=False)
+
+    assert df is not None and not df.empty, "yfinance 返回为空 (但没报错)。"
+    assert df["Close"].iloc[-1] > 0
+    print("✅ yfinance 下载成功！")
+    print(df)
 
-    # 下载数据
-    df = yf.download("TSLA", period="1d", progress=False)
 
-    if not df.empty:
-        print("✅ yfinance 下载成功！")
-        print(df)
-    else:
-        print("❌ yfinance 返回为空 (但没报错)。")
-except Exception as e:
-    print(f"❌ yfinance 报错: {e}")
\ No newline at end of file
+if __name__ == "__main__":
+    test_requests_via_proxy()
+    test_yfinance_download()
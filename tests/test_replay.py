@@ -0,0 +1,97 @@
+# tests/test_replay.py
+import sys
+import os
+import subprocess
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from cassette import cassette
+from config import Config
+from loadtest import StandInServer, StandInEngine, FaultProfile, LoadHarness
+from metrics import LatencyRecorder
+from report_template import FALLBACK_TAG, TEMPLATE_TAG
+from shard import artifact_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _record(server, path, workdir):
+    """
+    录制: main.py pre --record 在进程内对着本地替身服务跑完整条流水线 (写真实的 cassette 文件)
+    yfinance 没有可配置的服务地址，下载点由压测用的 StandInEngine 接到替身服务，其余 (RSS / Gemini) 按 Config 地址请求
+    """
+    saved_cassette = (cassette.mode, cassette.path, cassette.entries, cassette.meta, cassette.counters)
+    saved_engine, saved_argv = main.DataEngine, sys.argv
+    dirs = {key: os.path.join(workdir, "record", name) for key, name in
+            (("ARTIFACT_DIR", "artifacts"), ("JOURNAL_DIR", "journal"), ("HISTORY_DB", "history/sentinel.db"))}
+    saved_dirs = {key: getattr(Config, key) for key in dirs}
+    with LoadHarness(server, ai_interval=0) as harness:
+        for key, value in dirs.items():
+            setattr(Config, key, value)
+        main.DataEngine = lambda: StandInEngine(harness.base_url, LatencyRecorder())
+        sys.argv = ["main.py", "pre", "--record", path, "--force", "--shard", "1/1"]
+        try:
+            main.main()
+            cassette.save()
+        finally:
+            main.DataEngine, sys.argv = saved_engine, saved_argv
+            for key, value in saved_dirs.items():
+                setattr(Config, key, value)
+            (cassette.mode, cassette.path, cassette.entries, cassette.meta, cassette.counters) = saved_cassette
+    return artifact_path("pre", 1, 1, dirs["ARTIFACT_DIR"])
+
+
+def _replay(path, workdir, base_url):
+    """回放: 子进程里原样执行 python main.py pre --replay (替身服务此时已关闭，任何联网都会失败)"""
+    env = dict(os.environ,
+               GITHUB_ACTIONS="true",
+               SENTINEL_TEMPLATE_FAST_PATH="0",
+               # RSS 地址是录制记录的键，必须与录制时一致
+               YAHOO_RSS_URL=f"{base_url}/rss/yahoo?s={{symbol}}",
+               GOOGLE_RSS_URL=f"{base_url}/rss/google?q={{symbol}}+stock",
+               SENTINEL_ARTIFACT_DIR=os.path.join(workdir, "replay", "artifacts"),
+               SENTINEL_JOURNAL_DIR=os.path.join(workdir, "replay", "journal"),
+               SENTINEL_HISTORY_DB=os.path.join(workdir, "replay", "history", "sentinel.db"),
+               SENTINEL_CACHE_DIR=os.path.join(workdir, "replay", "cache"))
+    env.pop("GOOGLE_API_KEY", None)
+    result = subprocess.run([sys.executable, "main.py", "pre", "--replay", path, "--force", "--shard", "1/1"],
+                            cwd=ROOT, env=env, capture_output=True, text=True, timeout=300)
+    return result, artifact_path("pre", 1, 1, env["SENTINEL_ARTIFACT_DIR"])
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_replay_reproduces_recorded_run():
+    print("📼 [测试] main.py pre --record 录制一整次运行，再用 main.py pre --replay 离线回放...")
+    server = StandInServer({"gemini": FaultProfile(payload=30)}).start()
+    base_url = server.base_url
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "run.json.gz")
+        try:
+            recorded = _read(_record(server, path, workdir))
+            requests_made = {name: stats["requests"] for name, stats in server.stats.items()}
+        finally:
+            server.stop()
+
+        # 录制确实经过了替身服务，每个标的都拿到了 Gemini 的分析
+        assert len(recorded) == len(Config.WATCHLIST)
+        for service in ("chart", "options", "quote", "rss"):
+            assert requests_made[service] > 0, service
+        assert requests_made["gemini"] >= len(Config.WATCHLIST)
+        assert not any(FALLBACK_TAG in line or TEMPLATE_TAG in line for line in recorded)
+
+        result, replay_artifact = _replay(path, workdir, base_url)
+        assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-2000:]
+        assert "回放模式" in result.stdout
+        # 回放不调用任何外部服务，产出与录制时逐字节相同 (报告时间取自录制时的时钟)
+        assert _read(replay_artifact) == recorded
+    print("✅ 回放结果与录制完全一致")
+
+
+if __name__ == "__main__":
+    test_replay_reproduces_recorded_run()
@@ -0,0 +1,93 @@
+# tests/test_report_template.py
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_template import render, render_fallback, is_low_signal, risk_rating, TEMPLATE_TAG, FALLBACK_TAG
+from symbol_context import SymbolContext
+from tests.mock_data import MOCK_CONTEXT
+
+
+def _quiet(symbol="QUIET"):
+    return SymbolContext(symbol, price=100.0, change_pct=0.3, rsi=52, atr=2.0, sma20=98.0,
+                         pcr=0.9, pressure=110, target_price=120, spy_change=0.1, qqq_change=0.2,
+                         news="- 平淡的新闻 [Mon, 01 Jan 2026]")
+
+
+def test_four_sections_from_fields():
+    print("🔧 [测试] 模板报告四段式结构...")
+    pre = render(MOCK_CONTEXT, "pre")
+    assert pre.startswith(TEMPLATE_TAG)
+    for title in ("消息面解读", "宏观与情绪", "关键博弈点", "操作策略"):
+        assert title in pre
+    assert "超买区" in pre
+    assert "873.88" in pre  # 止损 = 888.88 - 1.5 × 10
+    assert "+1.25%" in pre  # 压力位 900 距现价
+
+    post = render(MOCK_CONTEXT.to_dict(), "post")
+    for title in ("复盘归因", "趋势与形态", "持仓体检", "明日剧本"):
+        assert title in post
+    assert "跑赢 QQQ 3.30%" in post
+    assert "上方 11.11%" in post
+
+
+def test_monitor_leads_with_trigger():
+    print("🔧 [测试] 盘中模板以触发原因开头...")
+    ctx = _quiet()
+    ctx.trigger = "RSI 上穿超买线 70 (当前 71.2)"
+    text = render(ctx, "monitor")
+    header, trigger = text.splitlines()[:2]
+    assert header.endswith("盘中异动")
+    assert trigger == "⚡ 触发: RSI 上穿超买线 70 (当前 71.2)"
+    for title in ("触发解读", "大盘配合", "关键价位", "即时操作"):
+        assert title in text
+    assert "盘前计划" not in text and "明日剧本" not in text
+
+
+def test_missing_fields_render_na():
+    print("🔧 [测试] 缺失字段显示 N/A...")
+    ctx = SymbolContext("GAP", price=50.0, missing=("news", "pcr", "pressure"))
+    text = render(ctx, "post")
+    assert "新闻获取超时" in text
+    assert "N/A (超时)" in text
+    assert risk_rating(ctx) == ("低", "各项指标平稳")
+
+
+def test_low_signal_and_fallback():
+    print("🔧 [测试] 平淡信号判定 / 降级报告...")
+    assert is_low_signal(_quiet())
+    assert not is_low_signal(MOCK_CONTEXT)
+    triggered = _quiet()
+    triggered.trigger = "RSI 上穿 70"
+    assert not is_low_signal(triggered)
+    # 标题情绪强烈时交给 AI
+    charged = _quiet()
+    charged.news_score = -0.7
+    assert not is_low_signal(charged)
+    assert "标题情绪偏空 (-0.70)" in render(charged, "pre")
+
+    fallback = render_fallback(_quiet(), "pre", "❌ 分析失败: 触发 API 速率限制 (429)")
+    assert "分析失败: 触发 API 速率限制 (429)" in fallback
+    assert "操作策略" in fallback
+    # 以 FALLBACK_TAG 开头，ai_brain.is_failed_insight 视为失败 (续跑时重试 AI)
+    assert fallback.startswith(FALLBACK_TAG)
+
+
+def test_thousands_per_second():
+    contexts = [_quiet(f"S{i}") for i in range(5000)]
+    start = time.perf_counter()
+    for ctx in contexts:
+        render(ctx, "post")
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ 5000 份模板报告: {elapsed * 1000:.0f} ms")
+    assert elapsed < 2.0
+
+
+if __name__ == "__main__":
+    test_four_sections_from_fields()
+    test_monitor_leads_with_trigger()
+    test_missing_fields_render_na()
+    test_low_signal_and_fallback()
+    test_thousands_per_second()
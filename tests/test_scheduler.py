@@ -0,0 +1,91 @@
+# tests/test_scheduler.py
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import priority_inputs, score, prioritize
+
+
+def _closes(n_days=60):
+    """FLAT 横盘小幅波动，UP 持续上涨 (RSI 极高)，其余同 FLAT"""
+    rng = np.random.default_rng(5)
+    index = pd.bdate_range("2026-01-01", periods=n_days)
+    flat = 100 + np.cumsum(rng.normal(0, 0.3, n_days))
+    return pd.DataFrame({
+        "FLAT": flat,
+        "GAP": flat,
+        "NEWS": flat,
+        "UP": 100 * 1.01 ** np.arange(n_days),
+    }, index=index)
+
+
+def _quote(price, day):
+    return {"price": price, "high": price, "low": price, "session": day.date().isoformat()}
+
+
+def test_inputs_use_prior_session_close():
+    print("🔧 [测试] 跳空按报价所在交易日之前的收盘价计算...")
+    closes = _closes()
+    today = closes.index[-1] + pd.offsets.BDay()
+    quotes = {"GAP": _quote(closes["GAP"].iloc[-1] * 0.95, today),
+              # 盘后报价和日线同一天：用前一天的收盘
+              "FLAT": _quote(closes["FLAT"].iloc[-1], closes.index[-1])}
+    inputs = priority_inputs(closes, quotes, {"NEWS": 6})
+    assert round(inputs.loc["GAP", "gap_pct"], 6) == -5.0
+    assert inputs.loc["FLAT", "prev_close"] == closes["FLAT"].iloc[-2]
+    assert inputs.loc["UP", "rsi"] == 100.0
+    assert inputs.loc["NEWS", "news"] == 6
+    assert np.isnan(inputs.loc["FLAT", "news"])
+
+
+def test_priority_order():
+    print("🔧 [测试] 跳空 / 逼近止损 / RSI 极值 / 新闻多的排在前面...")
+    closes = _closes()
+    today = closes.index[-1] + pd.offsets.BDay()
+    quotes = {s: _quote(closes[s].iloc[-1], today) for s in closes.columns}
+    quotes["GAP"] = _quote(closes["GAP"].iloc[-1] * 0.95, today)
+    scores = score(priority_inputs(closes, quotes, {"NEWS": 6}))
+
+    # 大幅低开: gap 满分，并且跌破了 ATR 止损线
+    assert scores.loc["GAP", "gap"] == 1.0
+    assert scores.loc["GAP", "stop"] == 1.0
+    assert scores.loc["UP", "rsi"] == 1.0
+    assert scores.loc["NEWS", "news"] == 1.0
+
+    order = prioritize(["FLAT", "NEWS", "UP", "GAP", "UNKNOWN"], scores)
+    assert order[0] == "GAP"
+    # 没有任何信号的、面板里没有的排在最后，且保持原顺序
+    assert order[-2:] == ["FLAT", "UNKNOWN"]
+
+
+def test_batches_sent_while_running():
+    print("🔧 [测试] 攒满一批立即推送...")
+    from main import BatchSender
+
+    class Recorder:
+        def __init__(self):
+            self.sent = []
+
+        def send(self, content, msg_type="text", deadline=None):
+            self.sent.append(content)
+            return True
+
+    notifier = Recorder()
+    sender = BatchSender(notifier, "pre")
+    sender.add("A", "a" * 1000)
+    assert notifier.sent == []
+    sender.add("B", "b" * 1000)
+    # 第二条放不下，第一批已经发出，不等运行结束
+    assert len(notifier.sent) == 1 and "a" * 1000 in notifier.sent[0]
+    sender.close()
+    assert len(notifier.sent) == 2 and notifier.sent[1].startswith("【PRE 汇总 (2) - 完】")
+
+
+if __name__ == "__main__":
+    test_inputs_use_prior_session_close()
+    test_priority_order()
+    test_batches_sent_while_running()
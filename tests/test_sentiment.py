@@ -0,0 +1,80 @@
+# tests/test_sentiment.py
+import sys
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentiment import lexicon_scores, summarize_news, parse_published
+
+NOW = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def test_lexicon_polarity_and_negation():
+    print("🔧 [测试] 词典打分 / 否定词反向...")
+    scores = lexicon_scores([
+        "NVDA beats estimates, shares surge",
+        "Tesla misses deliveries as demand slumps",
+        "Apple shares not a miss this quarter",
+        "Microsoft to hold annual meeting",
+        "",
+    ])
+    assert scores[0] > 0.8
+    assert scores[1] < -0.5
+    assert scores[2] > 0
+    assert scores[3] == 0 and scores[4] == 0
+    assert np.all(np.abs(scores) < 1)
+
+
+def test_selects_informative_headlines():
+    print("🔧 [测试] 按相关度 / 时效 / 情绪强度挑选标题...")
+    items = {
+        "NVDA": [
+            ("Chip stocks to watch this week", "Tue, 10 Mar 2026 11:00:00 GMT"),
+            ("NVDA upgraded to outperform, shares jump", "Tue, 10 Mar 2026 10:00:00 GMT"),
+            ("NVDA beats estimates", "Mon, 02 Mar 2026 10:00:00 GMT"),
+            ("Nvidia faces antitrust probe in EU", "Tue, 10 Mar 2026 09:00:00 GMT"),
+            ("Market wrap", ""),
+        ],
+        "AAPL": [("AAPL holds event", "Tue, 10 Mar 2026 08:00:00 GMT")],
+    }
+    digests = summarize_news(items, NOW, limit=2)
+    nvda = digests["NVDA"]
+    lines = nvda["text"].splitlines()
+    assert nvda["count"] == 5 and len(lines) == 2
+    assert lines[0].startswith("- NVDA upgraded to outperform, shares jump [Tue, 10 Mar 2026]")
+    assert "antitrust probe" in lines[1]
+    # 一周前的旧闻衰减后排不进前两条
+    assert "beats estimates" not in nvda["text"]
+    assert -1 < nvda["score"] < 1
+
+    assert digests["AAPL"]["score"] == 0.0
+    assert "(情绪 +0.00)" in digests["AAPL"]["text"]
+    assert summarize_news({"EMPTY": []}, NOW) == {}
+
+
+def test_parse_published():
+    assert parse_published("Tue, 10 Mar 2026 10:00:00 GMT").hour == 10
+    assert parse_published("Tue, 10 Mar 2026 10:00:00 +0800").hour == 2
+    assert parse_published("近期") is not None and str(parse_published("近期")) == "NaT"
+
+
+def test_universe_batch_speed():
+    items = {f"S{i}": [(f"S{i} beats estimates as revenue growth accelerates {j}", "Tue, 10 Mar 2026 10:00:00 GMT")
+                       for j in range(20)] for i in range(500)}
+    start = time.perf_counter()
+    digests = summarize_news(items, NOW)
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ 500 个标的 × 20 条标题: {elapsed * 1000:.0f} ms")
+    assert len(digests) == 500
+    assert elapsed < 5.0
+
+
+if __name__ == "__main__":
+    test_lexicon_polarity_and_negation()
+    test_selects_informative_headlines()
+    test_parse_published()
+    test_universe_batch_speed()
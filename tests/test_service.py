@@ -0,0 +1,154 @@
+# tests/test_service.py
+import sys
+import os
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from service import SentinelService, ServiceServer, SingleFlight, TTLCache
+from symbol_context import SymbolContext
+
+
+class FakeEngine:
+    """替身上游: 每次抓取耗时 delay 秒，记录真实调用次数"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_full_context(self, symbol, deadline=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if symbol == "NONE":
+            return None
+        return SymbolContext(symbol, price=100.0 + self.calls, rsi=55)
+
+
+class FakeBrain:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    def analyze(self, ctx, mode="pre", deadline=None):
+        self.calls += 1
+        return "❌ 分析失败" if self.fail else f"{ctx.symbol} {mode} 报告 @ {ctx.price}"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# 本地服务不走代理 (data_engine 导入时可能设置了 HTTP_PROXY)
+OPENER = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+def _get(server, path):
+    try:
+        with OPENER.open(f"{server.base_url}{path}") as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def _failed(text):
+    return text.startswith("❌")
+
+
+def test_singleflight_and_ttl():
+    print("🔧 [测试] singleflight 合并 / TTL 过期...")
+    flights = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return "ok"
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: flights.do("k", slow), range(8)))
+    assert len(calls) == 1
+    assert all(r == "ok" for r, _ in results)
+    assert sum(shared for _, shared in results) == 7
+
+    clock = Clock()
+    cache = TTLCache(10, clock)
+    cache.set("a", 1)
+    clock.now = 9
+    assert cache.get("a") == (1, 9)
+    clock.now = 11
+    assert cache.get("a") is None
+
+
+def test_http_coalesces_concurrent_requests():
+    print("🔧 [测试] 同一标的的并发请求只打一次上游...")
+    engine = FakeEngine()
+    server = ServiceServer(SentinelService(engine, FakeBrain(), is_failed=_failed), port=0).start()
+    try:
+        with ThreadPoolExecutor(10) as pool:
+            responses = list(pool.map(lambda _: _get(server, "/context/aapl"), range(10)))
+        assert engine.calls == 1
+        assert all(status == 200 for status, _ in responses)
+        assert {body["quote"]["price"] for _, body in responses} == {101.0}
+        assert sum(body["coalesced"] for _, body in responses) >= 1
+
+        # 缓存期内直接返回
+        status, body = _get(server, "/context/AAPL")
+        assert body["cached"] and engine.calls == 1
+
+        metrics = _get(server, "/metrics")[1]["context"]
+        assert metrics["requests"] == 11 and metrics["upstream"] == 1
+        assert metrics["cache_hits"] + metrics["coalesced"] == 10
+        assert metrics["p95_ms"] >= 0
+    finally:
+        server.stop()
+
+
+def test_analysis_cache_follows_context():
+    print("🔧 [测试] 报告缓存随上下文刷新失效，失败的报告不缓存...")
+    clock = Clock()
+    engine, brain = FakeEngine(delay=0), FakeBrain()
+    service = SentinelService(engine, brain, context_ttl=60, analysis_ttl=600, is_failed=_failed, clock=clock)
+
+    first = service.analysis("NVDA", "post")
+    assert service.analysis("NVDA", "post")["cached"]
+    assert brain.calls == 1
+    # 上下文过期重新抓取后，报告也要重新生成
+    clock.now = 61
+    second = service.analysis("NVDA", "post")
+    assert brain.calls == 2 and first["insight"] != second["insight"]
+
+    failing = SentinelService(FakeEngine(delay=0), FakeBrain(fail=True), is_failed=_failed)
+    failing.analysis("TSLA")
+    failing.analysis("TSLA")
+    assert failing.brain.calls == 2
+
+
+def test_http_errors():
+    print("🔧 [测试] 无效代码 / 上游无数据 / 未知路径...")
+    server = ServiceServer(SentinelService(FakeEngine(delay=0)), port=0).start()
+    try:
+        assert _get(server, "/context/NONE")[0] == 502
+        assert _get(server, "/context/bad$sym")[0] == 400
+        assert _get(server, "/analysis/AAPL")[0] == 404  # 没有 brain
+        assert _get(server, "/nothing")[0] == 404
+        assert _get(server, "/health") == (200, {"status": "ok"})
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    test_singleflight_and_ttl()
+    test_http_coalesces_concurrent_requests()
+    test_analysis_cache_follows_context()
+    test_http_errors()
@@ -0,0 +1,135 @@
+# tests/test_session_delta.py
+import sys
+import os
+import math
+import tempfile
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_delta import SessionSnapshots, baseline_from, delta_context, published_since, session_deltas
+from symbol_context import SymbolContext
+
+SESSION = date(2026, 3, 10)
+PRE_TS = "2026-03-10T12:30:00+00:00"
+
+
+def test_snapshots_roundtrip_and_prune():
+    print("🔧 [测试] 盘前快照写入 / 读取 / 清理...")
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshots = SessionSnapshots(tmp)
+        snapshots.save(SESSION, SymbolContext("NVDA", price=100.0, rsi=55), PRE_TS)
+        snapshots.save(SESSION, SymbolContext("AAPL", price=200.0), PRE_TS)
+        # 续跑时同一标的再写一次，以最后一行为准
+        snapshots.save(SESSION, SymbolContext("NVDA", price=101.0, rsi=56), PRE_TS)
+        with open(snapshots.path(SESSION), "a", encoding="utf-8") as f:
+            f.write('{"symbol": "MSFT", "ts"')
+
+        loaded = snapshots.load(SESSION, symbols=["NVDA", "MSFT"])
+        assert list(loaded) == ["NVDA"]
+        ts, data = loaded["NVDA"]
+        assert ts == PRE_TS and SymbolContext.from_dict(data).price == 101.0
+        assert snapshots.load(date(2026, 3, 11)) == {}
+
+        snapshots.save(date(2026, 3, 1), SymbolContext("OLD"), PRE_TS)
+        snapshots.prune(SESSION, keep_days=7)
+        assert os.listdir(snapshots.dir) == ["2026-03-10_pre.jsonl"]
+
+
+def test_deltas_and_compact_prompt():
+    print("🔧 [测试] 盘前 → 收盘的变化和精简 Prompt...")
+    pre = SymbolContext("NVDA", price=100.0, rsi=55.0, pcr=0.8, pressure=110, news_score=0.2)
+    post = SymbolContext("NVDA", price=104.0, change_pct=4.0, rsi=63.5, pcr=float("nan"), pressure=115,
+                         news_score=0.6, news="- NVDA beats estimates [Tue, 10 Mar 2026] (情绪 +0.71)",
+                         session=dict(baseline_from(pre, PRE_TS), new_headlines=2))
+    deltas = session_deltas(post)
+    assert deltas["price_pct"] == 4.0 and deltas["rsi"] == 8.5 and deltas["new_headlines"] == 2
+    assert math.isnan(deltas["pcr"])
+    assert deltas["news_score"] == 0.4
+
+    text = delta_context(post)
+    assert "$100.0 → $104.0 (+4.00%)" in text
+    assert "PCR: 0.8 → N/A (N/A)" in text
+    assert "新标题 2 条" in text and "beats estimates" in text
+
+    # 基线随上下文一起序列化 (断点续跑日志)
+    restored = SymbolContext.from_dict(post.to_dict())
+    assert restored.session["price"] == 100.0 and restored.session["new_headlines"] == 2
+    assert "session" not in SymbolContext("AAPL").to_dict()
+
+    quiet = SymbolContext("AAPL", price=1.0, news="旧闻", session=baseline_from(SymbolContext("AAPL"), PRE_TS))
+    assert "盘前快照之后没有新标题" in delta_context(quiet)
+
+
+def _bars(days, close):
+    index = pd.DatetimeIndex(days)
+    return pd.DataFrame({"open": close, "high": close, "low": close, "close": close, "volume": 1e6}, index=index)
+
+
+def test_history_topup_and_new_headlines():
+    print("🔧 [测试] 日线只补最近几天 / 新闻只看快照之后...")
+    from bar_cache import BarCache
+    from data_engine import DataEngine
+
+    today = pd.Timestamp(datetime.now(timezone.utc).date())
+    old_days = pd.bdate_range(end=today - pd.Timedelta(days=3), periods=250)
+    new_days = pd.bdate_range(start=old_days[-3], end=today)
+
+    class Closed:
+        def is_open(self, moment):
+            return False
+
+    class NoPanel:
+        def open(self):
+            return None
+
+    class Router:
+        def __init__(self, frame):
+            self.frame = frame
+            self.days = []
+
+        def history(self, symbol, days=None):
+            self.days.append(days)
+            df = self.frame.copy()
+            df.attrs["source"] = "YFinance"
+            return df
+
+    class Engine(DataEngine):
+        def __init__(self, tmp, frame):
+            self.calendar = Closed()
+            self.panel_store = NoPanel()
+            self.bar_cache = BarCache(tmp)
+            self.providers = Router(frame)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 与本地重叠的三天收盘价一致，之后是新的 K 线
+        recent = _bars(new_days, np.r_[[100.0] * 3, np.linspace(101, 110, len(new_days) - 3)])
+        engine = Engine(tmp, recent)
+        engine.bar_cache.save("NVDA", _bars(old_days, 100.0))
+        df = engine._topped_up_history("NVDA")
+        assert engine.providers.days == [10]
+        assert df.index[-1] == new_days[-1] and df.index.is_unique
+        assert len(df) == 250 - 3 + len(new_days)
+        assert engine.bar_cache.load("NVDA").index[-1] == new_days[-1]
+
+        # 重叠那天的收盘价对不上 (复权)，交给整段下载
+        adjusted = Engine(tmp, _bars(new_days, 90.0))
+        adjusted.bar_cache.save("NVDA", _bars(old_days, 100.0))
+        assert adjusted._topped_up_history("NVDA") is None
+
+        items = [("NVDA beats estimates", "Tue, 10 Mar 2026 18:00:00 GMT"),
+                 ("NVDA slumps before the open", "Tue, 10 Mar 2026 11:00:00 GMT"),
+                 ("Undated", "")]
+        digest = engine._news_digest("NVDA", items, published_since(PRE_TS))
+        assert digest["count"] == 1 and "beats" in digest["text"] and "slumps" not in digest["text"]
+        none_new = engine._news_digest("NVDA", items[1:], published_since(PRE_TS))
+        assert none_new["count"] == 0 and "没有新标题" in none_new["text"]
+
+
+if __name__ == "__main__":
+    test_snapshots_roundtrip_and_prune()
+    test_deltas_and_compact_prompt()
+    test_history_topup_and_new_headlines()
@@ -0,0 +1,51 @@
+# tests/test_shard.py
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shard import parse_shard, partition_watchlist, ShardWriter, load_shard_artifacts
+
+WATCHLIST = ["NVDA", "AAPL", "MSFT", "GOOG", "AMZN", "META", "TSLA", "PLTR"]
+
+
+def test_partition_covers_watchlist():
+    print("🧩 [测试] 检查分片是否不重不漏...")
+    shards = [partition_watchlist(WATCHLIST, i, 3) for i in range(1, 4)]
+    flat = [s for shard in shards for s in shard]
+    assert sorted(flat) == sorted(WATCHLIST)
+    assert len(flat) == len(set(flat))
+    # 同样的输入必须得到同样的切分
+    assert shards == [partition_watchlist(WATCHLIST, i, 3) for i in range(1, 4)]
+    print("✅ 分片切分正常")
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    for bad in ["0/4", "5/4", "abc", "1-4"]:
+        try:
+            parse_shard(bad)
+        except Exception:
+            continue
+        raise AssertionError(f"{bad} 应该被拒绝")
+
+
+def test_merge_orders_by_watchlist():
+    print("🧩 [测试] 检查 merge 是否按原始顺序合并...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in (2, 1):
+            writer = ShardWriter("pre", i, 2, artifact_dir=tmp)
+            for ticker in partition_watchlist(WATCHLIST, i, 2):
+                writer.write(ticker, WATCHLIST.index(ticker), f"insight-{ticker}")
+
+        mode, insights = load_shard_artifacts(tmp)
+        assert mode == "pre"
+        assert insights == [(t, f"insight-{t}") for t in WATCHLIST]
+    print("✅ merge 顺序正常")
+
+
+if __name__ == "__main__":
+    test_partition_covers_watchlist()
+    test_parse_shard()
+    test_merge_orders_by_watchlist()
@@ -0,0 +1,71 @@
+# tests/test_symbol_context.py
+import sys
+import os
+import json
+import math
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from symbol_context import SymbolContext, ContextBatch, fmt, is_missing
+from tests.mock_data import MOCK_CONTEXT
+
+
+def test_legacy_dict_and_missing_values():
+    print("🧩 [测试] SymbolContext 缺失值与旧版字典兼容...")
+    legacy = {
+        "symbol": "NVDA",
+        "quote": {"price": 120.5, "change_pct": 1.2, "source": "YFinance"},
+        "technicals": {"rsi": 0, "atr": 0, "sma20": 0},
+        "news": "暂无新闻",
+        "options": {"pcr": "N/A", "pressure": "N/A"},
+        "fundamental": "N/A",
+        "macro": {"spy_change": 0.3},
+    }
+    ctx = SymbolContext.from_dict(legacy)
+    assert ctx.price == 120.5 and ctx.rsi == 0.0
+    assert math.isnan(ctx.pcr) and math.isnan(ctx.target_price) and math.isnan(ctx.qqq_change)
+    assert fmt(ctx.pcr) == "N/A" and fmt(ctx.price) == "120.5"
+
+    # to_dict 只含 JSON 原生类型，缺失值为 None，可以原样读回
+    data = json.loads(json.dumps(ctx.to_dict()))
+    assert data["options"]["pcr"] is None
+    again = SymbolContext.from_dict(data)
+    assert again.to_dict() == ctx.to_dict()
+
+    assert MOCK_CONTEXT.stop_loss(2.0) == 868.88
+    assert is_missing(ctx.stop_loss(2.0)) is False
+    assert is_missing(SymbolContext("X", price=10).stop_loss(2.0))
+
+    try:
+        SymbolContext("X", volume=1)
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("未知字段应被拒绝")
+    print("✅ SymbolContext 正常")
+
+
+def test_context_batch_roundtrip():
+    print("🧩 [测试] ContextBatch 列式存取...")
+    contexts = [MOCK_CONTEXT, SymbolContext("AAPL", price=190.0, rsi=28.0, trigger="RSI 下穿超卖线")]
+    batch = ContextBatch.from_contexts(contexts)
+    assert len(batch) == 2
+    assert batch["rsi"].tolist() == [75.0, 28.0]
+    assert math.isnan(batch["pcr"][1])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "contexts.npz")
+        batch.save(path)
+        loaded = ContextBatch.load(path)
+
+    rows = list(loaded)
+    assert [r.symbol for r in rows] == ["TEST-TICKER", "AAPL"]
+    assert rows[0].to_dict() == MOCK_CONTEXT.to_dict()
+    assert rows[1].trigger == "RSI 下穿超卖线" and rows[0].trigger is None
+    print("✅ ContextBatch 正常")
+
+
+if __name__ == "__main__":
+    test_legacy_dict_and_missing_values()
+    test_context_batch_roundtrip()
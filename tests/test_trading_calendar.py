@@ -0,0 +1,69 @@
+# tests/test_trading_calendar.py
+import sys
+import os
+from datetime import date, datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trading_calendar import SessionIndex, holidays
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_holidays_and_half_days():
+    print("📅 [测试] NYSE 休市日与半日市...")
+    assert holidays(2025) == {
+        date(2025, 1, 1), date(2025, 1, 9), date(2025, 1, 20), date(2025, 2, 17), date(2025, 4, 18),
+        date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1), date(2025, 11, 27),
+        date(2025, 12, 25),
+    }
+    # 圣诞节落在周六 -> 周五补休；元旦落在周六 -> 前一年 12-31 照常开市
+    assert date(2021, 12, 24) in holidays(2021)
+    assert date(2021, 12, 31) not in holidays(2021)
+
+    index = SessionIndex(years=[2024, 2025])
+    assert sum(1 for d in index.sessions if d.year == 2024) == 252
+    assert sum(1 for d in index.sessions if d.year == 2025) == 250
+
+    # 夏令时 (EDT, UTC-4) 与冬令时 (EST, UTC-5) 的收盘时间换算
+    july = index.session(date(2025, 7, 3))
+    assert july.early_close and july.close == _utc(2025, 7, 3, 17, 0)
+    black_friday = index.session(date(2025, 11, 28))
+    assert black_friday.early_close and black_friday.close == _utc(2025, 11, 28, 18, 0)
+    assert index.session(date(2025, 3, 10)).open == _utc(2025, 3, 10, 13, 30)  # DST 切换后的周一
+    assert index.session(date(2025, 3, 7)).open == _utc(2025, 3, 7, 14, 30)
+    print("✅ 交易日历正常")
+
+
+def test_session_queries():
+    index = SessionIndex(years=[2025])
+    # 周六早上: 最近一个完整交易日是周五；纽约日期不是交易日
+    saturday = _utc(2025, 3, 8, 13, 0)
+    assert not index.is_session(index.local_date(saturday))
+    assert index.last_closed_session(saturday).date == date(2025, 3, 7)
+
+    # 盘前 (纽约 8:30)：今天还没收盘，最近的完整日线是昨天
+    pre_market = _utc(2025, 3, 11, 12, 30)
+    assert not index.is_open(pre_market)
+    assert index.last_closed_session(pre_market).date == date(2025, 3, 10)
+
+    # 盘后 (UTC 01:00 = 纽约前一天 21:00)
+    post_market = _utc(2025, 3, 12, 1, 0)
+    assert index.local_date(post_market) == date(2025, 3, 11)
+    assert index.last_closed_session(post_market).date == date(2025, 3, 11)
+
+    # 周五收盘后抓的期权链，到周一开盘前都还是最新的
+    fetched = _utc(2025, 3, 7, 22, 0)
+    assert not index.traded_between(fetched, _utc(2025, 3, 10, 13, 0))
+    assert index.traded_between(fetched, _utc(2025, 3, 10, 14, 0))
+    assert index.traded_between(_utc(2025, 3, 10, 12, 0), _utc(2025, 3, 10, 21, 0))
+
+    assert index.next_session(date(2025, 12, 24)).date == date(2025, 12, 26)
+    assert index.previous_session(date(2026, 1, 2)).date == date(2025, 12, 31)
+
+
+if __name__ == "__main__":
+    test_holidays_and_half_days()
+    test_session_queries()
@@ -0,0 +1,204 @@
+# trading_calendar.py
+"""
+NYSE 交易日历 (纯标准库，不依赖 requirements.txt，CI 装依赖之前就能用)
+
+- 休市: 元旦 / 马丁路德金日 / 总统日 / 耶稣受难日 / 阵亡将士纪念日 / 六月节 / 独立日 / 劳工日 / 感恩节 / 圣诞节
+  (周六的假日提前到周五，周日的顺延到周一；元旦落在周六时不补休)，以及临时休市日
+- 半日市 (13:00 收盘): 独立日前一天、感恩节次日、平安夜
+- 开收盘时间按 America/New_York 本地时间换算成 UTC，夏令时切换自动处理
+
+命令行 (供 GitHub Actions 在安装依赖前判断是否需要运行):
+    python trading_calendar.py check          # 输出 trading=true / trading=false
+    python trading_calendar.py list 2025      # 列出某年的全部交易日
+"""
+import argparse
+import bisect
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+NEW_YORK = ZoneInfo("America/New_York")
+OPEN_TIME = time(9, 30)
+CLOSE_TIME = time(16, 0)
+EARLY_CLOSE_TIME = time(13, 0)
+
+# 规则之外的临时休市 (国葬、飓风等)
+SPECIAL_CLOSURES = {
+    date(2012, 10, 29), date(2012, 10, 30),  # 飓风桑迪
+    date(2018, 12, 5),  # 老布什国葬
+    date(2025, 1, 9),  # 卡特国葬
+}
+
+Session = namedtuple("Session", ["date", "open", "close", "early_close"])
+
+
+def _nth_weekday(year, month, weekday, n):
+    """某月第 n 个星期几 (n=-1 表示最后一个)"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    """公历复活节 (匿名格里历算法)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day):
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def holidays(year):
+    days = {
+        _nth_weekday(year, 1, 0, 3),  # 马丁路德金日
+        _nth_weekday(year, 2, 0, 3),  # 总统日
+        _easter(year) - timedelta(days=2),  # 耶稣受难日
+        _nth_weekday(year, 5, 0, -1),  # 阵亡将士纪念日
+        _observed(date(year, 7, 4)),  # 独立日
+        _nth_weekday(year, 9, 0, 1),  # 劳工日
+        _nth_weekday(year, 11, 3, 4),  # 感恩节
+        _observed(date(year, 12, 25)),  # 圣诞节
+    }
+    # 元旦落在周六时不在前一年 12-31 补休
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # 六月节
+    return days | {d for d in SPECIAL_CLOSURES if d.year == year}
+
+
+def early_closes(year):
+    days = {_nth_weekday(year, 11, 3, 4) + timedelta(days=1)}  # 感恩节次日
+    for day in (date(year, 7, 3), date(year, 12, 24)):  # 独立日前一天 / 平安夜 (周一到周四)
+        if day.weekday() < 4:
+            days.add(day)
+    return days
+
+
+def _utc(day, local_time):
+    return datetime.combine(day, local_time, tzinfo=NEW_YORK).astimezone(timezone.utc)
+
+
+class SessionIndex:
+    """
+    预先算好的交易日索引：按年生成，日期有序列表 + 字典，查询都是 O(log n) 以内
+    时间参数一律用带时区的 datetime (naive 视为 UTC)
+    """
+
+    def __init__(self, years=None):
+        self.years = set()
+        self.dates = []
+        self.sessions = {}
+        today = datetime.now(timezone.utc).date()
+        for year in years or range(today.year - 2, today.year + 2):
+            self._build(year)
+
+    def _build(self, year):
+        if year in self.years:
+            return
+        closed = holidays(year)
+        early = early_closes(year)
+        day = date(year, 1, 1)
+        while day.year == year:
+            if day.weekday() < 5 and day not in closed:
+                is_early = day in early
+                self.sessions[day] = Session(day, _utc(day, OPEN_TIME),
+                                             _utc(day, EARLY_CLOSE_TIME if is_early else CLOSE_TIME), is_early)
+            day += timedelta(days=1)
+        self.years.add(year)
+        self.dates = sorted(self.sessions)
+
+    def _ensure(self, day):
+        for year in (day.year - 1, day.year, day.year + 1):
+            self._build(year)
+
+    @staticmethod
+    def _aware(moment):
+        return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+    @staticmethod
+    def local_date(moment):
+        """某个时刻在纽约是哪一天"""
+        return SessionIndex._aware(moment).astimezone(NEW_YORK).date()
+
+    def session(self, day):
+        """交易日返回 Session，休市日返回 None"""
+        self._ensure(day)
+        return self.sessions.get(day)
+
+    def is_session(self, day):
+        return self.session(day) is not None
+
+    def previous_session(self, day):
+        """严格早于 day 的最近一个交易日"""
+        self._ensure(day)
+        i = bisect.bisect_left(self.dates, day)
+        return self.sessions[self.dates[i - 1]]
+
+    def next_session(self, day):
+        """严格晚于 day 的下一个交易日"""
+        self._ensure(day)
+        i = bisect.bisect_right(self.dates, day)
+        return self.sessions[self.dates[i]]
+
+    def is_open(self, moment):
+        moment = self._aware(moment)
+        session = self.session(self.local_date(moment))
+        return session is not None and session.open <= moment < session.close
+
+    def last_closed_session(self, moment):
+        """在 moment 之前已经收盘的最近一个交易日 (它的日线是完整的)"""
+        moment = self._aware(moment)
+        session = self.session(self.local_date(moment))
+        if session is not None and session.close <= moment:
+            return session
+        return self.previous_session(self.local_date(moment))
+
+    def traded_between(self, start, end):
+        """[start, end) 之间是否有过交易时段 (用来判断缓存的期权链等是否已经过期)"""
+        start, end = self._aware(start), self._aware(end)
+        session = self.last_closed_session(end)
+        if session.close > start:
+            return True
+        return self.is_open(end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NYSE 交易日历")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_check = sub.add_parser("check", help="今天 (纽约日期) 是否交易日，输出 trading=true/false")
+    p_check.add_argument("--date", type=date.fromisoformat, default=None)
+    p_list = sub.add_parser("list", help="列出某年的交易日 (标出半日市)")
+    p_list.add_argument("year", type=int)
+    args = parser.parse_args()
+
+    if args.command == "check":
+        index = SessionIndex()
+        day = args.date or index.local_date(datetime.now(timezone.utc))
+        print(f"trading={'true' if index.is_session(day) else 'false'}")
+    else:
+        index = SessionIndex(years=[args.year])
+        for day in sorted(d for d in index.sessions if d.year == args.year):
+            s = index.sessions[day]
+            print(f"{day}  {s.open:%H:%M}-{s.close:%H:%M} UTC{'  半日市' if s.early_close else ''}")
+
+
+if __name__ == "__main__":
+    main()